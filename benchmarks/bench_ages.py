@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from elo_calculations import ELO
+from tests.test_elo_calculations import reference_most_recent_age
+from match_store import MatchStore
+from bench_elo import synthetic_matches
+from bench_match_store import time_load
+
+def main():
+    """
+    Compares get_most_recent_age, uncached and cached, against the original sort and pivot implementation for a
+    dataframe and a match store, and times ages as of a historical date.
+    """
+    rng = np.random.default_rng(0)
+    data = synthetic_matches(300000, 6000, rng)
+    data['winner_age'] = rng.uniform(17, 40, len(data)).round(1)
+    data['loser_age'] = rng.uniform(17, 40, len(data)).round(1)
+    data['tourney_date'] = data['Year'] * 10000 + rng.integers(1, 13, len(data)) * 100 + 1
+    elo = ELO(1500, 2023)
+    assert elo.get_most_recent_age(data).equals(reference_most_recent_age(data, elo.current_year)), "Grouped ages differ from the reference"
+
+    def uncached(data, as_of = None):
+        ELO.age_cache.clear()
+        return elo.get_most_recent_age(data, as_of)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = MatchStore(os.path.join(tmp_dir, 'store'))
+        store.write_frame(data)
+        timings = [
+            ('reference', lambda: reference_most_recent_age(data, elo.current_year)),
+            ('dataframe', lambda: uncached(data)),
+            ('dataframe cached', lambda: elo.get_most_recent_age(data)),
+            ('store', lambda: uncached(store)),
+            ('store cached', lambda: elo.get_most_recent_age(store)),
+            ('as of 2010-07-01', lambda: uncached(data, '2010-07-01'))]
+
+        print(f"{len(data)} matches, 6000 players")
+        print(f"{'method':<18} {'time (ms)':>10}")
+        for method, calculation in timings:
+            print(f"{method:<18} {time_load(calculation, repeats=5) * 1e3:>10.2f}")
+
+if __name__ == "__main__":
+    main()
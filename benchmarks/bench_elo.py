@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from elo_calculations import ELO
+
+def synthetic_matches(rows, players, rng):
+    """
+    Creates random matches in the layout the ELO class reads.
+
+    Args:
+        rows (int): Number of matches.
+        players (int): Number of players.
+        rng (numpy Generator): Random number generator.
+
+    Returns:
+        Dataframe of the matches, sorted by year.
+    """
+    winners = rng.integers(0, players, rows)
+    losers = (winners + rng.integers(1, players, rows)) % players
+    names = np.array([f'Player {i}' for i in range(players)], dtype=object)
+    return pd.DataFrame({
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows, p=[0.55, 0.3, 0.15]),
+        'tourney_level': rng.choice(['G', 'M', 'A', 'D', 'F', 'C'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'Year': np.sort(rng.integers(1990, 2023, rows))})
+
+def time_calculation(calculation, elo, data, repeats = 1):
+    """
+    Times an ELO calculation from initial ratings.
+
+    Args:
+        calculation (function): elo_calculation or reference_elo_calculation of the ELO instance.
+        elo (ELO): ELO instance.
+        data (pandas dataframe): Matches to rate.
+        repeats (int): Number of calculations, of which the fastest is reported. Default set to 1.
+
+    Returns:
+        Tuple of the final ratings and the run time in seconds.
+    """
+    names = sorted(set(data['winner_name']) | set(data['loser_name']))
+    times = []
+    for _ in range(repeats):
+        elo_df = elo.initial_elos(['Hard', 'Clay', 'Grass'], names)
+        start = time.perf_counter()
+        ratings = calculation(data, elo_df)
+        times.append(time.perf_counter() - start)
+    return ratings, min(times)
+
+def main():
+    """
+    Compares the row by row ELO calculation against the engine, checking both give the same ratings. The engine time is
+    the fastest of five calculations.
+    """
+    rng = np.random.default_rng(0)
+    elo = ELO(1500, 2023)
+    print(f"{'matches':>8} {'reference (s)':>14} {'engine (s)':>11} {'speedup':>8} {'identical':>10}")
+    for rows in [5000, 20000, 300000]:
+        data = synthetic_matches(rows, max(rows // 50, 200), rng)
+        engine_ratings, engine_time = time_calculation(elo.elo_calculation, elo, data, 5)
+        if rows <= 20000:
+            reference_ratings, reference_time = time_calculation(elo.reference_elo_calculation, elo, data)
+            identical = bool((engine_ratings.to_numpy() == reference_ratings.to_numpy()).all())
+            print(f"{rows:>8} {reference_time:>14.2f} {engine_time:>11.3f} {reference_time / engine_time:>7.0f}x {str(identical):>10}")
+        else:
+            print(f"{rows:>8} {'-':>14} {engine_time:>11.3f} {'-':>8} {'-':>10}")
+
+if __name__ == "__main__":
+    main()
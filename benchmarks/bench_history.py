@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from elo_calculations import ELO
+from bench_elo import synthetic_matches
+
+def time_calculation(elo, data, names, history):
+    """
+    Times an ELO calculation from initial ratings.
+
+    Args:
+        elo (ELO): ELO instance.
+        data (pandas dataframe): Matches to rate.
+        names (list): Names of every player.
+        history (boolean): Whether to record the rating history.
+
+    Returns:
+        Run time in seconds.
+    """
+    elo_df = elo.initial_elos(['Hard', 'Clay', 'Grass'], names)
+    start = time.perf_counter()
+    elo.elo_calculation(data, elo_df, history=history)
+    return time.perf_counter() - start
+
+def main():
+    """
+    Compares the ELO calculation with and without recording the rating history, taking the fastest of five
+    calculations of each in turn, and reports the history size and the time to query one player's series.
+    """
+    rng = np.random.default_rng(0)
+    data = synthetic_matches(300000, 6000, rng)
+    names = sorted(set(data['winner_name']) | set(data['loser_name']))
+    elo = ELO(1500, 2023)
+
+    times = [(time_calculation(elo, data, names, False), time_calculation(elo, data, names, True)) for _ in range(5)]
+    without = min(without for without, _ in times)
+    recording = min(recording for _, recording in times)
+    size = sum(array.nbytes for array in elo.history.arrays.values()) + sum(array.nbytes for chunk in elo.history.chunks for array in chunk.values())
+    print(f"{len(data)} matches: {without:.3f} s without history, {recording:.3f} s recording "
+          f"({(recording / without - 1) * 100:.0f}% overhead), history {size / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    elo.history.series(names[0])
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for name in names[1:101]:
+        elo.history.series(name, start=20000101, end=20100101)
+    print(f"first query {first * 1e3:.1f} ms (indexes the history), then {(time.perf_counter() - start) * 10:.2f} ms per query")
+
+if __name__ == "__main__":
+    main()
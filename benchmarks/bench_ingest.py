@@ -0,0 +1,159 @@
+import contextlib
+import functools
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from get_tennis_data import GetTennisData
+
+# Column layout of Jeff Sackmann's yearly match files.
+SACKMANN_COLUMNS = ['tourney_id', 'tourney_name', 'surface', 'draw_size', 'tourney_level', 'tourney_date', 'match_num',
+                    'winner_id', 'winner_seed', 'winner_entry', 'winner_name', 'winner_hand', 'winner_ht', 'winner_ioc',
+                    'winner_age', 'loser_id', 'loser_seed', 'loser_entry', 'loser_name', 'loser_hand', 'loser_ht',
+                    'loser_ioc', 'loser_age', 'score', 'best_of', 'round', 'minutes', 'w_ace', 'w_df', 'w_svpt', 'w_1stIn',
+                    'w_1stWon', 'w_2ndWon', 'w_SvGms', 'w_bpSaved', 'w_bpFaced', 'l_ace', 'l_df', 'l_svpt', 'l_1stIn',
+                    'l_1stWon', 'l_2ndWon', 'l_SvGms', 'l_bpSaved', 'l_bpFaced', 'winner_rank', 'winner_rank_points',
+                    'loser_rank', 'loser_rank_points']
+
+def write_synthetic_year(path, year, rows, rng):
+    """
+    Writes a synthetic match file with the same columns as the github files.
+
+    Args:
+        path (str): Path of the csv to write.
+        year (int): Year of the matches.
+        rows (int): Number of matches.
+        rng (numpy Generator): Random number generator.
+    """
+    players = np.array([f'Player {i}' for i in range(600)], dtype=object)
+    df = pd.DataFrame({column: rng.integers(0, 100, rows) for column in SACKMANN_COLUMNS})
+    df['tourney_id'] = [f'{year}-{i // 50}' for i in range(rows)]
+    df['tourney_name'] = [f'Tournament {i // 50}' for i in range(rows)]
+    df['surface'] = rng.choice(['Hard', 'Clay', 'Grass', 'Carpet'], rows, p=[0.55, 0.3, 0.1, 0.05])
+    df['tourney_level'] = rng.choice(['G', 'M', 'A', 'D'], rows)
+    df['tourney_date'] = year * 10000 + 101 + (np.arange(rows) // 50) % 12 * 100
+    df['winner_name'] = rng.choice(players, rows)
+    df['loser_name'] = rng.choice(players, rows)
+    df['winner_age'] = rng.uniform(18, 38, rows).round(1)
+    df['loser_age'] = rng.uniform(18, 38, rows).round(1)
+    df['score'] = '6-4 3-6 7-6(5)'
+    df['round'] = rng.choice(['R32', 'R16', 'QF', 'SF', 'F'], rows)
+    df.to_csv(path, index=False)
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """
+    File server handler that does not log every request.
+    """
+    def log_message(self, format, *args):
+        pass
+
+def serve(directory):
+    """
+    Serves the files of a directory over http on a free local port, answering conditional requests with 304 like github.
+
+    Args:
+        directory (str): Directory to serve.
+
+    Returns:
+        The running ThreadingHTTPServer.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def concat_then_project(tennis_data, years):
+    """
+    The previous ingest: download the files as get_data does, read every file whole, concatenate, then select the
+    columns and drop rows.
+
+    Args:
+        tennis_data (GetTennisData): Instance whose URL and cache the files are fetched with.
+        years (range): Years to ingest.
+
+    Returns:
+        Number of matches kept.
+    """
+    df_list = []
+    for (_, year), path in tennis_data.fetch_years(years).items():
+        df = pd.read_csv(path)
+        df['Year'] = year
+        df_list.append(df)
+    final_df = pd.concat(df_list)
+    final_df = final_df[['tourney_name', 'surface', 'draw_size', 'tourney_level', 'best_of',
+                         'winner_name', 'winner_age', 'loser_name', 'loser_age', 'Year']]
+    final_df = final_df[final_df['surface'] != 'Carpet']
+    return len(final_df.dropna())
+
+def get_data(tennis_data, years, incremental):
+    """
+    The current ingest, get_data itself.
+
+    Args:
+        tennis_data (GetTennisData): Instance whose URL, cache and output directory are used.
+        years (range): Years to ingest.
+        incremental (boolean): Update the match store instead of writing tennis_data.csv.
+
+    Returns:
+        Number of matches returned.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return len(tennis_data.get_data(year_lower=years.start, year_upper=years.stop, incremental=incremental))
+
+def measure(function, *args):
+    """
+    Runs a function once for timing, then again while tracing memory, since tracing slows the run down.
+
+    Args:
+        function (function): Function to run.
+        *args: Arguments to the function.
+
+    Returns:
+        Tuple of the function result, the untraced run time in seconds and the peak traced memory in MB.
+    """
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+def main():
+    """
+    Compares the time and peak memory of the previous ingest against get_data, writing the csv and updating the match
+    store, as the number of years grows. The synthetic yearly files are served from a local http server, and each
+    ingest is timed with its files already cached.
+    """
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files_dir = os.path.join(tmp_dir, 'files')
+        os.makedirs(files_dir)
+        for year in range(1968, 2025):
+            write_synthetic_year(os.path.join(files_dir, f'atp_matches_{year}.csv'), year, 3000, rng)
+        server = serve(files_dir)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/atp_matches_{{}}.csv"
+
+        print(f"{'years':>5} {'ingest':<24} {'matches':>8} {'time (s)':>9} {'peak (MB)':>10}")
+        for num_years in [3, 10, 30, 57]:
+            years = range(2025 - num_years, 2025)
+            output_dir = os.path.join(tmp_dir, f'output_{num_years}')
+            tennis_data = GetTennisData(base_url=base_url, cache_dir=os.path.join(output_dir, 'cache'), output_dir=output_dir, chunk_size=2000)
+            for name, function, args in [('concat then project', concat_then_project, (tennis_data, years)),
+                                         ('get_data, csv', get_data, (tennis_data, years, False)),
+                                         ('get_data, incremental', get_data, (tennis_data, years, True))]:
+                rows, elapsed, peak = measure(function, *args)
+                print(f"{num_years:>5} {name:<24} {rows:>8} {elapsed:>9.2f} {peak:>10.1f}")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from match_store import MatchStore
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'tennis_data.csv')
+
+def time_load(load, repeats = 20):
+    """
+    Times a loader, taking the best of several runs.
+
+    Args:
+        load (function): Function returning the loaded dataframe.
+        repeats (int): Number of timed runs. Default set to 20.
+
+    Returns:
+        Best load time in seconds as a float.
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def peak_memory(load):
+    """
+    Measures the peak memory allocated while loading and the memory held by the loaded dataframe.
+
+    Args:
+        load (function): Function returning the loaded dataframe.
+
+    Returns:
+        Tuple of the peak allocation during the load and the size of the dataframe, both in MB.
+    """
+    tracemalloc.start()
+    df = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, df.memory_usage(deep=True).sum() / 1e6
+
+def store_size(root):
+    """
+    Sums the size of every file of a match store: the manifest, the dictionaries and the partitions under each tour.
+
+    Args:
+        root (str): Root directory of the store.
+
+    Returns:
+        Size on disk in bytes as an int.
+    """
+    return sum(os.path.getsize(os.path.join(directory, f)) for directory, _, files in os.walk(root) for f in files)
+
+def main():
+    """
+    Compares loading tennis_data.csv through pd.read_csv against loading the same data from the columnar match store,
+    for the real file and for a copy scaled to ten times as many matches.
+    """
+    original_df = pd.read_csv(CSV_PATH)
+
+    for scale in [1, 10]:
+        # Scaled copies shift the years of each repeat so every copy lands in its own partitions.
+        csv_df = pd.concat([original_df.assign(Year=original_df['Year'] - 10 * i) for i in range(scale)], ignore_index=True)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'tennis_data.csv')
+            csv_df.to_csv(csv_path, index=False)
+            store = MatchStore(os.path.join(tmp_dir, 'store'))
+            store.write_frame(csv_df)
+
+            loaders = {'csv': lambda: pd.read_csv(csv_path), 'match store': store.load}
+            print(f"{len(csv_df)} matches, csv {os.path.getsize(csv_path) / 1e6:.2f} MB on disk, match store {store_size(store.root) / 1e6:.2f} MB on disk")
+            print(f"{'loader':<12} {'time (ms)':>10} {'peak alloc (MB)':>16} {'frame (MB)':>11}")
+
+            times = {}
+            for name, load in loaders.items():
+                times[name] = time_load(load)
+                peak, frame = peak_memory(load)
+                print(f"{name:<12} {times[name] * 1e3:>10.2f} {peak:>16.2f} {frame:>11.2f}")
+
+            print(f"speedup: {times['csv'] / times['match store']:.1f}x\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from get_tennis_data import GetTennisData
+from match_store import MatchStore
+from bench_ingest import write_synthetic_year
+
+# Rough number of matches a year on each tour, giving about ten times the ATP main tour in total.
+TOUR_ROWS = {'atp': 2800, 'challenger': 7000, 'futures': 15000, 'wta': 2600}
+
+def ingest(paths, store_dir):
+    """
+    Ingests every tour and year into one match store, as get_data does in incremental mode.
+
+    Args:
+        paths (dict): Dictionary of (tour, year) to csv path.
+        store_dir (str): Directory of the match store.
+
+    Returns:
+        Number of matches stored.
+    """
+    tennis_data = GetTennisData()
+    store = MatchStore(store_dir)
+    rows = 0
+    for (tour, year), path in paths.items():
+        df = tennis_data.read_year(path, year, tour)
+        store.write_partition(year, df, tennis_data.file_hash(path), tour)
+        rows += len(df)
+    return rows
+
+def measure(function, *args, **kwargs):
+    """
+    Runs a function three times for timing, keeping the fastest, then again while tracing memory.
+
+    Args:
+        function (function): Function to run.
+        *args: Arguments to the function.
+        **kwargs: Keyword arguments to the function.
+
+    Returns:
+        Tuple of the function result, the fastest untraced run time in seconds and the peak traced memory in MB.
+    """
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = function(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(times), peak / 1e6
+
+def directory_size(path):
+    """
+    Gets the total size of the files under a directory.
+
+    Args:
+        path (str): Directory to measure.
+
+    Returns:
+        Size in MB.
+    """
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 1e6
+
+def main():
+    """
+    Reports ingest and load throughput and peak memory for a multi-tour store, and the cost of an ATP only load from it.
+    """
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {}
+        for year in range(2014, 2024):
+            for tour, rows in TOUR_ROWS.items():
+                paths[(tour, year)] = os.path.join(tmp_dir, f'{tour}_matches_{year}.csv')
+                write_synthetic_year(paths[(tour, year)], year, rows, rng)
+        csv_size = sum(os.path.getsize(path) for path in paths.values()) / 1e6
+
+        store_dir = os.path.join(tmp_dir, 'store')
+        start = time.perf_counter()
+        stored_rows = ingest(paths, store_dir)
+        elapsed = time.perf_counter() - start
+        print(f"ingest: {stored_rows} matches from {csv_size:.1f} MB of csv in {elapsed:.2f} s "
+              f"({stored_rows / elapsed / 1e3:.0f}k matches/s), store {directory_size(store_dir):.1f} MB on disk")
+
+        store = MatchStore(store_dir)
+        print(f"{'load':<22} {'matches':>8} {'time (ms)':>10} {'matches/s':>10} {'peak (MB)':>10} {'frame (MB)':>11}")
+        for name, kwargs in [('all tours', {}),
+                             ('atp only', {'tours': ['atp']}),
+                             ('atp + challenger', {'tours': ['atp', 'challenger']}),
+                             ('all tours, 2 columns', {'columns': ['winner_id', 'loser_id']})]:
+            df, elapsed, peak = measure(store.load_matches, **kwargs)
+            frame = df.memory_usage(deep=False).sum() / 1e6
+            print(f"{name:<22} {len(df):>8} {elapsed * 1e3:>10.1f} {len(df) / elapsed / 1e6:>9.1f}M {peak:>10.1f} {frame:>11.1f}")
+
+if __name__ == "__main__":
+    main()
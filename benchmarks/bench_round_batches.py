@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from elo_engine import EloEngine, conflict_free_batches
+from skillo_engine import SkillOEngine
+from player_index import PlayerIndex
+
+SURFACES = ['Hard', 'Clay', 'Grass']
+
+def tournament_matches(tournaments, players, rng, draw_size = 64):
+    """
+    Creates random knockout tournaments in the layout the ELO class reads, each listed round by round like the match
+    history files.
+
+    Args:
+        tournaments (int): Number of tournaments.
+        players (int): Number of players the draws are picked from.
+        rng (numpy Generator): Random number generator.
+        draw_size (int): Number of players in each draw, a power of two. Default set to 64.
+
+    Returns:
+        Dataframe of the matches, sorted by year.
+    """
+    names = np.array([f'Player {i}' for i in range(players)], dtype=object)
+    years = np.sort(rng.integers(1990, 2023, tournaments))
+    frames = []
+    for year in years:
+        field = rng.choice(players, draw_size, replace=False)
+        winners, losers = [], []
+        while len(field) > 1:
+            first_wins = rng.random(len(field) // 2) < 0.5
+            round_winners = np.where(first_wins, field[::2], field[1::2])
+            winners.append(round_winners)
+            losers.append(np.where(first_wins, field[1::2], field[::2]))
+            field = round_winners
+        frames.append(pd.DataFrame({
+            'surface': rng.choice(SURFACES, p=[0.55, 0.3, 0.15]),
+            'tourney_level': rng.choice(['G', 'M', 'A', 'D', 'F', 'C']),
+            'winner_name': names[np.concatenate(winners)],
+            'loser_name': names[np.concatenate(losers)],
+            'Year': year}))
+    return pd.concat(frames, ignore_index=True)
+
+def main():
+    """
+    Times applying the matches of knockout tournaments one at a time against applying them in conflict free batches,
+    for one and 30 SkillO runs, checking the ratings are identical.
+    """
+    rng = np.random.default_rng(0)
+    data = tournament_matches(1000, 2000, rng)
+    player_index = PlayerIndex.from_matches(data)
+    matches = EloEngine(2023).match_arrays(data, player_index, SURFACES)
+    start = time.perf_counter()
+    batches = conflict_free_batches(matches)
+    schedule_time = time.perf_counter() - start
+    print(f"{len(data)} matches, {len(player_index)} players, {len(batches) - 1} batches of {len(data) / (len(batches) - 1):.1f} matches "
+          f"on average, scheduled in {schedule_time:.3f} s\n")
+    print(f"{'model':>12} {'one at a time (s)':>18} {'batched (s)':>12} {'identical':>10}")
+
+    skillo = SkillOEngine(2023)
+    matches['gamma'] = skillo.gamma_factors(data)
+    for runs in [1, 30]:
+        matches['scale'] = np.column_stack([skillo.draw_scales(matches['gamma'], np.random.default_rng(run)) for run in range(runs)])
+        shape = (runs, len(player_index), 3)
+        start = time.perf_counter()
+        sequential = skillo.run(np.full(shape, 25.0), np.full(shape, 8.3333), matches, SURFACES, np.arange(len(data) + 1))
+        sequential_time = time.perf_counter() - start
+        start = time.perf_counter()
+        batched = skillo.run(np.full(shape, 25.0), np.full(shape, 8.3333), matches, SURFACES, batches)
+        batched_time = time.perf_counter() - start
+        identical = np.array_equal(sequential[0], batched[0]) and np.array_equal(sequential[1], batched[1])
+        print(f"{f'SkillO x{runs}':>12} {sequential_time:>18.2f} {batched_time:>12.2f} {str(identical):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from rating_runner import RatingRunner
+from elo_engine import EloEngine
+from skillo_engine import SkillOEngine
+from elo_calculations import ELO
+from skillo_calculations import skillO
+from bench_elo import synthetic_matches
+
+def runner_time(data, runs):
+    """
+    Times a RatingRunner with two ELO models and a SkillO model.
+
+    Args:
+        data (pandas dataframe): Matches to rate.
+        runs (int): Number of SkillO runs.
+
+    Returns:
+        Time in seconds as a float.
+    """
+    start = time.perf_counter()
+    runner = RatingRunner(2023)
+    runner.add('elo', EloEngine(2023))
+    runner.add('elo_k32', EloEngine(2023), K=32)
+    runner.add('skillo', SkillOEngine(2023, beta=1, year_decay=1.1), initial_mean=25, initial_variance=8.3333, runs=runs)
+    runner.run(data)
+    return time.perf_counter() - start
+
+def classes_time(data, surfaces, names):
+    """
+    Times rating with two ELO models and two SkillO runs through the ELO and skillO classes.
+
+    Args:
+        data (pandas dataframe): Matches to rate.
+        surfaces (list): Surfaces of the rating columns.
+        names (list): Names of every player.
+
+    Returns:
+        Time in seconds as a float.
+    """
+    start = time.perf_counter()
+    elo = ELO(1500, 2023)
+    for K in [20, 32]:
+        elo.elo_calculation(data, elo.initial_elos(surfaces, names), K)
+    skillo = skillO(25, 8.3333, 2023, beta=1, year_decay=1.1)
+    skillo.simulate_multiple_runs(data, 2, surfaces, names)
+    return time.perf_counter() - start
+
+def main():
+    """
+    Compares rating the same matches with two ELO models and two SkillO runs through the ELO and skillO classes, one
+    model and one run at a time, against a RatingRunner, and times the runner with 30 SkillO runs. Each time is the
+    fastest of five.
+    """
+    rng = np.random.default_rng(0)
+    data = synthetic_matches(5000, 500, rng)
+    surfaces = ['Hard', 'Clay', 'Grass']
+    names = sorted(set(data['winner_name']) | set(data['loser_name']))
+
+    print(f"{len(data)} matches, {len(names)} players, 2 ELO models")
+    print(f"{'method':<28} {'time (s)':>9}")
+    print(f"{'classes, 2 SkillO runs':<28} {min(classes_time(data, surfaces, names) for _ in range(5)):>9.2f}")
+    print(f"{'runner, 2 SkillO runs':<28} {min(runner_time(data, 2) for _ in range(5)):>9.2f}")
+    print(f"{'runner, 30 SkillO runs':<28} {min(runner_time(data, 30) for _ in range(5)):>9.2f}")
+
+if __name__ == "__main__":
+    main()
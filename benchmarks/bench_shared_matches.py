@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from shared_matches import SharedMatches, attach_worker, worker_matches
+
+# Matches pickled to each worker by the pickled initializer.
+_pickled_matches = None
+
+def private_memory():
+    """
+    Gets the memory only this process uses, leaving out pages shared with other processes. Linux only.
+
+    Returns:
+        Private memory of the process in MB.
+    """
+    with open('/proc/self/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return sum(int(fields[field].split()[0]) for field in ['Private_Clean', 'Private_Dirty']) / 1e3
+
+def receive_pickled(matches):
+    """
+    Pool initializer giving each worker its own unpickled copy of the matches.
+
+    Args:
+        matches (dict): Dictionary of column to numpy array.
+    """
+    global _pickled_matches
+    _pickled_matches = matches
+
+def scan_task(_):
+    """
+    Finds the largest winner ID in whichever copy of the matches the worker has, touching every page of the winner IDs.
+
+    Returns:
+        Tuple of the process ID and its private memory in MB.
+    """
+    matches = worker_matches() if worker_matches() is not None else _pickled_matches
+    if matches is not None:
+        matches['winner_id'].max()
+    time.sleep(0.05)
+    return os.getpid(), private_memory()
+
+def per_worker_memory(workers, initializer, initargs):
+    """
+    Starts a pool and measures the private memory of each worker after it has read the matches.
+
+    Args:
+        workers (int): Number of worker processes.
+        initializer (function): Pool initializer giving the workers the matches.
+        initargs (tuple): Arguments to the initializer.
+
+    Returns:
+        Mean private memory per worker in MB.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer, initargs=initargs) as executor:
+        results = dict(executor.map(scan_task, range(workers * 4)))
+    return np.mean(list(results.values()))
+
+def main():
+    """
+    Compares per worker memory of pickling the encoded matches to every worker against attaching to shared memory.
+    """
+    rng = np.random.default_rng(0)
+    rows = 2_000_000
+    data = pd.DataFrame({
+        'winner_id': rng.integers(0, 60000, rows),
+        'loser_id': rng.integers(0, 60000, rows),
+        'surface': rng.choice(['Hard', 'Clay', 'Grass', 'Carpet'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A', 'C', 'S'], rows),
+        'Year': rng.integers(1968, 2025, rows),
+        'tourney_date': rng.integers(19680101, 20241231, rows)})
+
+    with SharedMatches.publish(data) as shared:
+        table_size = sum(array.nbytes for array in shared.arrays.values()) / 1e6
+        pickled = {column: np.array(array) for column, array in shared.arrays.items()}
+        print(f"{rows} matches, encoded table {table_size:.1f} MB")
+        # Memory of a worker given no matches, taken off the others to leave what the matches cost each worker.
+        baseline = per_worker_memory(1, None, ())
+        print(f"worker baseline {baseline:.1f} MB private")
+        print(f"{'workers':>7} {'pickled (MB/worker)':>20} {'shared (MB/worker)':>19} {'pickled total (MB)':>19} {'shared total (MB)':>18}")
+        for workers in [1, 2, 4, 8]:
+            pickled_memory = max(per_worker_memory(workers, receive_pickled, (pickled,)) - baseline, 0.0)
+            shared_memory = max(per_worker_memory(workers, attach_worker, (shared.descriptor(),)) - baseline, 0.0)
+            print(f"{workers:>7} {pickled_memory:>20.1f} {shared_memory:>19.1f} {pickled_memory * workers:>19.1f} "
+                  f"{shared_memory * workers + table_size:>18.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from skillo_calculations import skillO
+from bench_elo import synthetic_matches
+
+SURFACES = ['Hard', 'Clay', 'Grass']
+
+def main():
+    """
+    Times the deterministic expected_run against averaging the 30 random runs final_csv uses, and prints how far apart
+    their ratings are next to how far apart two 30 run averages with different seeds are.
+    """
+    rng = np.random.default_rng(0)
+    data = synthetic_matches(30000, 2000, rng)
+    names = sorted(set(data['winner_name']) | set(data['loser_name']))
+    skillo = skillO(25, 8.3333, 2023)
+
+    start = time.perf_counter()
+    expected = skillo.expected_run(data, SURFACES, names)
+    expected_time = time.perf_counter() - start
+    start = time.perf_counter()
+    averaged = skillo.simulate_multiple_runs(data, 30, SURFACES, names, seed=1)
+    averaged_time = time.perf_counter() - start
+    other = skillo.simulate_multiple_runs(data, 30, SURFACES, names, seed=2)
+
+    print(f"{len(data)} matches, {len(names)} players")
+    print(f"expected run {expected_time:.2f} s, 30 random runs {averaged_time:.2f} s\n")
+    print(f"{'column':>14} {'expected vs 30 runs':>20} {'30 runs vs 30 runs':>19}")
+    print(f"{'':>14} {'mean':>9} {'max':>10} {'mean':>9} {'max':>9}")
+    for column in expected.columns:
+        difference = (expected[column] - averaged[column]).abs()
+        noise = (other[column] - averaged[column]).abs()
+        print(f"{column:>14} {difference.mean():>9.4f} {difference.max():>10.4f} {noise.mean():>9.4f} {noise.max():>9.4f}")
+
+if __name__ == "__main__":
+    main()
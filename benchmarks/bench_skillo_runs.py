@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import resource
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from skillo_calculations import skillO
+from bench_elo import synthetic_matches
+
+SURFACES = ['Hard', 'Clay', 'Grass']
+
+def main():
+    """
+    Times simulate_multiple_runs, which calculates every run in one vectorized pass, for a growing number of runs, and
+    compares one run of the row by row skillO_calculation on a smaller set of matches. Seeded runs are then split
+    over a growing number of worker processes, checking the averages are identical for every number of workers, and
+    runs are made until the standard error of the 100 players with the most matches is within a tolerance. Last, the
+    peak memory of 300 runs streamed in batches of 30 is compared with calculating all 300 at once.
+    """
+    rng = np.random.default_rng(0)
+    data = synthetic_matches(30000, 2000, rng)
+    names = sorted(set(data['winner_name']) | set(data['loser_name']))
+    skillo = skillO(25, 8.3333, 2023, beta=1, year_decay=1.1)
+
+    print(f"{len(data)} matches, {len(names)} players")
+    print(f"{'runs':>5} {'time (s)':>9}")
+    for runs in [1, 30, 300]:
+        start = time.perf_counter()
+        skillo.simulate_multiple_runs(data, runs, SURFACES, names, batch_size=runs)
+        print(f"{runs:>5} {time.perf_counter() - start:>9.2f}")
+
+    subset = data.iloc[:2000]
+    start = time.perf_counter()
+    skillo.skillO_calculation(subset, skillo.initial_skills(SURFACES, names))
+    row_time = time.perf_counter() - start
+    start = time.perf_counter()
+    skillo.simulate_multiple_runs(subset, 30, SURFACES, names)
+    batched_time = time.perf_counter() - start
+    print(f"\n{len(subset)} matches: one row by row run {row_time:.2f} s, 30 batched runs {batched_time:.2f} s")
+
+    print(f"\n300 seeded runs on {os.cpu_count()} cpus")
+    print(f"{'workers':>7} {'time (s)':>9} {'identical':>9}")
+    baseline = None
+    for workers in [1, 2, 4]:
+        start = time.perf_counter()
+        averaged = skillo.simulate_multiple_runs(data, 300, SURFACES, names, seed=2023, workers=workers, batch_size=300)
+        elapsed = time.perf_counter() - start
+        baseline = averaged if baseline is None else baseline
+        print(f"{workers:>7} {elapsed:>9.2f} {str(averaged.equals(baseline)):>9}")
+
+    top = pd.concat([data['winner_name'], data['loser_name']]).value_counts().index[:100].tolist()
+    print(f"\nRuns until the top 100 players' standard error is within the tolerance, at most 300")
+    print(f"{'tolerance':>9} {'runs':>5} {'error':>7} {'time (s)':>9}")
+    for tolerance in [0.02, 0.01]:
+        start = time.perf_counter()
+        skillo.simulate_multiple_runs(data, 300, SURFACES, names, seed=2023, tolerance=tolerance, players=top)
+        print(f"{tolerance:>9} {skillo.runs:>5} {skillo.standard_error:>7.4f} {time.perf_counter() - start:>9.2f}")
+
+    print(f"\n300 runs")
+    print(f"{'batch':>5} {'time (s)':>9} {'peak (MB)':>10}")
+    for batch_size in [30, 300]:
+        # Each batch size runs in a fresh process, so its peak memory is not hidden by an earlier peak.
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            elapsed, peak = executor.submit(streamed_runs, skillo, data, names, batch_size).result()
+        print(f"{batch_size:>5} {elapsed:>9.2f} {peak / 1e3:>10.1f}")
+
+def streamed_runs(skillo, data, names, batch_size):
+    """
+    Makes 300 seeded runs in batches.
+
+    Args:
+        skillo (skillO): Class running the simulations.
+        data (pandas dataframe): Match data.
+        names (list): Player names.
+        batch_size (int): Number of runs calculated together.
+
+    Returns:
+        Tuple of the time taken in seconds and the process's peak resident memory in KB.
+    """
+    start = time.perf_counter()
+    skillo.simulate_multiple_runs(data, 300, SURFACES, names, seed=2023, batch_size=batch_size)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from elo_calculations import ELO
+from bench_elo import synthetic_matches
+
+def snapshot_size(snapshots):
+    """
+    Gets the memory held by the snapshots.
+
+    Args:
+        snapshots (RatingSnapshots): Snapshots to measure.
+
+    Returns:
+        Size in MB.
+    """
+    return (snapshots.initial.nbytes + sum(ids.nbytes + rows.nbytes for ids, rows in snapshots.changes)) / 1e6
+
+def main():
+    """
+    Compares one ELO pass keeping season and tournament snapshots against calculating the ratings again for every
+    season cutoff, and against season snapshots with the year decay relative to each cutoff, and reports the size of
+    the snapshots against full copies of the ratings.
+    """
+    rng = np.random.default_rng(0)
+    data = synthetic_matches(300000, 6000, rng)
+    # Tournaments start on the first of each month, and the data is already sorted by year.
+    data['tourney_date'] = data['Year'] * 10000 + rng.integers(1, 13, len(data)) * 100 + 1
+    data = data.sort_values('tourney_date', kind='stable').reset_index(drop=True)
+    elo = ELO(1500, 2023)
+    years = sorted(data['Year'].unique())
+
+    start = time.perf_counter()
+    names = sorted(set(data['winner_name']) | set(data['loser_name']))
+    for year in years[1:]:
+        elo.elo_calculation(data[data['Year'] < year], elo.initial_elos(['Hard', 'Clay', 'Grass'], names))
+    retrain_time = time.perf_counter() - start
+    print(f"{len(data)} matches, {len(names)} players, {len(years)} seasons")
+    print(f"{'method':<24} {'time (s)':>9} {'snapshots':>10} {'size (MB)':>10} {'full copies (MB)':>17}")
+    print(f"{'retrain per season':<24} {retrain_time:>9.2f} {len(years) - 1:>10} {'-':>10} {'-':>17}")
+
+    for name, by, decay in [('snapshots by year', 'year', 'current'), ('snapshots by tournament', 'tournament', 'current'),
+                            ('cutoff decay by year', 'year', 'cutoff')]:
+        start = time.perf_counter()
+        snapshots = elo.rating_snapshots(data, by=by, decay=decay)
+        elapsed = time.perf_counter() - start
+        full = len(snapshots) * snapshots.initial.nbytes / 1e6
+        print(f"{name:<24} {elapsed:>9.2f} {len(snapshots):>10} {snapshot_size(snapshots):>10.1f} {full:>17.1f}")
+
+    snapshots = elo.rating_snapshots(data, by='tournament')
+    start = time.perf_counter()
+    for year in years:
+        snapshots.as_of(year * 10000 + 101)
+    print(f"as of query: {(time.perf_counter() - start) / len(years) * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
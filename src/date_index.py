@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+import datetime
+
+# Order rounds are played in within a tournament. Qualifying rounds come first, and round robin matches come before
+# the knockout rounds that follow them.
+ROUND_ORDER = {'Q1': 0, 'Q2': 1, 'Q3': 2, 'Q4': 3, 'ER': 4, 'R128': 5, 'R64': 6, 'R32': 7, 'R16': 8, 'RR': 9,
+               'QF': 10, 'SF': 11, 'BR': 12, 'F': 13}
+
+def date_key(date):
+    """
+    Converts a date to the yyyymmdd integer used by the tourney_date column.
+
+    Args:
+        date (int, str, datetime.date or pandas Timestamp): Date to convert, such as 20230703, '2023-07-03' or a Timestamp.
+
+    Returns:
+        Date as a yyyymmdd int.
+
+    Raises:
+        TypeError: Date must be an int, string, date or Timestamp.
+    """
+    if isinstance(date, (int, np.integer)) and not isinstance(date, bool):
+        return int(date)
+    if not isinstance(date, (str, datetime.date, pd.Timestamp)):
+        raise TypeError(f"date must be an int, string, date or Timestamp, it is type {type(date)}")
+    timestamp = pd.Timestamp(date)
+    return timestamp.year * 10000 + timestamp.month * 100 + timestamp.day
+
+def sort_chronologically(data):
+    """
+    Sorts matches into the order they were played: by tournament start date, then tour, then tournament, then round,
+    then match number. Tournaments starting on the same date are kept together, so each tournament stays a contiguous
+    block of rows. The sort is stable, and data without a tourney_date column is returned unchanged.
+
+    Args:
+        data (pandas dataframe): Match data containing tourney_date, and optionally tour, tourney_name, round and match_num.
+
+    Returns:
+        Dataframe of the matches in chronological order.
+    """
+    if 'tourney_date' not in data.columns or len(data) == 0:
+        return data
+
+    zeros = np.zeros(len(data), dtype=np.int64)
+    tours = np.unique(data['tour'].astype(str).to_numpy(), return_inverse=True)[1] if 'tour' in data.columns else zeros
+    names = np.unique(data['tourney_name'].astype(str).to_numpy(), return_inverse=True)[1] if 'tourney_name' in data.columns else zeros
+    rounds = data['round'].astype(object).map(ROUND_ORDER).fillna(len(ROUND_ORDER)).to_numpy() if 'round' in data.columns else zeros
+    match_nums = data['match_num'].to_numpy() if 'match_num' in data.columns else zeros
+
+    order = np.lexsort([match_nums, rounds, names, tours, data['tourney_date'].to_numpy()])
+    if (order == np.arange(len(data))).all():
+        return data
+    return data.iloc[order]
+
+class DateIndex():
+    """
+    Class indexing chronologically sorted matches by their tourney_date, so the matches before any point in time can be
+    found by binary search instead of scanning the data.
+    """
+    def __init__(self, dates):
+        """
+        Initializer for DateIndex class.
+
+        Args:
+            dates (iterable): yyyymmdd tourney dates of the matches, in chronological order.
+
+        Raises:
+            ValueError: Dates must be sorted in chronological order.
+        """
+        self.dates = np.asarray(dates, dtype=np.int64)
+        if (np.diff(self.dates) < 0).any():
+            raise ValueError("Dates must be sorted in chronological order")
+
+    @classmethod
+    def from_matches(cls, data):
+        """
+        Builds the date index for match data.
+
+        Args:
+            data (pandas dataframe): Chronologically sorted match data containing a tourney_date column.
+
+        Returns:
+            DateIndex over the rows of the data.
+
+        Raises:
+            TypeError: Data input must be a dataframe.
+            ValueError: Dates must be sorted in chronological order.
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError("Data input must be of type pandas dataframe")
+        return cls(data['tourney_date'].to_numpy())
+
+    def __len__(self):
+        """
+        Gets the number of matches indexed.
+
+        Returns:
+            Number of matches as an int.
+        """
+        return len(self.dates)
+
+    def position(self, date):
+        """
+        Gets the number of matches from tournaments starting before a date, which is also the row the date starts at.
+
+        Args:
+            date (int, str, datetime.date or pandas Timestamp): Date to look up.
+
+        Returns:
+            Row position as an int.
+        """
+        return int(np.searchsorted(self.dates, date_key(date), side='left'))
+
+    def slice(self, start = None, end = None):
+        """
+        Gets the rows of the matches from tournaments starting on or after start and before end.
+
+        Args:
+            start (None or date): First date included. Default set to None, the first match.
+            end (None or date): First date excluded. Default set to None, after the last match.
+
+        Returns:
+            Slice of row positions, for use with iloc or numpy arrays.
+        """
+        first = 0 if start is None else self.position(start)
+        last = len(self) if end is None else self.position(end)
+        return slice(first, max(first, last))
@@ -1,22 +1,48 @@
 import pandas as pd
+import numpy as np
 import math
+import hashlib
+import json
+import sys
+import os
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from match_store import MatchStore, select_matches, fingerprint, FIRST_YEAR
+from result_cache import ResultCache
+from player_index import PlayerIndex
+from elo_engine import EloEngine, UPDATE_SURFACES, coupling_entries
+from rating_state import RatingState
+from rating_snapshots import RatingSnapshots
+from rating_history import RatingHistory
+from date_index import date_key
 
 class ELO:
     """
     ELO class which is used to calculate ELO scores and gets the most recent age of each player in the tennis dataset.
     Also creates the CSV for the elo calculations for each player in the data.
     """
-    def __init__(self, initial_elo_rating, current_year):
+    # Estimated ages by data fingerprint, current year and as_of date, shared by every instance.
+    age_cache = {}
+
+    def __init__(self, initial_elo_rating, current_year, coupling = None):
         """
         Initializer for ELO class
 
         Args:
             initial_elo_rating (float): The initial ELO rating given to players.
             current_year (int): The current year that data was obtained from.
+            coupling (None or dict): Dictionary of (match surface, rated surface) to the share of a rating change
+                                     applied, such as one fit by the Tuner. Surfaces not listed keep the default of
+                                     all of it on the match surface and 0.8 of it on the other surfaces. Default set
+                                     to None.
         """
         self.initial_rating = float(initial_elo_rating)
         self.current_year = current_year
+        self.coupling = coupling
         self.elo_dataframe = None
+        self.history = None
+        self.position_index = None
 
     def initial_elos(self, surfaces, names):
         """
@@ -105,6 +131,51 @@ class ELO:
 
         return self.logistic((first_elo - second_elo)/S)
     
+    def player_positions(self, rating_df, players):
+        """
+        Gets the rows of players in a rating dataframe.
+
+        Args:
+            rating_df (pandas dataframe): Ratings indexed by player name.
+            players (iterable): Player IDs (rows of the rating dataframe) or player names.
+
+        Returns:
+            Numpy int array of rows.
+
+        Raises:
+            KeyError: A player name is not in the rating dataframe.
+        """
+        players = np.asarray(list(players))
+        if players.dtype.kind in 'iu':
+            return players
+
+        # The player index of the last rating dataframe is kept, so repeated lookups do not rebuild it.
+        if self.position_index is None or self.position_index[0] is not rating_df.index:
+            self.position_index = (rating_df.index, PlayerIndex(rating_df.index))
+        return self.position_index[1].ids(players.astype(object))
+
+    def expected_matrix(self, player_ids, surface, S = 400):
+        """
+        Calculates the expected game score of every pair of players at once from the current ELO ratings: entry (i, j)
+        is the probability that player i beats player j on the surface, as given by expected_game_score.
+
+        Args:
+            player_ids (iterable): Player IDs (rows of the ELO dataframe) or player names.
+            surface (str): Surface of the matches, such as Grass.
+            S (int): Scaling factor. Default set to 400.
+
+        Returns:
+            N by N numpy array of win probabilities.
+
+        Raises:
+            ValueError: No ELO ratings have been calculated.
+        """
+        if self.elo_dataframe is None:
+            raise ValueError("No ELO ratings have been calculated")
+
+        elos = self.elo_dataframe[f'{surface}_ELO'].to_numpy(dtype=float)[self.player_positions(self.elo_dataframe, player_ids)]
+        return self.logistic((elos[:, None] - elos[None, :]) / S)
+
     def decay_factor(self, year_diff, decay_rate = 0.3):
         """
         Calculates the decay factor based off the year difference from the present to calculate ELO scores.
@@ -126,14 +197,18 @@ class ELO:
         
         return math.exp(-decay_rate * abs(year_diff))
 
-    def elo_calculation(self, data, elo_df, K = 20):
+    def elo_calculation(self, data, elo_df, K = 20, history = False):
         """
-        Calculates ELO scores for each tennis player based on previous match history
+        Calculates ELO scores for each tennis player based on previous match history. The matches are run through an
+        EloEngine over a player by surface rating matrix, giving the same scores as reference_elo_calculation.
 
         Args:
-            data (pandas dataframe): Dataframe for previous match history for each tennis tournament and professional match.
+            data (pandas dataframe or MatchStore): Dataframe for previous match history for each tennis tournament and professional match.
+                                                   A MatchStore is read for the training years only.
             elo_df (pandas dataframe): Dataframe of ELO scores for players on all surfaces.
             K (int): Sensitivity constant for ELO calculation. Default set to 20.
+            history (boolean): Record every player's ELO score before and after each match in the history attribute, a
+                               RatingHistory. Default set to False.
 
         Returns:
             New Elo dataframe for players updated ELO scores.
@@ -141,7 +216,102 @@ class ELO:
         Raises:
             TypeError: data and elo_df must be dataframes. K must be an int.
         """
-        if not isinstance(data, pd.DataFrame):
+        if not isinstance(data, (pd.DataFrame, MatchStore)):
+            raise TypeError(f"data must be an pandas dataframe, it is type {type(data)}")
+        if not isinstance(elo_df, pd.DataFrame):
+            raise TypeError(f"ELO dataframe must be a pandas dataframe, it is type {type(elo_df)}")
+        if not isinstance(K, int):
+            raise TypeError(f"Scaling factor K must be an int, it is type {type(K)}")
+
+        # Train ELO scores based off all past data besides current year.
+        # The history also reads the tourney dates, when the data has them.
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year),
+                                       columns=None if history else ['winner_name', 'loser_name', 'surface', 'tourney_level', 'Year'])
+
+        columns = [column for column in elo_df.columns if column.endswith('_ELO')]
+        surfaces = [column[:-len('_ELO')] for column in columns]
+
+        player_index = PlayerIndex(elo_df.index)
+        self.history = RatingHistory(player_index, columns) if history else None
+        engine = EloEngine(self.current_year, coupling=self.coupling)
+        matches = engine.match_arrays(data_training, player_index, surfaces, K)
+        ratings = engine.run(elo_df[columns].to_numpy(dtype=float, copy=True), matches, surfaces, history=self.history)
+
+        for i, column in enumerate(columns):
+            elo_df[column] = ratings[:, i]
+
+        return elo_df
+
+    def rating_snapshots(self, data, by = 'year', K = 20, decay = 'current'):
+        """
+        Calculates ELO scores over the training matches, keeping snapshots of the ratings at the start of every season
+        (or every tournament start date), so the ratings as of any of them can be read without calculating again.
+
+        With decay set to 'current' the matches are run in one pass with the year decay relative to the current year of
+        this class throughout, so a snapshot holds the ratings of the matches before it as this pass weights them. With
+        decay set to 'cutoff' the year decay is relative to the year of each snapshot's date instead, so the season
+        snapshot as of 2018-01-01 is the same as an ELO class with 2018 as its current year. A change of current year
+        rescales the K factor of every earlier match, so each snapshot is then calculated again from the initial ratings
+        and stores every player seen so far, costing about one calculation per snapshot.
+
+        Args:
+            data (pandas dataframe or MatchStore): Chronologically sorted match history. A MatchStore is read for the training years only.
+            by (str): 'year' for season snapshots or 'tournament' for tournament start date snapshots. Default set to 'year'.
+            K (int): Sensitivity constant for ELO calculation. Default set to 20.
+            decay (str): 'current' for the year decay relative to the current year, or 'cutoff' for the year decay
+                         relative to the year of each snapshot. Default set to 'current'.
+
+        Returns:
+            RatingSnapshots of the Hard, Clay and Grass ELO scores of every player in the training matches.
+
+        Raises:
+            ValueError: decay must be 'current' or 'cutoff'.
+            KeyError: Tournament snapshots need a tourney_date column.
+        """
+        if decay not in ['current', 'cutoff']:
+            raise ValueError(f"decay must be 'current' or 'cutoff', not {decay}")
+
+        columns = ['winner_name', 'loser_name', 'surface', 'tourney_level', 'Year']
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year),
+                                       columns=columns + ['tourney_date'] if by == 'tournament' else columns)
+
+        player_index = PlayerIndex.from_matches(data_training)
+        ratings = np.full((len(player_index), len(UPDATE_SURFACES)), self.initial_rating)
+        snapshots = RatingSnapshots(player_index, [f'{surface}_ELO' for surface in UPDATE_SURFACES], ratings,
+                                    *RatingSnapshots.boundaries(data_training, by))
+
+        engine = EloEngine(self.current_year, coupling=self.coupling)
+        matches = engine.match_arrays(data_training, player_index, UPDATE_SURFACES, K)
+        if decay == 'current':
+            engine.run(ratings, matches, UPDATE_SURFACES, snapshots)
+            return snapshots
+
+        for key, position in zip(snapshots.keys.tolist(), snapshots.positions.tolist()):
+            engine = EloEngine(key // 10000, coupling=self.coupling)
+            before = {name: values[:position] for name, values in matches.items()}
+            before['k'] = engine.k_factors(data_training.iloc[:position], K)
+            ids = np.unique(np.concatenate([before['winner'], before['loser']]))
+            snapshots.record(ids, engine.run(ratings.copy(), before, UPDATE_SURFACES)[ids])
+        return snapshots
+
+    def reference_elo_calculation(self, data, elo_df, K = 20):
+        """
+        Calculates ELO scores for each tennis player based on previous match history, one dataframe row at a time. This is
+        the original implementation, kept as the reference elo_calculation is tested and benchmarked against.
+
+        Args:
+            data (pandas dataframe or MatchStore): Dataframe for previous match history for each tennis tournament and professional match.
+                                                   A MatchStore is read for the training years only.
+            elo_df (pandas dataframe): Dataframe of ELO scores for players on all surfaces.
+            K (int): Sensitivity constant for ELO calculation. Default set to 20.
+
+        Returns:
+            New Elo dataframe for players updated ELO scores.
+
+        Raises:
+            TypeError: data and elo_df must be dataframes. K must be an int.
+        """
+        if not isinstance(data, (pd.DataFrame, MatchStore)):
             raise TypeError(f"data must be an pandas dataframe, it is type {type(data)}")
         if not isinstance(elo_df, pd.DataFrame):
             raise TypeError(f"ELO dataframe must be a pandas dataframe, it is type {type(elo_df)}")
@@ -150,7 +320,7 @@ class ELO:
         
 
         # Train ELO scores based off all past data besides current year.
-        data_training = data[data['Year'] < self.current_year]
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year))
 
         surfaces = ['Hard', 'Clay', 'Grass']
 
@@ -201,74 +371,244 @@ class ELO:
             
         return elo_df
     
-    def get_most_recent_age(self, data):
+    def get_most_recent_age(self, data, as_of = None):
         """
         Calculates an estimated current age for each player in the dataset. This approach takes the last age a player lost and won
-        at and adjusts depending on the year the match was played in. 
+        at and adjusts depending on the year the match was played in. The players are encoded as integer IDs and the
+        last win and last loss of every player are found in one grouped reduction over the matches, giving the same
+        ages as the original sort and pivot implementation. Results are cached per data fingerprint, so the ELO and
+        SkillO csvs and the tuner share one calculation. A dataframe is fingerprinted from the columns ages are estimated
+        from only, see age_fingerprint.
 
         Args:
-            data (pandas dataframe): Dataframe for previous match history for each tennis tournament and professional match.
+            data (pandas dataframe or MatchStore): Dataframe for previous match history for each tennis tournament and professional match.
+            as_of (None, int, str, datetime.date or pandas Timestamp): Only use tournaments starting before this date and
+                                                                      estimate ages in its year, such as 20230703.
+                                                                      Default set to None, every match and the current year.
 
         Returns:
             Series for the estimated current age of a given tennis player.
         """
-        # Creates a new dataframe sorted on year
-        df_sorted = data.sort_values(by = 'Year', ascending=False)
+        as_of = None if as_of is None else date_key(as_of)
+        if isinstance(data, MatchStore):
+            # A store is fingerprinted from its manifest, so a cached result is found without reading any partition.
+            key = (fingerprint(data), self.current_year, as_of)
+            if key not in ELO.age_cache:
+                self.cache_ages(key, self.recent_ages(self.encode_ages(select_matches(data)), as_of))
+        else:
+            key = (self.age_fingerprint(data), self.current_year, as_of)
+            if key not in ELO.age_cache:
+                self.cache_ages(key, self.recent_ages(self.encode_ages(data), as_of))
+        return ELO.age_cache[key].copy()
+
+    def cache_ages(self, key, ages):
+        """
+        Adds estimated ages to the cache shared by every instance, dropping the oldest entry once it holds eight.
 
-        # Creates a dataframe of each of the winners last ages in the dataset. This keeps only the first in drop duplicates.
-        winner_ages = df_sorted[['winner_name', 'winner_age', 'Year']].drop_duplicates('winner_name', keep='first')
+        Args:
+            key (tuple): Data fingerprint, current year and as_of date of the ages.
+            ages (pandas series): Estimated age of each player.
+        """
+        if len(ELO.age_cache) >= 8:
+            ELO.age_cache.pop(next(iter(ELO.age_cache)))
+        ELO.age_cache[key] = ages
 
-        # Renames columns for proper naming. The winner name is the players name, and the most recent winning age.
-        winner_ages.rename(columns={'winner_name': 'Player_name', 'winner_age': 'most_recent_age'}, inplace=True)
-        winner_ages['Result'] = 'Match_winner'
+    def age_columns(self, data):
+        """
+        Selects the columns ages are estimated from.
 
-        # Use similar strategy from winner_ages to obtain loser_ages
-        loser_ages = df_sorted[['loser_name', 'loser_age', 'Year']].drop_duplicates('loser_name',keep='first')
-        
-        loser_ages.rename(columns={'loser_name': 'Player_name', 'loser_age': 'most_recent_age'}, inplace=True)
-        loser_ages['Result'] = 'Match_loser'
+        Args:
+            data (pandas dataframe): Match data containing the winner and loser names and ages, Year, and optionally tourney_date.
 
-        recent_ages = pd.concat([winner_ages, loser_ages])
+        Returns:
+            Dataframe of the age columns.
+        """
+        return data[[column for column in ['winner_name', 'winner_age', 'loser_name', 'loser_age', 'Year', 'tourney_date'] if column in data.columns]]
 
-        # Use pivot to create new dataframe using Player_name as the index, the column being the result of the match, and the values
-        # being their most recent age.
-        recent_ages = recent_ages.pivot(index ='Player_name', columns = 'Result', values = 'most_recent_age').reset_index()
+    def encode_ages(self, data):
+        """
+        Selects the columns ages are estimated from, with the winner and loser names as categoricals of the same
+        players. Categoricals from the match store are kept as they are. The winner and loser names are encoded
+        separately, and only the players who never won are added to the categories of the winners.
 
-        recent_ages.fillna(0)
+        Args:
+            data (pandas dataframe): Match data containing the winner and loser names and ages, Year, and optionally tourney_date.
 
-        # Takes most recent year a player has played, used for age calculation
-        recent_years = pd.concat([winner_ages[['Player_name', 'Year']], loser_ages[['Player_name', 'Year']]])
+        Returns:
+            Dataframe of the age columns with categorical names.
+        """
+        encoded = self.age_columns(data)
+        winners, losers = encoded['winner_name'], encoded['loser_name']
+        if isinstance(winners.dtype, pd.CategoricalDtype) and winners.dtype == losers.dtype:
+            return encoded
+
+        # Names are factorized as the arrays backing the columns, which is faster than factorizing the columns.
+        winner_ids, winner_names = pd.factorize(np.asarray(winners.array))
+        loser_ids, loser_names = pd.factorize(np.asarray(losers.array))
+        winner_names, loser_names = pd.Index(winner_names, dtype=object), pd.Index(loser_names, dtype=object)
+        names = winner_names.append(loser_names[winner_names.get_indexer(loser_names) < 0])
+        # Missing names have the code -1, which picks the -1 appended to the loser codes.
+        loser_ids = np.append(names.get_indexer(loser_names), -1)[loser_ids]
+        dtype = pd.CategoricalDtype(names)
+        return encoded.assign(winner_name=pd.Categorical.from_codes(winner_ids, dtype=dtype),
+                              loser_name=pd.Categorical.from_codes(loser_ids, dtype=dtype))
+
+    def age_fingerprint(self, data):
+        """
+        Calculates a fingerprint of the columns ages are estimated from, without encoding the names. Numeric columns
+        and categorical codes are hashed from their bytes. Other name columns are hashed as a tuple of the names with
+        python's hash, which every string keeps once computed, so a repeated call hashes little more than the numbers.
+        Python salts string hashes per process, so the fingerprint is only meaningful within one, as for the age cache.
 
-        recent_years = recent_years.drop_duplicates(subset='Player_name', keep='first')
+        Args:
+            data (pandas dataframe): Match data containing the winner and loser names and ages, Year, and optionally tourney_date.
 
-        recent_ages = recent_ages.merge(recent_years, on='Player_name')
+        Returns:
+            SHA-256 hex digest of the age columns.
+        """
+        data = self.age_columns(data)
+        digest = hashlib.sha256(json.dumps([[column, str(data[column].dtype)] for column in data.columns]).encode())
+        for column in data.columns:
+            values = data[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                digest.update(pd.util.hash_array(values.cat.categories.to_numpy(dtype=object)).tobytes())
+                values = values.cat.codes
+            values = np.asarray(values.array)
+            if values.dtype == object:
+                digest.update(hash(tuple(values.tolist())).to_bytes(8, 'little', signed=True))
+            else:
+                digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    def recent_ages(self, data, as_of = None):
+        """
+        Finds every player's last winning and losing age and the year of their last match, and estimates their age.
 
-        # Calculate the maximum current age for each player based off both columns.
-        recent_ages['Player_age'] = recent_ages[['Match_winner', 'Match_loser']].max(axis=1)
+        Args:
+            data (pandas dataframe): Match data from encode_ages.
+            as_of (None or int): Only use tournaments starting before this yyyymmdd date and estimate ages in its year.
+                                 Default set to None, every match and the current year.
 
-        recent_ages['Player_age'] = recent_ages['Player_age'] + (self.current_year - recent_ages['Year'])
-        
-        recent_ages.set_index('Player_name', inplace=True)
+        Returns:
+            Series for the estimated age of each player, indexed by name in sorted order.
+        """
+        matches = len(data)
+        years = data['Year'].to_numpy(dtype=np.int64)
+        # Each match is ranked by the order sorting the data newest year first visits it, so a player's lowest ranked
+        # match is their last. Matches in the same year are ranked as that sort orders them, as the original did.
+        order = data['Year'].reset_index(drop=True).sort_values(ascending=False).index.to_numpy()
+        rank = np.empty(matches, dtype=np.int64)
+        rank[order] = np.arange(matches)
+        if as_of is not None:
+            # Without a tourney_date column a match is dated the first of January of its year.
+            dates = data['tourney_date'].to_numpy() if 'tourney_date' in data.columns else years * 10000 + 101
+            rank[dates >= as_of] = matches
+
+        names = data['winner_name'].cat.categories
+        ages = np.full((len(names), 2), np.nan)
+        last_years = np.zeros((len(names), 2), dtype=np.int64)
+        played = np.zeros((len(names), 2), dtype=bool)
+        for side, (name_column, age_column) in enumerate([('winner_name', 'winner_age'), ('loser_name', 'loser_age')]):
+            ids = data[name_column].cat.codes.to_numpy()
+            # Matches with a missing name have the code -1 and are skipped.
+            known = ids >= 0
+            last = np.full(len(names), matches, dtype=np.int64)
+            np.minimum.at(last, ids[known], rank[known])
+            played[:, side] = last < matches
+            rows = order[last[played[:, side]]]
+            ages[played[:, side], side] = data[age_column].to_numpy(dtype=float)[rows]
+            last_years[played[:, side], side] = years[rows]
+
+        # The year is taken from the last win when a player has won a match, and from the last loss otherwise.
+        year = np.where(played[:, 0], last_years[:, 0], last_years[:, 1])
+        current_year = self.current_year if as_of is None else as_of // 10000
+        player_age = np.fmax(ages[:, 0], ages[:, 1]) + (current_year - year)
+
+        seen = np.flatnonzero(played.any(axis=1))
+        seen = seen[np.argsort(names.to_numpy(dtype=object)[seen], kind='stable')]
+        return pd.Series(player_age[seen], index=pd.Index(names[seen], name='Player_name'), name='Player_age')
+
+    def cache_parameters(self):
+        """
+        Gets the parameters the final ELO ratings depend on, recorded with the csv so a change to any of them is noticed.
 
-        return recent_ages['Player_age']
-    
-    
-    def final_elo_csv(self, tennis_data, file_path='../data/player_elos.csv'):
+        Returns:
+            Dictionary of parameter name to value.
+        """
+        return {'model': 'ELO', 'initial_rating': self.initial_rating, 'current_year': self.current_year, 'training_years_before': 2024,
+                **({} if self.coupling is None else {'coupling': coupling_entries(self.coupling)})}
+
+    def final_elo_csv(self, tennis_data, file_path='../data/player_elos.csv', use_cache = True):
         """
         Creates the final elo csv which has ELO calculations for all surfaces. Saves file to a csv titled
-        player_elos.csv, saved in the data folder.
+        player_elos.csv, saved in the data folder. If the csv was already built from the same match data and parameters,
+        it is read back instead of being recalculated.
 
         Args:
-            tennis_data (pandas dataframe): The dataframe containing all tennis match data.
+            tennis_data (pandas dataframe or MatchStore): The dataframe or match store containing all tennis match data.
             file_path (str): Path of the file to save, default ../data/player_elos.csv.
+            use_cache (boolean): Reuse the csv if its data fingerprint and parameters match. Default set to True.
 
         Returns:
-            Series for the number of games a player has played.
+            Dataframe of the ELO ratings and age of each player.
         """
+        cache = ResultCache(file_path)
+        data_fingerprint = fingerprint(tennis_data)
+        if use_cache and cache.is_current(data_fingerprint, self.cache_parameters()):
+            self.elo_dataframe = pd.read_csv(file_path, index_col='Player_Name')
+            return self.elo_dataframe
+
+        training_data = select_matches(tennis_data, years=range(FIRST_YEAR, 2024))
+        # Ages are found before the store is read in full, so they can be looked up by the store fingerprint.
+        ages = self.get_most_recent_age(tennis_data)
+        tennis_data = select_matches(tennis_data)
         names = self.get_names(tennis_data)
         surfaces = tennis_data['surface'].unique()[0:3]
         elo_df = self.initial_elos(surfaces, list(names))
-        player_elos = self.elo_calculation(tennis_data[tennis_data['Year'] < 2024], elo_df)
-        player_elos['Player_age'] = self.get_most_recent_age(tennis_data)
+        player_elos = self.elo_calculation(training_data, elo_df)
+        player_elos['Player_age'] = ages
+
+        player_elos.to_csv(file_path, index_label='Player_Name', index=True)
+        cache.record(data_fingerprint, self.cache_parameters())
+        return player_elos
 
-        player_elos.to_csv(file_path, index_label='Player_Name', index=True)
\ No newline at end of file
+    def update(self, matches, state_path = '../data/elo_state.npz'):
+        """
+        Updates the ELO ratings with new matches only, starting from the rating state saved by the previous update. The
+        state records the last match applied, so matches already applied are skipped and the same data (or the whole
+        match store) can be passed every time. The new state is saved before returning.
+
+        Args:
+            matches (pandas dataframe or MatchStore): Chronologically sorted match data containing tourney_date. Only the
+                                                      years from the last applied match onwards are read from a MatchStore.
+            state_path (str): Path of the saved rating state. Default set to ../data/elo_state.npz.
+
+        Returns:
+            Dataframe of the updated ELO ratings of every player seen so far.
+
+        Raises:
+            ValueError: The saved state was calculated with a different initial rating, current year or coupling.
+            KeyError: The matches have no tourney_date column.
+        """
+        parameters = {'model': 'ELO', 'initial_rating': self.initial_rating, 'current_year': self.current_year,
+                      **({} if self.coupling is None else {'coupling': coupling_entries(self.coupling)})}
+        if os.path.exists(state_path):
+            state = RatingState.load(state_path)
+            if state.parameters != parameters:
+                raise ValueError(f"Rating state at {state_path} was calculated with {state.parameters}, not {parameters}")
+        else:
+            state = RatingState([], [f'{surface}_ELO' for surface in UPDATE_SURFACES], np.empty((0, len(UPDATE_SURFACES))), parameters)
+
+        years = None if state.as_of == 0 else range(state.as_of // 10000, 10000)
+        data = select_matches(matches, years=years)
+        new_matches = state.new_matches(data)
+
+        state.add_players(np.column_stack([new_matches['winner_name'].to_numpy(dtype=object),
+                                           new_matches['loser_name'].to_numpy(dtype=object)]).ravel(), self.initial_rating)
+        engine = EloEngine(self.current_year, coupling=self.coupling)
+        engine.run(state.ratings, engine.match_arrays(new_matches, state.player_index, UPDATE_SURFACES), UPDATE_SURFACES)
+        state.advance(new_matches)
+        state.save(state_path)
+
+        self.elo_dataframe = state.to_dataframe()
+        return self.elo_dataframe
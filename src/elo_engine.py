@@ -0,0 +1,365 @@
+import pandas as pd
+import numpy as np
+from itertools import islice
+import math
+from array import array
+
+# How much each tourney level scales the rating change of a match. Levels not listed are left unscaled.
+LEVEL_MULTIPLIERS = {
+    'G': 4, # Worth double ATP 1000 matches, so multipled by 4.
+    'A': 2, # Worth half grand slams, double lower level tournaments.
+    'M': 2,
+    'F': 1,
+    'D': 0.5, # Davis Cup has little effect on ELO scores.
+}
+
+# Surfaces whose ratings are slightly adjusted by results on another surface.
+UPDATE_SURFACES = ['Hard', 'Clay', 'Grass']
+
+def conflict_free_batches(matches):
+    """
+    Splits the matches into batches of consecutive matches in which no player plays twice, such as the matches of a
+    tournament round. A match only reads and writes the ratings of its two players, so the matches of a batch can be
+    applied together and give the same ratings as applying them one at a time in order.
+
+    Args:
+        matches (dict): Match arrays from EloEngine.match_arrays.
+
+    Returns:
+        Numpy int64 array of the first match of every batch followed by the number of matches, so batch b is the matches
+        from position b to position b + 1.
+    """
+    winners = matches['winner'].tolist()
+    losers = matches['loser'].tolist()
+    if not winners:
+        return np.zeros(1, dtype=np.int64)
+
+    # The batch each player last played in. A player already in the current batch starts a new one.
+    batch_of = [-1] * (max(max(winners), max(losers)) + 1)
+    batch = 0
+    starts = [0]
+    for i, (winner, loser) in enumerate(zip(winners, losers)):
+        if batch_of[winner] == batch or batch_of[loser] == batch:
+            batch += 1
+            starts.append(i)
+        batch_of[winner] = batch
+        batch_of[loser] = batch
+    starts.append(len(winners))
+    return np.array(starts, dtype=np.int64)
+
+def coupling_matrix(surfaces, cross_surface = 0.8, coupling = None):
+    """
+    Builds the surface coupling matrix: the share of a match's rating change applied to each rating column, with a row
+    for the surface of the match and a column for the surface rated. Shares not given default to 1 for the surface of
+    the match, the cross surface share for the update surfaces, and 0 otherwise, so a 3 by 3 coupling of the update
+    surfaces is widened for carpet or any other surface.
+
+    Args:
+        surfaces (list): Surfaces of the rating matrix columns, in order.
+        cross_surface (float): Default share of a rating change applied to the other update surfaces. Default set to 0.8.
+        coupling (None or dict): Dictionary of (match surface, rated surface) to share, overriding the defaults.
+                                 Default set to None.
+
+    Returns:
+        Numpy float64 surfaces by surfaces matrix.
+    """
+    coupling = {} if coupling is None else coupling
+    matrix = np.zeros((len(surfaces), len(surfaces)))
+    for row, played in enumerate(surfaces):
+        for column, rated in enumerate(surfaces):
+            if (played, rated) in coupling:
+                matrix[row, column] = coupling[(played, rated)]
+            elif row == column:
+                matrix[row, column] = 1.0
+            elif rated in UPDATE_SURFACES:
+                matrix[row, column] = cross_surface
+    return matrix
+
+def coupling_entries(coupling):
+    """
+    Lists the shares of a coupling dictionary in a form that can be saved as JSON with the parameters of a rating csv.
+
+    Args:
+        coupling (dict): Dictionary of (match surface, rated surface) to share.
+
+    Returns:
+        Sorted list of [match surface, rated surface, share] lists.
+    """
+    return sorted([played, rated, float(share)] for (played, rated), share in coupling.items())
+
+class EloEngine():
+    """
+    Class running the ELO rating updates from integer coded match arrays instead of a dataframe. Ratings are a player
+    by surface matrix indexed by player ID, and each match's K factor (base K times the tourney level multiplier times
+    the year decay) and rating positions are worked out for every match at once with numpy. Each match depends on the
+    ratings left by the ones before it, so the updates themselves are then applied one match at a time in a loop over
+    plain python lists.
+    """
+    def __init__(self, current_year, S = 400, decay_rate = 0.3, cross_surface = 0.8, level_multipliers = None, coupling = None):
+        """
+        Initializer for EloEngine class.
+
+        Args:
+            current_year (int): The current year that data was obtained from, used for the year decay.
+            S (int): Scaling factor of the expected game score. Default set to 400.
+            decay_rate (float): Rate of decay for the year difference. Default set to 0.3.
+            cross_surface (float): Share of a rating change applied to the other surfaces. Default set to 0.8.
+            level_multipliers (None or dict): Dictionary of tourney level to K multiplier, levels not listed are left
+                                              unscaled. Default set to None, which uses LEVEL_MULTIPLIERS.
+            coupling (None or dict): Dictionary of (match surface, rated surface) to the share of the rating change
+                                     applied, see coupling_matrix. Default set to None, the cross surface share.
+        """
+        self.current_year = current_year
+        self.S = S
+        self.decay_rate = decay_rate
+        self.cross_surface = cross_surface
+        self.level_multipliers = LEVEL_MULTIPLIERS if level_multipliers is None else level_multipliers
+        self.coupling = coupling
+
+    def coupling_matrix(self, surfaces):
+        """
+        Gets the surface coupling matrix of this engine for the rating columns.
+
+        Args:
+            surfaces (list): Surfaces of the rating matrix columns, in order.
+
+        Returns:
+            Numpy float64 surfaces by surfaces matrix, see coupling_matrix.
+        """
+        return coupling_matrix(surfaces, self.cross_surface, self.coupling)
+
+    def k_factors(self, data, K = 20):
+        """
+        Calculates the K factor of every match: the base K scaled by the tourney level multiplier and the year decay.
+
+        Args:
+            data (pandas dataframe): Match data containing tourney_level and Year columns.
+            K (int): Base K factor of the first match. Default set to 20.
+
+        Returns:
+            Numpy float64 array of K factors, one per match.
+        """
+        # The row by row calculation resets K to 20 after each match rather than to the K passed in, so only the
+        # first match uses it.
+        base = np.full(len(data), 20.0)
+        if len(data) > 0:
+            base[0] = K
+
+        level_codes, levels = pd.factorize(data['tourney_level'])
+        multipliers = np.array([self.level_multipliers.get(level, 1) for level in levels] + [1], dtype=float)[level_codes]
+
+        # Decay factors are calculated once per year with the same expression as the row by row calculation.
+        year_codes, years = pd.factorize(data['Year'])
+        decays = np.array([math.exp(-self.decay_rate * abs(self.current_year - int(year))) for year in years] + [1.0])[year_codes]
+
+        return base * multipliers * decays
+
+    def match_arrays(self, data, player_index, surfaces, K = 20):
+        """
+        Encodes match data as the integer and float arrays the engine runs over.
+
+        Args:
+            data (pandas dataframe): Match data containing winner_name, loser_name, surface, tourney_level and Year columns,
+                                     and optionally tourney_date.
+            player_index (PlayerIndex): Player index whose IDs are the rows of the rating matrix.
+            surfaces (list): Surfaces of the rating matrix columns, in order.
+            K (int): Base K factor of the first match. Default set to 20.
+
+        Returns:
+            Dictionary of numpy arrays: winner and loser (player IDs), surface (rating matrix column), k (K factor) and
+            date (tourney date, or the first of January of the match year without a tourney_date column).
+
+        Raises:
+            KeyError: A player is not in the player index or a surface is not a rating column.
+        """
+        surface_codes, match_surfaces = pd.factorize(data['surface'])
+        missing = [surface for surface in match_surfaces if surface not in surfaces]
+        if missing:
+            raise KeyError(f"Surfaces {missing} have no rating column")
+        columns = np.array([surfaces.index(surface) for surface in match_surfaces] + [-1], dtype=np.int32)
+
+        return {
+            'winner': player_index.ids(data['winner_name']),
+            'loser': player_index.ids(data['loser_name']),
+            'surface': columns[surface_codes],
+            'k': self.k_factors(data, K),
+            'date': (data['tourney_date'] if 'tourney_date' in data.columns else data['Year'] * 10000 + 101).to_numpy(dtype=np.int32),
+        }
+
+    def run(self, ratings, matches, surfaces, snapshots = None, history = None):
+        """
+        Applies the rating updates of every match in order. The winner and loser ratings move by K times the result
+        minus the expected score, scaled for each rating column by its share in the surface coupling matrix: all of it
+        on the match surface and the cross surface share on the other update surfaces by default. The arithmetic is
+        done in the same order as the row by row calculation, so with the default coupling the results are identical
+        to it.
+
+        Args:
+            ratings (numpy array): Player by surface float64 rating matrix, updated in place.
+            matches (dict): Match arrays from match_arrays.
+            surfaces (list): Surfaces of the rating matrix columns, in order.
+            snapshots (None or RatingSnapshots): Snapshots to record at their positions in the matches, with the rows
+                                                 of the players who played since the previous one. Default set to None.
+            history (None or RatingHistory): History to record every player's rating before and after each match in.
+                                             Default set to None.
+
+        Returns:
+            The updated rating matrix.
+
+        Raises:
+            KeyError: One of the update surfaces is not a rating column.
+        """
+        if len(matches['k']) == 0:
+            return ratings
+
+        missing = [surface for surface in UPDATE_SURFACES if surface not in surfaces]
+        if missing:
+            raise KeyError(f"Surfaces {missing} have no rating column")
+
+        num_surfaces = ratings.shape[1]
+        coupling = self.coupling_matrix(surfaces)
+
+        # Flat positions in the rating matrix of the first rating of each match's players, and the K factor of each
+        # match on every column, its share in the match surface's row of the coupling matrix. These are worked out for
+        # all matches at once; the sequential updates run over plain python lists and floats, which are much faster
+        # than numpy scalars.
+        winner_rows = matches['winner'].astype(np.int64) * num_surfaces
+        loser_rows = matches['loser'].astype(np.int64) * num_surfaces
+        K_columns = matches['k'][:, None] * coupling[matches['surface']]
+        flat = ratings.ravel().tolist()
+        S = self.S
+
+        # The matches are run in segments ending at each snapshot, or as one segment without snapshots.
+        stops = [len(K_columns)] if snapshots is None else snapshots.positions.tolist()
+        segments = list(zip([0] + stops[:-1], stops))
+
+        # With a history, the loop also keeps the winner and loser ratings before each match of a segment, in an array
+        # of doubles that copies each value rather than holding on to the float object. The ratings after follow from
+        # them, so they are worked out for the whole segment once it has run.
+        recording = history is not None
+        first_match = len(history) // 2 if recording else 0
+        pre = array('d')
+        record = pre.append
+
+        if num_surfaces == 3:
+            # Every match moves the match surface and the two other columns, unrolled with their flat positions and K
+            # factors worked out for every match at once.
+            columns = matches['surface'].astype(np.int64)
+            others = np.array([[other for other in range(3) if other != column] for column in range(3)])[columns]
+            rows = np.arange(len(columns))
+            positions = []
+            for column in [columns, others[:, 0], others[:, 1]]:
+                positions += [(winner_rows + column).tolist(), (loser_rows + column).tolist(), K_columns[rows, column].tolist()]
+            updates = zip(*positions)
+            for start, stop in segments:
+                for w, l, k, w1, l1, k1, w2, l2, k2 in islice(updates, stop - start):
+                    winner_elo = flat[w]
+                    loser_elo = flat[l]
+                    if recording:
+                        record(winner_elo)
+                        record(loser_elo)
+
+                    # (loser_elo - winner_elo)/S is exactly -x, so both expected scores match the row by row calculation.
+                    x = (winner_elo - loser_elo)/S
+                    gain = 1 - 1 / (1 + 10**-x)
+                    loss = 0 - 1 / (1 + 10**x)
+
+                    flat[w] = winner_elo + k * gain
+                    flat[l] = loser_elo + k * loss
+                    flat[w1] += k1 * gain
+                    flat[l1] += k1 * loss
+                    flat[w2] += k2 * gain
+                    flat[l2] += k2 * loss
+                if recording:
+                    self.record_history(history, first_match, pre, matches, K_columns, start, stop)
+                if snapshots is not None:
+                    self.record_snapshot(snapshots, flat, num_surfaces, matches, start, stop)
+        else:
+            # Other numbers of columns, such as a carpet column, add each match's K factor on every column in turn. The
+            # match surface column still holds the rating read, so it is updated like the others.
+            updates = zip(winner_rows.tolist(), loser_rows.tolist(), matches['surface'].tolist(), K_columns.tolist())
+            for start, stop in segments:
+                for winner, loser, column, k_columns in islice(updates, stop - start):
+                    winner_elo = flat[winner + column]
+                    loser_elo = flat[loser + column]
+                    if recording:
+                        record(winner_elo)
+                        record(loser_elo)
+
+                    x = (winner_elo - loser_elo)/S
+                    gain = 1 - 1 / (1 + 10**-x)
+                    loss = 0 - 1 / (1 + 10**x)
+
+                    for other, k in enumerate(k_columns):
+                        flat[winner + other] += k * gain
+                        flat[loser + other] += k * loss
+                if recording:
+                    self.record_history(history, first_match, pre, matches, K_columns, start, stop)
+                if snapshots is not None:
+                    self.record_snapshot(snapshots, flat, num_surfaces, matches, start, stop)
+
+        ratings[:] = np.array(flat).reshape(ratings.shape)
+        return ratings
+
+    def record_snapshot(self, snapshots, flat, num_surfaces, matches, start, stop):
+        """
+        Records the ratings of the players who played in a segment of the matches as the next snapshot.
+
+        Args:
+            snapshots (RatingSnapshots): Snapshots to record into.
+            flat (list): Flattened rating matrix being updated by run.
+            num_surfaces (int): Number of rating matrix columns.
+            matches (dict): Match arrays from match_arrays.
+            start (int): First match of the segment.
+            stop (int): Match after the last of the segment.
+        """
+        ids = np.unique(np.concatenate([matches['winner'][start:stop], matches['loser'][start:stop]]))
+        cells = (ids.astype(np.int64)[:, None] * num_surfaces + np.arange(num_surfaces)).ravel().tolist()
+        snapshots.record(ids, [flat[cell] for cell in cells])
+
+    def record_history(self, history, first_match, pre, matches, K_columns, start, stop):
+        """
+        Records the ratings before and after each match of a segment of the matches in a history, and empties the
+        array of ratings before them.
+
+        Args:
+            history (RatingHistory): History to record into.
+            first_match (int): Match index the history gives the first match run.
+            pre (array): Array of doubles of the winner and loser rating before each match of the segment, in turn, as
+                         kept by run.
+            matches (dict): Match arrays from match_arrays.
+            K_columns (numpy array): Match by column K factors of run.
+            start (int): First match of the segment.
+            stop (int): Match after the last of the segment.
+        """
+        ratings = np.array(pre, dtype=float).reshape(-1, 2)
+        del pre[:]
+        k = K_columns[np.arange(start, stop), matches['surface'][start:stop]]
+        x = (ratings[:, 0] - ratings[:, 1])/self.S
+        gain = 1 - 1 / (1 + 10**-x)
+        loss = 0 - 1 / (1 + 10**x)
+        history.record(first_match + start, matches['winner'][start:stop], matches['loser'][start:stop],
+                       matches['surface'][start:stop], matches['date'][start:stop],
+                       np.column_stack([ratings[:, 0], ratings[:, 0] + k * gain]),
+                       np.column_stack([ratings[:, 1], ratings[:, 1] + k * loss]))
+
+    def rate(self, data, matches, player_index, surfaces, batches = None, initial_rating = 1500, K = 20):
+        """
+        Rates the training matches of a RatingRunner with this engine.
+
+        Args:
+            data (pandas dataframe): Training matches containing tourney_level and Year columns.
+            matches (dict): Match arrays from match_arrays, shared by every model.
+            player_index (PlayerIndex): Player index whose IDs are the rows of the rating matrix.
+            surfaces (list): Surfaces of the rating matrix columns, in order.
+            batches (None or numpy array): Batch boundaries from conflict_free_batches, shared by every model. Unused,
+                                           as the ELO updates are applied one match at a time. Default set to None.
+            initial_rating (float): Initial ELO rating of every player. Default set to 1500.
+            K (int): Base K factor of the first match. Default set to 20.
+
+        Returns:
+            Dataframe of the ratings indexed by player name.
+        """
+        ratings = self.run(np.full((len(player_index), len(surfaces)), float(initial_rating)),
+                           dict(matches, k=self.k_factors(data, K)), surfaces)
+        return pd.DataFrame(ratings, index=pd.Index(player_index.names, dtype=object), columns=[f'{surface}_ELO' for surface in surfaces])
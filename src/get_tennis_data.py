@@ -1,29 +1,263 @@
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import os
 import sys
 
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from match_store import MatchStore
+from date_index import sort_chronologically
+
+# URL patterns of the yearly match files for each tour, formatted with the year. Challenger results are in the same
+# files as the ATP qualifying rounds.
+TOUR_URLS = {
+    'atp': "https://raw.githubusercontent.com/JeffSackmann/tennis_atp/master/atp_matches_{}.csv",
+    'challenger': "https://raw.githubusercontent.com/JeffSackmann/tennis_atp/master/atp_matches_qual_chall_{}.csv",
+    'futures': "https://raw.githubusercontent.com/JeffSackmann/tennis_atp/master/atp_matches_futures_{}.csv",
+    'wta': "https://raw.githubusercontent.com/JeffSackmann/tennis_wta/master/wta_matches_{}.csv",
+}
+
+# Columns read from the yearly match files, with the dtype they are parsed as. The integer columns are parsed as floats
+# so missing values can be read, then converted back to integers once incomplete rows are dropped.
+COLUMN_DTYPES = {
+    'tourney_name': str,
+    'surface': str,
+    'draw_size': 'float64',
+    'tourney_level': str,
+    'tourney_date': 'float64',
+    'match_num': 'float64',
+    'round': str,
+    'best_of': 'float64',
+    'winner_name': str,
+    'winner_age': 'float64',
+    'loser_name': str,
+    'loser_age': 'float64',
+}
+INTEGER_COLUMNS = ['draw_size', 'tourney_date', 'match_num', 'best_of']
+
+# Columns saved for analysis, in order.
+OUTPUT_COLUMNS = ['tourney_name', 'surface', 'draw_size', 'tourney_level', 'tourney_date', 'match_num', 'round', 'best_of',
+                  'winner_name', 'winner_age', 'loser_name', 'loser_age', 'Year', 'tour']
+
 class GetTennisData():
     """
     Class to create dataframe from a dataset on github.
     """
-    def __init__(self):
+    def __init__(self, base_url = None, cache_dir = '../data/cache', output_dir = '../data', max_workers = 8, chunk_size = 10000, tours = None):
         """
         Initialize the GetTennisData class.
+
+        Args:
+            base_url (None, str or dict): URL pattern for the yearly match files, formatted with the year. A string replaces
+                                          the ATP pattern and a dictionary replaces the patterns of the tours it names.
+                                          Default set to None, which uses Jeff Sackmann's repositories on github (TOUR_URLS).
+            cache_dir (str): Directory where the downloaded yearly csv files are cached. Default set to ../data/cache.
+            output_dir (str): Directory the combined tennis_data.csv is saved to. Default set to ../data.
+            max_workers (int): Number of years downloaded at the same time. Default set to 8.
+            chunk_size (int): Number of rows parsed at a time from each yearly file. Default set to 10000.
+            tours (None or list): Tours to download, from atp, challenger, futures and wta. Default set to None, which
+                                  downloads the ATP main tour only.
+
+        Raises:
+            ValueError: Tours must have a URL pattern.
+        """
+        self.tour_urls = dict(TOUR_URLS)
+        if isinstance(base_url, str):
+            self.tour_urls['atp'] = base_url
+        elif isinstance(base_url, dict):
+            self.tour_urls.update(base_url)
+        self.base_url = self.tour_urls['atp']
+
+        self.tours = ['atp'] if tours is None else list(tours)
+        unknown = [tour for tour in self.tours if tour not in self.tour_urls]
+        if unknown:
+            raise ValueError(f"Tours {unknown} have no URL pattern, must be one of {list(self.tour_urls)}")
+        self.cache_dir = cache_dir
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.fetch_summary = {'fetched': 0, 'cached': 0, 'missing': 0}
+        self.ingest_summary = {'parsed': 0, 'unchanged': 0}
+
+    def cache_paths(self, year, tour = 'atp'):
+        """
+        Gets the location of the cached csv file for a year and the file holding its ETag and Last-Modified headers.
+        Each tour is cached in its own directory, so tours whose URL patterns share a file name do not overwrite each other.
+
+        Args:
+            year (int): Year of the match file.
+            tour (str): Tour of the match file. Default set to atp.
+
+        Returns:
+            Tuple of the csv path and the metadata path as strings.
+        """
+        csv_path = os.path.join(self.cache_dir, tour, os.path.basename(self.tour_urls[tour].format(year)))
+        return csv_path, csv_path + '.meta.json'
+
+    def create_session(self):
+        """
+        Creates a requests session with a connection pool large enough for every download thread.
+
+        Returns:
+            requests.Session used for all the yearly downloads.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def fetch_year(self, session, year, tour = 'atp'):
+        """
+        Downloads the match file for one year, unless the cached copy is still valid. The cached ETag and Last-Modified
+        values are sent as a conditional request, so an unchanged file comes back as a 304 with no body.
+
+        Args:
+            session (requests.Session): Session used for the request.
+            year (int): Year of the match file.
+            tour (str): Tour of the match file. Default set to atp.
+
+        Returns:
+            Tuple of the cached csv path and whether the file was fetched (True) or served from the cache (False). The
+            path is None for a year the Challenger, Futures or WTA files do not cover.
+
+        Raises:
+            requests.HTTPError: The server responded with an error status.
+        """
+        csv_path, meta_path = self.cache_paths(year, tour)
+
+        headers = {}
+        if os.path.exists(csv_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = session.get(self.tour_urls[tour].format(year), headers=headers, timeout=60)
+
+        if response.status_code == 304:
+            return csv_path, False
+
+        # The lower tiers and the WTA do not go back as far as the ATP main tour.
+        if response.status_code == 404 and tour != 'atp':
+            return None, False
+
+        response.raise_for_status()
+
+        # Write to a temporary file first so an interrupted download never leaves a partial csv in the cache.
+        tmp_path = csv_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, csv_path)
+
+        meta = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+
+        return csv_path, True
+
+    def fetch_years(self, years):
+        """
+        Downloads the match files of every tour for all the given years concurrently over one pooled session.
+
+        Args:
+            years (iterable): Years to download.
+
+        Returns:
+            Dictionary of (tour, year) to cached csv path, in year order. The number of files fetched, served from cache
+            and missing on github is stored in fetch_summary.
+        """
+        for tour in self.tours:
+            os.makedirs(os.path.join(self.cache_dir, tour), exist_ok=True)
+        keys = [(tour, year) for year in years for tour in self.tours]
+
+        with self.create_session() as session:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(lambda key: self.fetch_year(session, key[1], key[0]), keys))
+
+        fetched = sum(1 for _, was_fetched in results if was_fetched)
+        missing = sum(1 for path, _ in results if path is None)
+        self.fetch_summary = {'fetched': fetched, 'cached': len(results) - fetched - missing, 'missing': missing}
+
+        return {key: path for key, (path, _) in zip(keys, results) if path is not None}
+
+    def file_hash(self, path):
+        """
+        Calculates the content hash of a downloaded file.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            SHA-256 hex digest of the file contents.
         """
-        self.base_url = "https://raw.githubusercontent.com/JeffSackmann/tennis_atp/master/atp_matches_{}.csv"
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
 
-    def get_data(self, year_lower = 2000, year_upper = 2025):
+    def read_chunks(self, path, year, tour = 'atp'):
         """
-        Reads data from github url and creates dataframe across all the years input.
+        Streams one year's match file in chunks, parsing only the columns used for analysis with fixed dtypes. Carpet
+        matches and incomplete rows are dropped from each chunk as it is read, so only one chunk of the file is in memory at a time.
+
+        Args:
+            path (str): Path of the downloaded csv for the year.
+            year (int): Year of the matches.
+            tour (str): Tour of the matches. Default set to atp.
+
+        Returns:
+            Generator of dataframes, one per chunk.
+        """
+        for chunk in pd.read_csv(path, usecols=list(COLUMN_DTYPES), dtype=COLUMN_DTYPES, chunksize=self.chunk_size):
+            chunk = chunk[chunk['surface'] != 'Carpet'].dropna()
+            chunk = chunk.astype({column: 'int64' for column in INTEGER_COLUMNS})
+            chunk['Year'] = year
+            chunk['tour'] = tour
+
+            # Saved only columns we deemed relevant for analysis.
+            yield chunk[OUTPUT_COLUMNS]
+
+    def read_year(self, path, year, tour = 'atp'):
+        """
+        Reads one year's match file and keeps only the columns and rows used for analysis, in chronological order.
+
+        Args:
+            path (str): Path of the downloaded csv for the year.
+            year (int): Year of the matches.
+            tour (str): Tour of the matches. Default set to atp.
+
+        Returns:
+            Dataframe of the matches for that year.
+        """
+        chunks = list(self.read_chunks(path, year, tour))
+        if not chunks:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        return sort_chronologically(pd.concat(chunks))
+
+    def get_data(self, year_lower = 2000, year_upper = 2025, incremental = False):
+        """
+        Reads data from github url and creates dataframe across all the years input. Years whose file has not changed
+        on github are read from the local cache.
+
+        In incremental mode the data is kept in a MatchStore under output_dir/tennis_data, with one partition per tour
+        and year. Only files that are new, or that changed since they were last ingested, are parsed and written; the
+        other partitions are left as they are, and only the tours of this instance are loaded.
 
         Args:
             year_lower (int): The lower bound for the years you want data for. Default set to 2000
             year_upper (int): The upper bound (Exclusive) for the years you want data for. Default set to 2025
+            incremental (boolean): Update the partitioned match store instead of rebuilding tennis_data.csv. Default set to False.
 
         Returns:
-            Final dataframe across every github url for given years.
+            Final dataframe across every github url for given years and tours, with the matches in chronological order.
 
         Raises:
             Exception: Years must be integers
@@ -40,35 +274,38 @@ class GetTennisData():
             print(e)
             sys.exit(1)
 
-        df_list = []
-        for year in range(year_lower, year_upper):  
-
-            url = self.base_url.format(year)
-
-            response = requests.get(url)
+        paths = self.fetch_years(range(year_lower, year_upper))
+        print(f"Fetched {self.fetch_summary['fetched']} files, served {self.fetch_summary['cached']} files from cache")
 
-            df = pd.read_csv(StringIO(response.text))
+        if incremental is True:
+            store = MatchStore(os.path.join(self.output_dir, 'tennis_data'))
+            parsed = 0
+            for (tour, year), path in paths.items():
+                source_hash = self.file_hash(path)
+                if store.is_current(year, source_hash, tour):
+                    continue
+                store.write_partition(year, self.read_year(path, year, tour), source_hash, tour)
+                parsed += 1
+            self.ingest_summary = {'parsed': parsed, 'unchanged': len(paths) - parsed}
 
-            df['Year'] = year
+            return store.load(sorted({year for _, year in paths}), tours=self.tours)
 
-            df_list.append(df)
+        os.makedirs(self.output_dir, exist_ok=True)  # Create the directory if it doesn't exist
 
-        final_df = pd.concat(df_list)
+        file_path = os.path.join(self.output_dir, 'tennis_data.csv')
 
-        # Saved only columns we deemed relevant for analysis.
-        final_df = final_df[['tourney_name', 'surface', 'draw_size', 'tourney_level', 'best_of', 
-                   'winner_name', 'winner_age', 'loser_name', 'loser_age', 'Year']]
-        
-        final_df = final_df[final_df['surface'] != 'Carpet']
-        
-        final_df = final_df.dropna()
-
-        output_dir = '../data'
-
-        os.makedirs(output_dir, exist_ok=True)  # Create the directory if it doesn't exist
-        
-        file_path = os.path.join(output_dir, 'tennis_data.csv')
-
-        final_df.to_csv(file_path, index=0)
+        # Each year is appended to the csv as soon as its tours are parsed and sorted. The parsed years are also kept for
+        # the dataframe returned, so memory still grows with the number of years, though only by the projected columns
+        # of the rows kept rather than by the whole files.
+        df_list = []
+        with open(file_path, 'w', newline='') as f:
+            for year in sorted({year for _, year in paths}):
+                tour_dfs = [self.read_year(path, year, tour) for (tour, path_year), path in paths.items() if path_year == year]
+                year_df = sort_chronologically(pd.concat(tour_dfs)) if len(tour_dfs) > 1 else tour_dfs[0]
+                if len(year_df) > 0:
+                    year_df.to_csv(f, header=f.tell() == 0, index=False)
+                    df_list.append(year_df)
 
-        return final_df
+        if not df_list:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        return pd.concat(df_list)
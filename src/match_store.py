@@ -0,0 +1,652 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from player_index import PlayerIndex
+from date_index import date_key, sort_chronologically
+
+# Text columns are stored as int32 codes into a dictionary shared by every partition. Winner and loser names share
+# one player dictionary so a player has the same code in both columns.
+DICTIONARIES = {
+    'winner_name': 'player',
+    'loser_name': 'player',
+    'surface': 'surface',
+    'tourney_level': 'tourney_level',
+    'tourney_name': 'tourney_name',
+    'tour': 'tour',
+}
+
+# Version of the manifest layout. A store written with an older layout is treated as empty, so every partition is
+# ingested again on the next update.
+MANIFEST_VERSION = 2
+
+# First year of the yearly match files on github.
+FIRST_YEAR = 1968
+
+def select_matches(data, years = None, surfaces = None, levels = None, tournaments = None, columns = None, as_of = None, tours = None):
+    """
+    Selects the matches meeting the given conditions from either a MatchStore or a dataframe. For a MatchStore the
+    conditions are pushed down to the stored partitions, so only the needed rows and columns are read; a dataframe is
+    filtered in memory, skipping any condition the data already meets.
+
+    Args:
+        data (MatchStore or pandas dataframe): Match data to select from.
+        years (None or iterable): Years to keep, such as range(FIRST_YEAR, 2023). Default set to None, all years.
+        surfaces (None or iterable): Surfaces to keep. Default set to None, all surfaces.
+        levels (None or iterable): Tourney levels to keep. Default set to None, all levels.
+        tournaments (None or iterable): Tournament names to keep. Default set to None, all tournaments.
+        columns (None or list): Columns to keep. Default set to None, all columns.
+        as_of (None or date): Keep only tournaments starting before this date, as a yyyymmdd int, string or Timestamp.
+                              Default set to None, all dates.
+        tours (None or iterable): Tours to keep. A dataframe without a tour column is taken to be ATP matches.
+                                  Default set to None, all tours.
+
+    Returns:
+        Dataframe of the selected matches.
+
+    Raises:
+        TypeError: Data must be a MatchStore or a pandas dataframe.
+    """
+    if isinstance(data, MatchStore):
+        return data.load_matches(years=years, surfaces=surfaces, levels=levels, tournaments=tournaments, columns=columns, as_of=as_of, tours=tours)
+    if not isinstance(data, pd.DataFrame):
+        raise TypeError(f"data must be a MatchStore or a pandas dataframe, it is type {type(data)}")
+
+    mask = np.ones(len(data), dtype=bool)
+    if years is not None:
+        year_values = data['Year'].to_numpy()
+        if isinstance(years, range) and years.step == 1:
+            # A range of years is checked against the bounds, and skipped when every match is already inside it.
+            if len(year_values) and years.start <= year_values.min() and year_values.max() < years.stop:
+                year_mask = None
+            else:
+                year_mask = (year_values >= years.start) & (year_values < years.stop)
+        else:
+            year_mask = np.isin(year_values, list(years))
+        if year_mask is not None:
+            mask &= year_mask
+    for column, values in [('surface', surfaces), ('tourney_level', levels), ('tourney_name', tournaments)]:
+        if values is not None:
+            mask &= data[column].isin([values] if isinstance(values, str) else list(values)).to_numpy()
+    if tours is not None:
+        if 'tour' in data.columns:
+            mask &= data['tour'].isin(list(tours)).to_numpy()
+        elif 'atp' not in tours:
+            mask[:] = False
+    if as_of is not None:
+        mask &= data['tourney_date'].to_numpy() < date_key(as_of)
+
+    selected = data if mask.all() else data[mask]
+    if columns is not None:
+        selected = selected[list(columns)]
+    return selected
+
+def fingerprint(data):
+    """
+    Calculates a content fingerprint of match data, which changes whenever the matches do. For a MatchStore it comes
+    from the manifest alone, so no partition is read.
+
+    Args:
+        data (MatchStore or pandas dataframe): Match data to fingerprint.
+
+    Returns:
+        SHA-256 hex digest of the data.
+
+    Raises:
+        TypeError: Data must be a MatchStore or a pandas dataframe.
+    """
+    if isinstance(data, MatchStore):
+        return data.fingerprint()
+    if not isinstance(data, pd.DataFrame):
+        raise TypeError(f"data must be a MatchStore or a pandas dataframe, it is type {type(data)}")
+
+    digest = hashlib.sha256(json.dumps(list(map(str, data.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def file_signature(path):
+    """
+    Gets a signature of a file that changes whenever it is rewritten. Store files are replaced by renaming a new file
+    over them, which gives them a new inode, so the signature also changes when the size and time happen to match.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        Tuple of the inode, modification time in nanoseconds and size, or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+class MatchStore():
+    """
+    Class to store the tennis match data in a columnar binary format, one partition per tour and year. Each partition is a single
+    file with the columns stored back to back, and text columns are dictionary encoded. A manifest records the partitions ingested and the
+    content hash of the source file each partition was built from, so partitions can be added or replaced without rewriting the others.
+    """
+    def __init__(self, root = '../data/tennis_data'):
+        """
+        Initializer for MatchStore class.
+
+        Args:
+            root (str): Directory holding the partitions, dictionaries and manifest. Default set to ../data/tennis_data.
+        """
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.dictionary_dir = os.path.join(root, 'dictionaries')
+        self.dictionary_cache = {}
+        self.manifest_cache = None
+
+    def read_manifest(self):
+        """
+        Reads the manifest of ingested partitions.
+
+        Returns:
+            Dictionary of (tour, year) to a dictionary with the source hash, number of rows, column layout and dictionary
+            encoded columns of that partition.
+            Empty if nothing has been ingested yet, or the store was written with an older manifest layout.
+        """
+        # The parsed manifest is kept until the file is replaced, by this instance or any other writer.
+        signature = file_signature(self.manifest_path)
+        if signature is None:
+            return {}
+        if self.manifest_cache is None or self.manifest_cache[0] != signature:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            partitions = {}
+            if manifest.get('version') == MANIFEST_VERSION:
+                for key, entry in manifest['partitions'].items():
+                    tour, year = key.split('/')
+                    partitions[(tour, int(year))] = entry
+            self.manifest_cache = (signature, partitions)
+        return dict(self.manifest_cache[1])
+
+    def write_manifest(self, manifest):
+        """
+        Saves the manifest. Written to a temporary file then renamed, so a crash never leaves a half written manifest.
+
+        Args:
+            manifest (dict): Dictionary of (tour, year) to partition entry, as returned by read_manifest.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        partitions = {f'{tour}/{year}': manifest[(tour, year)] for tour, year in sorted(manifest)}
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'partitions': partitions}, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def partition_path(self, year, tour = 'atp'):
+        """
+        Gets the file path of a partition.
+
+        Args:
+            year (int): Year of the partition.
+            tour (str): Tour of the partition. Default set to atp.
+
+        Returns:
+            Path of the partition file as a string.
+        """
+        return os.path.join(self.root, tour, f'tennis_data_{year}.bin')
+
+    def tours(self):
+        """
+        Gets the tours stored.
+
+        Returns:
+            Sorted list of the tours in the manifest.
+        """
+        return sorted({tour for tour, _ in self.read_manifest()})
+
+    def years(self, tours = None):
+        """
+        Gets the years stored.
+
+        Args:
+            tours (None or iterable): Only count years stored for these tours. Default set to None, all tours.
+
+        Returns:
+            Sorted list of the years in the manifest.
+        """
+        return sorted({year for tour, year in self.read_manifest() if tours is None or tour in tours})
+
+    def is_current(self, year, source_hash, tour = 'atp'):
+        """
+        Checks whether a partition is already stored from a source file with the given hash.
+
+        Args:
+            year (int): Year of the partition.
+            source_hash (str): Content hash of the source file for that year.
+            tour (str): Tour of the partition. Default set to atp.
+
+        Returns:
+            True if the partition exists and was built from the same source file, False otherwise.
+        """
+        entry = self.read_manifest().get((tour, year))
+        return entry is not None and entry['hash'] == source_hash and os.path.exists(self.partition_path(year, tour))
+
+    def fingerprint(self):
+        """
+        Calculates a content fingerprint of the store from the manifest: the source hash and columns of every partition.
+        It is the same for as long as no partition is added, replaced or removed.
+
+        Returns:
+            SHA-256 hex digest of the stored partitions.
+        """
+        manifest = self.read_manifest()
+        partitions = [[tour, year, manifest[(tour, year)]['hash'], list(manifest[(tour, year)]['columns'])] for tour, year in sorted(manifest)]
+        return hashlib.sha256(json.dumps([MANIFEST_VERSION, partitions]).encode()).hexdigest()
+
+    def read_dictionary(self, name):
+        """
+        Reads one of the value dictionaries used to encode text columns.
+
+        Args:
+            name (str): Name of the dictionary (player, surface, tourney_level, tourney_name).
+
+        Returns:
+            List of the values, where a value's position is its code.
+        """
+        if name not in self.dictionary_cache:
+            path = os.path.join(self.dictionary_dir, f'{name}.json')
+            values = []
+            signature = file_signature(path)
+            if signature is not None:
+                with open(path) as f:
+                    values = json.load(f)
+            self.dictionary_cache[name] = values
+            self.dictionary_cache[('signature', name)] = signature
+        return self.dictionary_cache[name]
+
+    def refresh_dictionaries(self):
+        """
+        Drops the cached dictionaries whose files were replaced since they were read, such as by another process
+        ingesting new players, so they are read again. Unchanged dictionaries and their categorical dtypes are kept.
+        """
+        for name in [key for key in self.dictionary_cache if isinstance(key, str)]:
+            if file_signature(os.path.join(self.dictionary_dir, f'{name}.json')) != self.dictionary_cache[('signature', name)]:
+                for key in [name, ('signature', name), ('dtype', name)]:
+                    self.dictionary_cache.pop(key, None)
+
+    def encode(self, name, values):
+        """
+        Encodes text values against a dictionary. Values not seen before are appended to the dictionary, so codes already
+        written to other partitions never change.
+
+        Args:
+            name (str): Name of the dictionary.
+            values (pandas series): Values to encode.
+
+        Returns:
+            Numpy int32 array of codes, -1 for missing values.
+        """
+        dictionary = self.read_dictionary(name)
+        codes = pd.Index(dictionary, dtype=object).get_indexer(values)
+
+        new_values = pd.unique(values[(codes == -1) & values.notna().to_numpy()])
+        if len(new_values) > 0:
+            dictionary.extend(str(value) for value in new_values)
+            os.makedirs(self.dictionary_dir, exist_ok=True)
+            path = os.path.join(self.dictionary_dir, f'{name}.json')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(dictionary, f)
+            os.replace(tmp_path, path)
+            self.dictionary_cache[('signature', name)] = file_signature(path)
+            self.dictionary_cache.pop(('dtype', name), None)
+            codes = pd.Index(dictionary, dtype=object).get_indexer(values)
+
+        return codes.astype(np.int32)
+
+    def tournament_runs(self, codes):
+        """
+        Finds the contiguous row ranges of each tournament. Rows keep their original order, and the matches of a
+        tournament are stored together, so each tournament is usually a single range.
+
+        Args:
+            codes (numpy array): Tournament name codes of a partition, in row order.
+
+        Returns:
+            List of [code, start, stop] ranges in row order.
+        """
+        if len(codes) == 0:
+            return []
+        starts = np.concatenate([[0], np.flatnonzero(codes[1:] != codes[:-1]) + 1])
+        stops = np.concatenate([starts[1:], [len(codes)]])
+        return [[int(codes[start]), int(start), int(stop)] for start, stop in zip(starts, stops)]
+
+    def write_partition(self, year, df, source_hash, tour = 'atp'):
+        """
+        Writes (or replaces) the partition for one tour and year and records it in the manifest. Other partitions are not touched.
+        The columns are written back to back into one binary file, with each column's dtype and byte offset kept in the manifest.
+        The manifest also records the codes present in each text column, the row ranges each tournament occupies and
+        the first and last tourney date, so load_matches can skip partitions and rows without reading them. Matches are
+        stored in chronological order.
+
+        Args:
+            year (int): Year of the partition.
+            df (pandas dataframe): Match data for the year.
+            source_hash (str): Content hash of the source file the data was parsed from.
+            tour (str): Tour the matches were played on, stored in the tour column. Default set to atp.
+
+        Raises:
+            TypeError: df must be a pandas dataframe.
+        """
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError(f"df must be a pandas dataframe, it is type {type(df)}")
+
+        # The ID columns are derived from the player dictionary when loading, so they are never stored.
+        df = sort_chronologically(df.drop(columns=['winner_id', 'loser_id'], errors='ignore'))
+        df = df.assign(tour=tour)
+
+        path = self.partition_path(year, tour)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+
+        columns = {}
+        encoded = {}
+        values_present = {}
+        tournaments = []
+        offset = 0
+        with open(tmp_path, 'wb') as f:
+            for column in df.columns:
+                values = df[column]
+                if column in DICTIONARIES or not pd.api.types.is_numeric_dtype(values):
+                    encoded[column] = DICTIONARIES.get(column, column)
+                    array = self.encode(encoded[column], values)
+                    if encoded[column] != 'player':
+                        values_present[column] = np.unique(array).tolist()
+                    if column == 'tourney_name':
+                        tournaments = self.tournament_runs(array)
+                else:
+                    array = np.ascontiguousarray(values.to_numpy())
+                columns[column] = {'dtype': array.dtype.str, 'offset': offset}
+                f.write(array.tobytes())
+
+                # Pad every column to a multiple of 8 bytes so each one starts aligned.
+                padding = -array.nbytes % 8
+                f.write(b'\0' * padding)
+                offset += array.nbytes + padding
+        os.replace(tmp_path, path)
+
+        manifest = self.read_manifest()
+        manifest[(tour, year)] = {'hash': source_hash, 'rows': len(df), 'columns': columns, 'dictionaries': encoded,
+                          'values': values_present, 'tournaments': tournaments}
+        if 'tourney_date' in df.columns and len(df) > 0:
+            manifest[(tour, year)]['dates'] = [int(df['tourney_date'].min()), int(df['tourney_date'].max())]
+        self.write_manifest(manifest)
+
+    def write_frame(self, df):
+        """
+        Writes a full match dataframe (such as tennis_data.csv) into the store, one partition per tour and year. The hash
+        recorded for each partition is calculated from the data itself.
+
+        Args:
+            df (pandas dataframe): Match data containing a Year column, and a tour column if it covers more than the ATP tour.
+        """
+        if 'tour' not in df.columns:
+            df = df.assign(tour='atp')
+        for (tour, year), year_df in df.groupby(['tour', 'Year'], sort=True, observed=True):
+            data_hash = hashlib.sha256(pd.util.hash_pandas_object(year_df, index=False).to_numpy().tobytes()).hexdigest()
+            self.write_partition(int(year), year_df, data_hash, tour=str(tour))
+
+    def categorical_dtype(self, name):
+        """
+        Gets the categorical dtype for a dictionary, built once per dictionary and reused for every column that shares it.
+
+        Args:
+            name (str): Name of the dictionary.
+
+        Returns:
+            pandas CategoricalDtype whose categories are the dictionary values.
+        """
+        key = ('dtype', name)
+        if key not in self.dictionary_cache:
+            self.dictionary_cache[key] = pd.CategoricalDtype(self.read_dictionary(name))
+        return self.dictionary_cache[key]
+
+    def codes_of(self, name, values):
+        """
+        Gets the codes of the given values in a dictionary, ignoring values that are not in it.
+
+        Args:
+            name (str): Name of the dictionary.
+            values (iterable): Values to look up.
+
+        Returns:
+            Numpy int32 array of the codes found.
+        """
+        if isinstance(values, str):
+            values = [values]
+        codes = pd.Index(self.read_dictionary(name), dtype=object).get_indexer(list(values))
+        return codes[codes != -1].astype(np.int32)
+
+    def read_ranges(self, f, entry, column, ranges, out = None):
+        """
+        Reads row ranges of one column of a partition, converting the dtype if the partition stored it differently.
+
+        Args:
+            f (file): Open partition file.
+            entry (dict): Manifest entry of the partition.
+            column (str): Column to read.
+            ranges (list): List of (start, stop) row ranges, in order.
+            out (None or numpy array): Array to read into, sized to the total number of rows. Default set to None,
+                                       which reads into a new array.
+
+        Returns:
+            Numpy array of the rows read.
+        """
+        layout = entry['columns'][column]
+        dtype = np.dtype(layout['dtype'])
+        if out is None:
+            out = np.empty(sum(stop - start for start, stop in ranges), dtype=dtype)
+
+        position = 0
+        for start, stop in ranges:
+            f.seek(layout['offset'] + start * dtype.itemsize)
+            if out.dtype == dtype:
+                f.readinto(memoryview(out[position:position + stop - start]).cast('B'))
+            else:
+                # Partitions written with a different dtype for this column are converted as they are read.
+                out[position:position + stop - start] = np.fromfile(f, dtype=dtype, count=stop - start)
+            position += stop - start
+        return out
+
+    def read_selection(self, f, entry, column, ranges, mask, out = None):
+        """
+        Reads the selected rows of one column of a partition: the given row ranges, filtered by a mask if there is one.
+
+        Args:
+            f (file): Open partition file.
+            entry (dict): Manifest entry of the partition.
+            column (str): Column to read.
+            ranges (list): List of (start, stop) row ranges, in order.
+            mask (None or numpy array): Boolean mask over the rows of the ranges, or None to keep them all.
+            out (None or numpy array): Array to write the selected rows into. Default set to None, a new array.
+
+        Returns:
+            Numpy array of the selected rows.
+        """
+        if mask is None:
+            return self.read_ranges(f, entry, column, ranges, out=out)
+        if out is None:
+            return self.read_ranges(f, entry, column, ranges)[mask]
+        out[:] = self.read_ranges(f, entry, column, ranges)[mask]
+        return out
+
+    def load_matches(self, years = None, surfaces = None, levels = None, tournaments = None, columns = None, as_of = None, tours = None):
+        """
+        Reads the matches meeting the given conditions, pushing each condition down to the stored partitions. Tours and
+        years not requested are never opened, partitions without any of the requested surfaces or tourney levels are skipped from
+        the manifest alone, tournaments are read as the row ranges they occupy, and only the requested columns are read.
+
+        Args:
+            years (None or iterable): Years to read, such as range(FIRST_YEAR, 2023). Default set to None, all years.
+            surfaces (None or iterable): Surfaces to keep. Default set to None, all surfaces.
+            levels (None or iterable): Tourney levels to keep. Default set to None, all levels.
+            tournaments (None or iterable): Tournament names to keep. Default set to None, all tournaments.
+            columns (None or list): Columns to return, which may include winner_id and loser_id. Default set to None,
+                                    every stored column followed by winner_id and loser_id.
+            as_of (None or date): Read only tournaments starting before this date, as a yyyymmdd int, string or Timestamp.
+                                  Partitions starting on or after it are skipped, and the one it falls in is cut at the
+                                  row found by binary search over its sorted dates. Default set to None, all dates.
+            tours (None or iterable): Tours to read, such as ['atp', 'challenger']. Default set to None, all tours.
+
+        Returns:
+            Dataframe of the matching rows in chronological order. Text columns are returned as categoricals over the
+            store dictionaries, and winner_id and loser_id are int32 player IDs.
+
+        Raises:
+            KeyError: One of the requested columns is not in the store, or as_of is given for a store without tourney dates.
+        """
+        manifest = self.read_manifest()
+        if not manifest:
+            return pd.DataFrame()
+
+        # Dictionaries may have grown since they were last read.
+        self.refresh_dictionaries()
+
+        # Partitions are read in year order, with the tours of a year in alphabetical order.
+        keys = sorted(manifest, key=lambda key: (key[1], key[0]))
+        layout = manifest[keys[0]]
+        stored = list(layout['columns'])
+        id_columns = [column.replace('_name', '_id') for column in stored if layout['dictionaries'].get(column) == 'player']
+        if columns is None:
+            columns = stored + id_columns
+        missing = [column for column in columns if column not in stored and column not in id_columns]
+        if missing:
+            raise KeyError(f"Columns {missing} are not in the match store")
+
+        # The ID columns are the codes of the name columns.
+        sources = {column: column.replace('_id', '_name') if column in id_columns else column for column in columns}
+
+        predicates = {}
+        if surfaces is not None:
+            predicates['surface'] = self.codes_of('surface', surfaces)
+        if levels is not None:
+            predicates['tourney_level'] = self.codes_of('tourney_level', levels)
+        tournament_codes = None if tournaments is None else self.codes_of('tourney_name', tournaments)
+        if as_of is not None:
+            if 'tourney_date' not in stored:
+                raise KeyError("Column tourney_date is not in the match store, so it cannot be read as of a date")
+            as_of = date_key(as_of)
+
+        # Work out which rows of which partitions are needed before reading any of the output columns.
+        plans = []
+        for tour, year in keys:
+            if (years is not None and year not in years) or (tours is not None and tour not in tours):
+                continue
+            entry = manifest[(tour, year)]
+            if any(not np.isin(codes, entry['values'][column]).any() for column, codes in predicates.items() if column in entry.get('values', {})):
+                continue
+            if as_of is not None and 'dates' in entry and entry['dates'][0] >= as_of:
+                continue
+
+            with open(self.partition_path(year, tour), 'rb') as f:
+                ranges = [(0, entry['rows'])]
+                if as_of is not None and not ('dates' in entry and entry['dates'][1] < as_of):
+                    stop = int(np.searchsorted(self.read_ranges(f, entry, 'tourney_date', ranges), as_of, side='left'))
+                    ranges = [(0, stop)]
+                if tournament_codes is not None:
+                    runs = entry.get('tournaments')
+                    if runs is None:
+                        runs = self.tournament_runs(self.read_ranges(f, entry, 'tourney_name', ranges))
+                    ranges = [(start, min(stop, ranges[0][1])) for code, start, stop in runs if code in tournament_codes and start < ranges[0][1]]
+
+                mask = None
+                for column, codes in predicates.items():
+                    column_mask = np.isin(self.read_ranges(f, entry, column, ranges), codes)
+                    mask = column_mask if mask is None else mask & column_mask
+
+            rows = sum(stop - start for start, stop in ranges) if mask is None else int(mask.sum())
+            if rows > 0:
+                plans.append((self.partition_path(year, tour), entry, ranges, mask, rows))
+
+        # Columns of the same dtype are read straight into the rows of one 2D array, which pandas keeps as a single
+        # block, so the data is copied once from the file and never again. Plain columns come first in each group so
+        # they can be handed to pandas as one slice of the block.
+        groups = {}
+        for column in sorted(columns, key=lambda column: sources[column] in layout['dictionaries'] and column not in id_columns):
+            groups.setdefault(layout['columns'][sources[column]]['dtype'], []).append(column)
+
+        total_rows = sum(plan[-1] for plan in plans)
+        blocks = {dtype: np.empty((len(group), total_rows), dtype=dtype) for dtype, group in groups.items()}
+
+        # Each partition is sorted, but a partition can hold tournaments dated before the end of the previous one, such
+        # as a January event starting in late December. Only then are the dates read to merge the partitions.
+        order = None
+        spans = [entry.get('dates') for _, entry, _, _, _ in plans]
+        if all(spans) and any(previous[1] > following[0] for previous, following in zip(spans, spans[1:])):
+            dates = []
+            for path, entry, ranges, mask, rows in plans:
+                with open(path, 'rb') as f:
+                    dates.append(self.read_selection(f, entry, 'tourney_date', ranges, mask))
+            order = np.argsort(np.concatenate(dates), kind='stable')
+
+        start = 0
+        for path, entry, ranges, mask, rows in plans:
+            with open(path, 'rb') as f:
+                for dtype, group in groups.items():
+                    for i, column in enumerate(group):
+                        self.read_selection(f, entry, sources[column], ranges, mask, out=blocks[dtype][i, start:start + rows])
+            start += rows
+
+        if order is not None:
+            blocks = {dtype: block[:, order] for dtype, block in blocks.items()}
+
+        # The plain columns of each dtype become one frame over their slice of the block, and the categoricals one
+        # frame together, so only a few frames are joined however many columns are read.
+        frames = []
+        categoricals = {}
+        for dtype, group in groups.items():
+            plain = [column for column in group if sources[column] not in layout['dictionaries'] or column in id_columns]
+            if plain:
+                frames.append(pd.DataFrame(blocks[dtype][:len(plain)].T, columns=plain, copy=False))
+            for i, column in enumerate(group[len(plain):], start=len(plain)):
+                dictionary_dtype = self.categorical_dtype(layout['dictionaries'][column])
+                categoricals[column] = pd.Categorical.from_codes(blocks[dtype][i], dtype=dictionary_dtype, validate=False)
+        if categoricals:
+            frames.append(pd.DataFrame(categoricals, copy=False))
+
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+        return df if list(df.columns) == list(columns) else df[list(columns)]
+
+    def load(self, years = None, tours = None):
+        """
+        Reads the stored partitions into one dataframe. Text columns are returned as categoricals over the store dictionaries,
+        and the player codes are added as int32 winner_id and loser_id columns.
+
+        Args:
+            years (None or iterable): Years to read. Default set to None, which reads every stored year.
+            tours (None or iterable): Tours to read. Default set to None, which reads every stored tour.
+
+        Returns:
+            Dataframe of the match data for the requested years, in chronological order.
+
+        Raises:
+            KeyError: One of the requested years is not in the store for the requested tours.
+        """
+        if years is not None:
+            stored = self.years(tours)
+            missing = [year for year in years if year not in stored]
+            if missing:
+                raise KeyError(f"Years {missing} are not in the match store")
+            years = set(years)
+
+        return self.load_matches(years=years, tours=tours)
+
+    def player_index(self):
+        """
+        Gets the player index of the store, whose IDs are the codes of the player dictionary.
+
+        Returns:
+            PlayerIndex over every player in the store.
+        """
+        return PlayerIndex(self.read_dictionary('player'))
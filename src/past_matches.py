@@ -1,4 +1,11 @@
 import pandas as pd
+import numpy as np
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from player_index import PlayerIndex
 
 
 class past_match_data():
@@ -28,48 +35,36 @@ class past_match_data():
         """
         if not isinstance(data, pd.DataFrame):
             raise TypeError("Data input must be of type pandas dataframe")
-        games_played = {}
-        wins = {}
-
-        for _, row in data.iterrows():
-            winner = row['winner_name']
-            loser = row['loser_name']
-            
-            # Inserts games played counter for new players not in the data dictionary
-            if winner not in games_played:
-                games_played[winner] = {}
-                wins[winner] = {}
-                
-            if loser not in games_played:
-                games_played[loser] = {}
-                wins[loser] = {}
-                
-            # Update games played and wins for both winner and loser against each other
-            if loser not in games_played[winner]:
-                games_played[winner][loser] = 0
-                wins[winner][loser] = 0
-            if winner not in games_played[loser]:
-                games_played[loser][winner] = 0
-                wins[loser][winner] = 0
-        
-            games_played[winner][loser] += 1
-            games_played[loser][winner] += 1
-            wins[winner][loser] += 1
-
-            # Calculate win percentages
-            win_percentages = {}
-            for player in games_played:
-                win_percentages[player] = {}
-                for opponent in games_played[player]:
-                    total_games = games_played[player][opponent]
-                    total_wins = wins[player][opponent]
-                    win_percentage = total_wins / total_games if total_games > 0 else 0
-                    win_percentages[player][opponent] = win_percentage
-
-        # Make into dataframe, fill the NA values with 0 which means players never played each other
-        win_percentage_df = pd.DataFrame(win_percentages).fillna(0)
-
-        games_played_df = pd.DataFrame(games_played).fillna(0)
+        player_index = PlayerIndex.from_matches(data)
+        winner_ids = player_index.ids(data['winner_name'])
+        loser_ids = player_index.ids(data['loser_name'])
+        num_players = len(player_index)
+
+        # Count games played and wins for every pair of players in one pass over the ID arrays.
+        games_played = np.zeros((num_players, num_players))
+        wins = np.zeros((num_players, num_players))
+        np.add.at(games_played, (winner_ids, loser_ids), 1)
+        np.add.at(games_played, (loser_ids, winner_ids), 1)
+        np.add.at(wins, (winner_ids, loser_ids), 1)
+
+        win_percentages = np.divide(wins, games_played, out=np.zeros_like(wins), where=games_played > 0)
+
+        # Players (columns) are ordered by first appearance. Opponents (rows) are ordered by first appearance of each
+        # player's opponents in turn, which is the order the dataframes had when they were built from nested dictionaries.
+        players = pd.unique(np.column_stack([winner_ids, loser_ids]).ravel())
+        pairs = np.column_stack([winner_ids, loser_ids, loser_ids, winner_ids]).reshape(-1, 2).astype(np.int64)
+        first_pairs = pd.unique(pairs[:, 0] * num_players + pairs[:, 1])
+        player_rank = np.empty(num_players, dtype=np.int64)
+        player_rank[players] = np.arange(len(players))
+        first_pairs = first_pairs[np.argsort(player_rank[first_pairs // num_players], kind='stable')]
+        opponents = pd.unique(first_pairs % num_players)
+
+        # Make into dataframe, 0 means players never played each other
+        win_percentage_df = pd.DataFrame(win_percentages[np.ix_(players, opponents)].T,
+                                         index=player_index.names_of(opponents), columns=player_index.names_of(players))
+
+        games_played_df = pd.DataFrame(games_played[np.ix_(players, opponents)].T,
+                                       index=player_index.names_of(opponents), columns=player_index.names_of(players))
 
         file_path_games = f'../data/games_played_opponents.csv'
 
@@ -0,0 +1,150 @@
+import pandas as pd
+import numpy as np
+
+class PlayerIndex():
+    """
+    Class mapping player names to dense int32 IDs (0 to number of players - 1) and back, so the rating engines can keep
+    player state in plain numpy arrays indexed by ID instead of looking names up in a pandas index.
+    """
+    def __init__(self, names):
+        """
+        Initializer for PlayerIndex class.
+
+        Args:
+            names (iterable): Unique player names. A player's ID is their position in this list.
+
+        Raises:
+            ValueError: Player names must be unique.
+        """
+        self.names = np.asarray(list(names), dtype=object)
+        self.index = pd.Index(self.names)
+        if not self.index.is_unique:
+            raise ValueError("Player names must be unique")
+
+    @classmethod
+    def from_matches(cls, data):
+        """
+        Builds the player index from match data. If the names are categoricals from the match store, players are
+        numbered in the order of the store's player codes, keeping only those in the data, so a single tour or year is
+        not sized by the dictionary of the whole store; otherwise players are numbered in order of first appearance.
+
+        Args:
+            data (pandas dataframe): Match data containing winner_name and loser_name columns.
+
+        Returns:
+            PlayerIndex covering every winner and loser in the data.
+
+        Raises:
+            TypeError: Data input must be a dataframe.
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError("Data input must be of type pandas dataframe")
+
+        winners = data['winner_name']
+        losers = data['loser_name']
+        if isinstance(winners.dtype, pd.CategoricalDtype) and winners.dtype == losers.dtype:
+            codes = np.concatenate([winners.cat.codes.to_numpy(), losers.cat.codes.to_numpy()])
+            return cls(winners.cat.categories[np.unique(codes[codes >= 0])])
+
+        return cls(pd.unique(np.column_stack([winners.to_numpy(dtype=object), losers.to_numpy(dtype=object)]).ravel()))
+
+    def __len__(self):
+        """
+        Gets the number of players.
+
+        Returns:
+            Number of players in the index as an int.
+        """
+        return len(self.names)
+
+    def __contains__(self, name):
+        """
+        Checks whether a player is in the index.
+
+        Args:
+            name (str): Name of the player.
+
+        Returns:
+            True if the player has an ID, False otherwise.
+        """
+        return name in self.index
+
+    def id_of(self, name):
+        """
+        Gets the ID of one player.
+
+        Args:
+            name (str): Name of the player.
+
+        Returns:
+            ID of the player as an int.
+
+        Raises:
+            KeyError: The player is not in the index.
+        """
+        return int(self.index.get_loc(name))
+
+    def ids(self, names):
+        """
+        Gets the IDs of many players at once.
+
+        Args:
+            names (iterable): Names of the players.
+
+        Returns:
+            Numpy int32 array of IDs.
+
+        Raises:
+            KeyError: One of the players is not in the index.
+        """
+        if isinstance(names, pd.Series) and isinstance(names.dtype, pd.CategoricalDtype):
+            if names.cat.categories.equals(self.index):
+                return names.cat.codes.to_numpy().astype(np.int32)
+            # Each category is looked up once and the codes mapped through it. A missing name has the code -1, which
+            # picks the -1 appended after the categories.
+            ids = np.append(self.index.get_indexer(names.cat.categories), -1)[names.cat.codes.to_numpy()]
+        else:
+            ids = self.index.get_indexer(names)
+        if (ids == -1).any():
+            missing = list(pd.Index(names)[ids == -1][:5])
+            raise KeyError(f"Players {missing} are not in the player index")
+        return ids.astype(np.int32)
+
+    def name_of(self, player_id):
+        """
+        Gets the name of one player.
+
+        Args:
+            player_id (int): ID of the player.
+
+        Returns:
+            Name of the player as a string.
+        """
+        return self.names[player_id]
+
+    def names_of(self, player_ids):
+        """
+        Gets the names of many players at once.
+
+        Args:
+            player_ids (numpy array): IDs of the players.
+
+        Returns:
+            Numpy array of player names.
+        """
+        return self.names[np.asarray(player_ids)]
+
+    def encode_matches(self, data):
+        """
+        Adds winner_id and loser_id columns to match data.
+
+        Args:
+            data (pandas dataframe): Match data containing winner_name and loser_name columns.
+
+        Returns:
+            Copy of the data with int32 winner_id and loser_id columns.
+        """
+        encoded = data.copy()
+        encoded['winner_id'] = self.ids(data['winner_name'])
+        encoded['loser_id'] = self.ids(data['loser_name'])
+        return encoded
@@ -0,0 +1,151 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from date_index import date_key
+from player_index import PlayerIndex
+
+# Columns of the history, with the dtype each one is stored as.
+HISTORY_COLUMNS = {
+    'match': np.int32,
+    'player': np.int32,
+    'date': np.int32,
+    'column': np.int8,
+    'pre': np.float32,
+    'post': np.float32,
+}
+
+class RatingHistory():
+    """
+    Class recording the rating trajectory of every player: one row per player per match, holding the match index, player
+    ID, tourney date, rating column of the match surface and the rating before and after the match. Rows are kept in
+    columnar arrays, with ratings as float32, and indexed by player on the first query so a player's series over a date
+    range is found by binary search.
+    """
+    def __init__(self, player_index, columns):
+        """
+        Initializer for RatingHistory class.
+
+        Args:
+            player_index (PlayerIndex): Player index whose IDs the recorded player IDs refer to.
+            columns (list): Names of the rating columns, such as Hard_ELO.
+        """
+        self.player_index = player_index
+        self.columns = list(columns)
+        self.chunks = []
+        self.arrays = {column: np.zeros(0, dtype=dtype) for column, dtype in HISTORY_COLUMNS.items()}
+        self.player_order = None
+        self.player_starts = None
+
+    def record(self, first_match, winners, losers, columns, dates, winner_ratings, loser_ratings):
+        """
+        Adds the winner and loser rows of a run of consecutive matches.
+
+        Args:
+            first_match (int): Match index of the first match.
+            winners (numpy array): Winner IDs.
+            losers (numpy array): Loser IDs.
+            columns (numpy array): Rating column of each match.
+            dates (numpy array): Tourney date of each match as yyyymmdd ints.
+            winner_ratings (numpy array): Matches by 2 array of the winner ratings before and after each match.
+            loser_ratings (numpy array): Matches by 2 array of the loser ratings before and after each match.
+        """
+        matches = len(winners)
+        if matches == 0:
+            return
+        winner_ratings = np.asarray(winner_ratings, dtype=np.float32).reshape(matches, 2)
+        loser_ratings = np.asarray(loser_ratings, dtype=np.float32).reshape(matches, 2)
+        match = np.arange(first_match, first_match + matches, dtype=np.int32)
+
+        # Winner and loser rows of each match are kept next to each other.
+        self.chunks.append({
+            'match': np.repeat(match, 2),
+            'player': np.column_stack([winners, losers]).ravel().astype(np.int32),
+            'date': np.repeat(np.asarray(dates, dtype=np.int32), 2),
+            'column': np.repeat(np.asarray(columns, dtype=np.int8), 2),
+            'pre': np.column_stack([winner_ratings[:, 0], loser_ratings[:, 0]]).ravel(),
+            'post': np.column_stack([winner_ratings[:, 1], loser_ratings[:, 1]]).ravel(),
+        })
+        self.player_order = None
+
+    def consolidate(self):
+        """
+        Joins the recorded chunks into one array per column and indexes the rows by player.
+        """
+        if self.chunks:
+            self.arrays = {column: np.concatenate([self.arrays[column]] + [chunk[column] for chunk in self.chunks])
+                           for column in HISTORY_COLUMNS}
+            self.chunks = []
+        if self.player_order is None:
+            # A stable sort keeps each player's rows in match order.
+            self.player_order = np.argsort(self.arrays['player'], kind='stable')
+            self.player_starts = np.searchsorted(self.arrays['player'][self.player_order], np.arange(len(self.player_index) + 1))
+
+    def __len__(self):
+        """
+        Gets the number of rows recorded, two for every match.
+
+        Returns:
+            Number of rows as an int.
+        """
+        return len(self.arrays['match']) + sum(len(chunk['match']) for chunk in self.chunks)
+
+    def series(self, name, start = None, end = None):
+        """
+        Gets one player's ratings before and after each of their matches in a date range.
+
+        Args:
+            name (str): Name of the player.
+            start (None, int, str, datetime.date or pandas Timestamp): First tourney date included. Default set to None, from the first match.
+            end (None, int, str, datetime.date or pandas Timestamp): Tourney date the range stops before. Default set to None, to the last match.
+
+        Returns:
+            Dataframe of the player's matches in order, with the match index, date, rating column and the ratings before
+            and after.
+
+        Raises:
+            KeyError: The player is not in the player index.
+        """
+        self.consolidate()
+        player = self.player_index.id_of(name)
+        rows = self.player_order[self.player_starts[player]:self.player_starts[player + 1]]
+        dates = self.arrays['date'][rows]
+        first = 0 if start is None else np.searchsorted(dates, date_key(start), side='left')
+        last = len(rows) if end is None else np.searchsorted(dates, date_key(end), side='left')
+        rows = rows[first:last]
+
+        return pd.DataFrame({
+            'match': self.arrays['match'][rows],
+            'date': self.arrays['date'][rows],
+            'column': np.array(self.columns, dtype=object)[self.arrays['column'][rows]],
+            'pre': self.arrays['pre'][rows],
+            'post': self.arrays['post'][rows]})
+
+    def save(self, path):
+        """
+        Saves the recorded rows as an npz file of the columns.
+
+        Args:
+            path (str): Path of the npz file.
+        """
+        self.consolidate()
+        np.savez(path, names=np.array(self.player_index.names, dtype=str), columns=np.array(self.columns, dtype=str), **self.arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a saved history.
+
+        Args:
+            path (str): Path of the npz file.
+
+        Returns:
+            RatingHistory saved at the path.
+        """
+        with np.load(path, allow_pickle=False) as saved:
+            history = cls(PlayerIndex(saved['names'].tolist()), saved['columns'].tolist())
+            history.arrays = {column: saved[column] for column in HISTORY_COLUMNS}
+        return history
@@ -0,0 +1,76 @@
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from match_store import select_matches, FIRST_YEAR
+from player_index import PlayerIndex
+from elo_engine import EloEngine, UPDATE_SURFACES, conflict_free_batches
+
+class RatingRunner():
+    """
+    Class running several rating models over the same matches. The training matches are selected and encoded once, and
+    their match arrays and conflict free batches are shared by every registered model. Each model then makes its own
+    pass over the shared arrays through its engine's run: the ELO updates one match at a time and the SkillO runs a
+    batch at a time, every run together.
+    """
+    def __init__(self, current_year, surfaces = None):
+        """
+        Initializer for RatingRunner class.
+
+        Args:
+            current_year (int): The current year that data was obtained from. Matches before it are used for training.
+            surfaces (None or list): Surfaces of the rating columns, in order. Default set to None, which uses UPDATE_SURFACES.
+        """
+        self.current_year = current_year
+        self.surfaces = list(UPDATE_SURFACES) if surfaces is None else list(surfaces)
+        self.models = {}
+
+    def add(self, name, engine, **parameters):
+        """
+        Registers a model to run.
+
+        Args:
+            name (str): Name the model's ratings are returned under.
+            engine (EloEngine or SkillOEngine): Engine of the model, holding its parameters. It should have the
+                                                runner's current year.
+            **parameters: Parameters of the engine's rate method, such as K for an EloEngine or runs for a SkillOEngine.
+
+        Raises:
+            TypeError: The engine must be an EloEngine or a SkillOEngine.
+            ValueError: Model names must be unique.
+        """
+        # Engines are recognised by their rate method, as the same class can be imported as src.elo_engine or elo_engine.
+        if not callable(getattr(engine, 'rate', None)):
+            raise TypeError(f"engine must be an EloEngine or SkillOEngine, it is type {type(engine)}")
+        if name in self.models:
+            raise ValueError(f"A model named {name} is already registered")
+        self.models[name] = (engine, parameters)
+
+    def run(self, data):
+        """
+        Runs every registered model over the training matches, one pass over the shared match arrays per model.
+
+        Args:
+            data (pandas dataframe or MatchStore): Chronologically sorted match history. A MatchStore is read for the
+                                                   training years and needed columns only.
+
+        Returns:
+            Dictionary of model name to a dataframe of its ratings, indexed by the name of every player in the training
+            matches.
+
+        Raises:
+            ValueError: No models are registered.
+        """
+        if not self.models:
+            raise ValueError("No models are registered")
+
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year),
+                                       columns=['winner_name', 'loser_name', 'surface', 'tourney_level', 'Year'])
+        player_index = PlayerIndex.from_matches(data_training)
+        matches = EloEngine(self.current_year).match_arrays(data_training, player_index, self.surfaces)
+
+        batches = conflict_free_batches(matches)
+
+        return {name: engine.rate(data_training, matches, player_index, self.surfaces, batches, **parameters)
+                for name, (engine, parameters) in self.models.items()}
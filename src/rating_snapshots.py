@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from date_index import date_key
+
+class RatingSnapshots():
+    """
+    Class holding the ratings of a model at a series of points in one chronological pass, such as the start of every
+    season, so the ratings as of any of those points can be read back without running the matches again. Each snapshot
+    only keeps the rows of the players who played since the previous one, and the full ratings at a snapshot are rebuilt
+    from the initial ratings and the changes up to it.
+    """
+    def __init__(self, player_index, columns, initial, keys, positions):
+        """
+        Initializer for RatingSnapshots class. Use boundaries to work out the keys and positions from match data.
+
+        Args:
+            player_index (PlayerIndex): Player index whose IDs are the rows of the ratings.
+            columns (list): Names of the rating columns, such as Hard_ELO.
+            initial (numpy array): Player by column ratings before the first match.
+            keys (iterable): Date of each snapshot as a yyyymmdd int. A snapshot holds the ratings after every match
+                             dated before its key.
+            positions (iterable): Number of matches applied at each snapshot, increasing, the last being every match.
+        """
+        self.player_index = player_index
+        self.columns = list(columns)
+        self.initial = np.array(initial, dtype=float)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.changes = []
+
+    @staticmethod
+    def boundaries(data, by = 'year'):
+        """
+        Finds where snapshots are taken in chronologically sorted match data: before the first match of every season,
+        or before the first match of every tournament start date, and after the last match.
+
+        Args:
+            data (pandas dataframe): Chronologically sorted match data containing Year, and tourney_date for tournament snapshots.
+            by (str): 'year' for season boundaries or 'tournament' for tournament start dates. Default set to 'year'.
+
+        Returns:
+            Tuple of the snapshot keys and positions as numpy int64 arrays.
+
+        Raises:
+            ValueError: by must be 'year' or 'tournament'.
+            KeyError: Tournament snapshots need a tourney_date column.
+        """
+        if by == 'year':
+            values = data['Year'].to_numpy(dtype=np.int64)
+            keys = values * 10000 + 101
+        elif by == 'tournament':
+            if 'tourney_date' not in data.columns:
+                raise KeyError("Tournament snapshots need a tourney_date column")
+            values = data['tourney_date'].to_numpy(dtype=np.int64)
+            # Keyed the day after the previous tournament start date, so any later date before the next tournament
+            # start finds the snapshot holding every match played before it.
+            keys = np.r_[0, values[:-1] + 1]
+        else:
+            raise ValueError(f"by must be 'year' or 'tournament', not {by}")
+
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        starts = np.flatnonzero(np.r_[False, values[1:] != values[:-1]])
+        # The last snapshot holds every match, keyed the next season or just after the last tournament start date.
+        last_key = (values[-1] + 1) * 10000 + 101 if by == 'year' else values[-1] + 1
+        return np.r_[keys[starts], last_key], np.r_[starts, len(values)]
+
+    def record(self, ids, rows):
+        """
+        Adds the next snapshot.
+
+        Args:
+            ids (numpy array): IDs of the players whose ratings changed since the previous snapshot.
+            rows (numpy array): Ratings of those players, one row per ID.
+        """
+        self.changes.append((np.asarray(ids, dtype=np.int32), np.array(rows, dtype=float).reshape(len(ids), len(self.columns))))
+
+    def __len__(self):
+        """
+        Gets the number of snapshots recorded.
+
+        Returns:
+            Number of snapshots as an int.
+        """
+        return len(self.changes)
+
+    def ratings_at(self, snapshot):
+        """
+        Rebuilds the full ratings at one snapshot.
+
+        Args:
+            snapshot (int): Position of the snapshot, -1 for the initial ratings.
+
+        Returns:
+            Player by column numpy float64 array of ratings.
+        """
+        ratings = self.initial.copy()
+        for ids, rows in self.changes[:snapshot + 1]:
+            ratings[ids] = rows
+        return ratings
+
+    def as_of(self, date):
+        """
+        Gets the ratings at the latest snapshot on or before a date, so for season snapshots the ratings as of
+        2018-06-01 are those at the start of 2018.
+
+        Args:
+            date (int, str, datetime.date or pandas Timestamp): Date of the ratings, such as 20180101 or '2018-01-01'.
+
+        Returns:
+            Dataframe of the ratings with player names as the index and the rating columns.
+        """
+        snapshot = int(np.searchsorted(self.keys[:len(self.changes)], date_key(date), side='right')) - 1
+        return pd.DataFrame(self.ratings_at(snapshot), index=pd.Index(self.player_index.names, dtype=object), columns=self.columns)
@@ -0,0 +1,134 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from player_index import PlayerIndex
+
+class RatingState():
+    """
+    Class holding the rating state of a model between updates: a player by column rating matrix, the players it covers,
+    and a cursor recording how far through the chronologically ordered matches the ratings are. The state is saved as
+    a single npz file, written to a temporary file and renamed so an interrupted save never leaves a partial state.
+    """
+    def __init__(self, names, columns, ratings, parameters, cursor = None):
+        """
+        Initializer for RatingState class.
+
+        Args:
+            names (iterable): Player names, in rating matrix row order.
+            columns (list): Names of the rating matrix columns, such as Hard_ELO.
+            ratings (numpy array): Player by column float64 rating matrix.
+            parameters (dict): Model parameters the ratings were calculated with. Must be json serializable.
+            cursor (None or dict): Tourney date of the last match applied and the number of matches applied on that date.
+                                   Default set to None, no matches applied.
+        """
+        self.player_index = PlayerIndex(names)
+        self.columns = list(columns)
+        self.ratings = np.asarray(ratings, dtype=float)
+        self.parameters = parameters
+        self.cursor = {'date': 0, 'count': 0} if cursor is None else dict(cursor)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a saved state.
+
+        Args:
+            path (str): Path of the npz file.
+
+        Returns:
+            RatingState saved at the path.
+        """
+        with np.load(path, allow_pickle=False) as saved:
+            meta = json.loads(str(saved['meta']))
+            return cls(saved['names'].tolist(), meta['columns'], saved['ratings'], meta['parameters'], meta['cursor'])
+
+    def save(self, path):
+        """
+        Saves the state, replacing any saved state at the path in one step.
+
+        Args:
+            path (str): Path of the npz file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        meta = json.dumps({'columns': self.columns, 'parameters': self.parameters, 'cursor': self.cursor})
+        tmp_path = os.path.join(directory, os.path.basename(path) + '.tmp.npz')
+        np.savez(tmp_path, ratings=self.ratings, names=np.array(self.player_index.names, dtype=str), meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    @property
+    def as_of(self):
+        """
+        Gets the tourney date of the last match applied.
+
+        Returns:
+            Date as a yyyymmdd int, 0 if no matches have been applied.
+        """
+        return self.cursor['date']
+
+    def add_players(self, names, initial_ratings):
+        """
+        Adds rows for players not yet in the state, in the order given.
+
+        Args:
+            names (iterable): Player names, which may include players already in the state.
+            initial_ratings (float or numpy array): Ratings new players start with, one value or one per column.
+        """
+        new_names = [name for name in pd.unique(np.asarray(list(names), dtype=object)) if name not in self.player_index]
+        if not new_names:
+            return
+        new_rows = np.broadcast_to(np.asarray(initial_ratings, dtype=float), (len(new_names), len(self.columns)))
+        self.player_index = PlayerIndex(list(self.player_index.names) + new_names)
+        self.ratings = np.vstack([self.ratings, new_rows])
+
+    def new_matches(self, data):
+        """
+        Selects the matches after the cursor. Matches dated before the cursor date are dropped, and so are as many
+        matches on the cursor date as were already applied, so a tournament still in progress can be updated again.
+
+        Args:
+            data (pandas dataframe): Chronologically sorted match data containing a tourney_date column.
+
+        Returns:
+            Dataframe of the matches not yet applied.
+
+        Raises:
+            KeyError: The data has no tourney_date column.
+        """
+        if 'tourney_date' not in data.columns:
+            raise KeyError("Matches need a tourney_date column to be applied after the rating cursor")
+
+        dates = data['tourney_date'].to_numpy()
+        on_cursor_date = dates == self.cursor['date']
+        keep = (dates > self.cursor['date']) | (on_cursor_date & (np.cumsum(on_cursor_date) > self.cursor['count']))
+        return data if keep.all() else data[keep]
+
+    def advance(self, data):
+        """
+        Moves the cursor past matches that have just been applied.
+
+        Args:
+            data (pandas dataframe): Chronologically sorted matches that were applied, containing a tourney_date column.
+        """
+        if len(data) == 0:
+            return
+        dates = data['tourney_date'].to_numpy()
+        last = int(dates[-1])
+        count = int((dates == last).sum())
+        if last == self.cursor['date']:
+            count += self.cursor['count']
+        self.cursor = {'date': last, 'count': count}
+
+    def to_dataframe(self):
+        """
+        Gets the ratings as a dataframe.
+
+        Returns:
+            Dataframe of the ratings with player names as the index and the rating columns.
+        """
+        return pd.DataFrame(self.ratings.copy(), index=pd.Index(self.player_index.names, dtype=object), columns=self.columns)
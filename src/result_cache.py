@@ -0,0 +1,58 @@
+import json
+import os
+
+class ResultCache():
+    """
+    Class recording which input data and parameters an output file was built from, so the output can be reused instead of
+    recomputed when neither has changed. The record is kept in a small json file next to the output.
+    """
+    def __init__(self, path):
+        """
+        Initializer for ResultCache class.
+
+        Args:
+            path (str): Path of the output file being cached.
+        """
+        self.path = str(path)
+        self.meta_path = self.path + '.meta.json'
+
+    def read(self):
+        """
+        Reads the record of the cached output.
+
+        Returns:
+            Dictionary with the fingerprint and parameters the output was built from, or None if there is no record.
+        """
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def is_current(self, fingerprint, parameters):
+        """
+        Checks whether the output exists and was built from the same data and parameters.
+
+        Args:
+            fingerprint (str): Content fingerprint of the input data.
+            parameters (dict): Parameters the output depends on. Must be json serializable.
+
+        Returns:
+            True if the output can be reused, False otherwise.
+        """
+        record = self.read()
+        return (record is not None and os.path.exists(self.path) and record['fingerprint'] == fingerprint
+                and record['parameters'] == json.loads(json.dumps(parameters)))
+
+    def record(self, fingerprint, parameters):
+        """
+        Records the data and parameters the output was just built from. Written to a temporary file then renamed, so a
+        crash never leaves a half written record.
+
+        Args:
+            fingerprint (str): Content fingerprint of the input data.
+            parameters (dict): Parameters the output depends on. Must be json serializable.
+        """
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'parameters': parameters}, f, indent=1)
+        os.replace(tmp_path, self.meta_path)
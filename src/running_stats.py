@@ -0,0 +1,68 @@
+import numpy as np
+
+class RunningStats():
+    """
+    Class keeping the running mean and spread of arrays added one at a time with Welford's algorithm, so statistics over
+    any number of random runs need only the memory of one run's array.
+    """
+    def __init__(self, shape):
+        """
+        Initializer for RunningStats class.
+
+        Args:
+            shape (tuple): Shape of the arrays added.
+        """
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.squares = np.zeros(shape)
+
+    def add(self, values):
+        """
+        Adds one array, updating the mean and the sum of squared differences from it in place.
+
+        Args:
+            values (numpy array): Array of the accumulator's shape.
+        """
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (values - self.mean)
+
+    def add_all(self, arrays):
+        """
+        Adds arrays stacked along their first axis, one at a time in order.
+
+        Args:
+            arrays (numpy array): Arrays of the accumulator's shape stacked along a new first axis.
+        """
+        for values in arrays:
+            self.add(values)
+
+    def variance(self):
+        """
+        Gets the sample variance of the arrays added.
+
+        Returns:
+            Numpy array of variances, NaN until two arrays are added.
+        """
+        if self.count < 2:
+            return np.full(self.mean.shape, np.nan)
+        return self.squares / (self.count - 1)
+
+    def std(self):
+        """
+        Gets the sample standard deviation of the arrays added.
+
+        Returns:
+            Numpy array of standard deviations, NaN until two arrays are added.
+        """
+        return np.sqrt(self.variance())
+
+    def standard_error(self):
+        """
+        Gets the standard error of the mean, the standard deviation over the square root of the number of arrays added.
+
+        Returns:
+            Numpy array of standard errors, NaN until two arrays are added.
+        """
+        return self.std() / np.sqrt(max(self.count, 1))
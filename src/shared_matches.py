@@ -0,0 +1,213 @@
+import pandas as pd
+import numpy as np
+from multiprocessing import shared_memory
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from player_index import PlayerIndex
+from match_store import select_matches
+
+# Columns published for the workers, with the dtype each one is stored as. Text columns are stored as codes into the
+# categories kept in the descriptor.
+SHARED_COLUMNS = {
+    'winner_id': np.int32,
+    'loser_id': np.int32,
+    'surface': np.int32,
+    'tourney_level': np.int32,
+    'Year': np.int32,
+    'tourney_date': np.int32,
+}
+ENCODED_COLUMNS = ['surface', 'tourney_level']
+
+# Matches attached by attach_worker, for use by the functions a process pool runs.
+_worker_matches = None
+
+def attach_worker(descriptor):
+    """
+    Attaches a pool worker to published matches. Meant to be passed as the initializer of a process pool, with the
+    descriptor as its only initarg, so each worker attaches once rather than receiving the matches with every task.
+
+    Args:
+        descriptor (dict): Descriptor returned by SharedMatches.descriptor.
+    """
+    global _worker_matches
+    _worker_matches = SharedMatches.attach(descriptor)
+
+def worker_matches():
+    """
+    Gets the matches the current pool worker attached to with attach_worker.
+
+    Returns:
+        SharedMatches instance, or None if the worker has not attached.
+    """
+    return _worker_matches
+
+class SharedMatches():
+    """
+    Class publishing the encoded match table (player IDs, surface and level codes, year and date) once into shared
+    memory, so process pool workers can attach to it by name and read the same pages instead of each unpickling its
+    own copy of the match dataframe. The arrays seen by attached workers are read only.
+    """
+    def __init__(self, shm, rows, layout, categories, owner = False):
+        """
+        Initializer for SharedMatches class. Use publish to create the shared table and attach to open it in a worker.
+
+        Args:
+            shm (SharedMemory): Shared memory block holding the columns back to back.
+            rows (int): Number of matches.
+            layout (dict): Dictionary of column to (dtype string, byte offset) in the block.
+            categories (dict): Dictionary of encoded column to the list of values its codes refer to.
+            owner (boolean): Whether this instance created the block and should free it. Default set to False.
+        """
+        self.shm = shm
+        self.rows = rows
+        self.layout = layout
+        self.categories = categories
+        self.owner = owner
+        self.player_index = None
+
+        self.arrays = {}
+        for column, (dtype, offset) in layout.items():
+            array = np.ndarray((rows,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            if not owner:
+                array.flags.writeable = False
+            self.arrays[column] = array
+
+    @classmethod
+    def publish(cls, data, player_index = None):
+        """
+        Encodes match data and copies it into a new shared memory block.
+
+        Args:
+            data (pandas dataframe or MatchStore): Match data with winner and loser names or IDs, surface, tourney_level
+                                                   and Year columns. A tourney_date column is published if present.
+            player_index (None or PlayerIndex): Player index used to encode names. Any winner_id and loser_id columns
+                                                are replaced, as the store's IDs are codes of its whole dictionary rather
+                                                than rows of the index. Default set to None, which uses the winner_id and
+                                                loser_id columns if present, or builds one from the data.
+
+        Returns:
+            SharedMatches instance owning the block, with the player index used (if any) as player_index. Call unlink
+            (or use it as a context manager) once the workers are done.
+        """
+        data = select_matches(data)
+
+        if player_index is not None or 'winner_id' not in data.columns or 'loser_id' not in data.columns:
+            if player_index is None:
+                player_index = PlayerIndex.from_matches(data)
+            data = player_index.encode_matches(data)
+
+        columns = {}
+        categories = {}
+        for column, dtype in SHARED_COLUMNS.items():
+            if column not in data.columns:
+                continue
+            if column in ENCODED_COLUMNS:
+                values = pd.Categorical(data[column])
+                categories[column] = list(values.categories)
+                columns[column] = values.codes.astype(dtype)
+            else:
+                columns[column] = data[column].to_numpy().astype(dtype)
+
+        layout = {}
+        offset = 0
+        for column, array in columns.items():
+            layout[column] = (array.dtype.str, offset)
+            offset += -(-array.nbytes // 8) * 8
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        shared = cls(shm, len(data), layout, categories, owner=True)
+        for column, array in columns.items():
+            shared.arrays[column][:] = array
+            shared.arrays[column].flags.writeable = False
+        shared.player_index = player_index
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """
+        Attaches to a published table without copying it.
+
+        Args:
+            descriptor (dict): Descriptor returned by the descriptor method of the publishing instance.
+
+        Returns:
+            SharedMatches instance whose arrays are read only views of the shared block.
+        """
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+        return cls(shm, descriptor['rows'], descriptor['layout'], descriptor['categories'])
+
+    def descriptor(self):
+        """
+        Gets the small picklable description workers need to attach to the table.
+
+        Returns:
+            Dictionary of the block name, number of rows, column layout and categories.
+        """
+        return {'name': self.shm.name, 'rows': self.rows, 'layout': self.layout, 'categories': self.categories}
+
+    def __len__(self):
+        """
+        Gets the number of matches.
+
+        Returns:
+            Number of matches as an int.
+        """
+        return self.rows
+
+    def __getitem__(self, column):
+        """
+        Gets one column of the table.
+
+        Args:
+            column (str): Name of the column.
+
+        Returns:
+            Read only numpy array of the column.
+        """
+        return self.arrays[column]
+
+    def codes_of(self, column, values):
+        """
+        Gets the codes of values in an encoded column, such as the surface codes of ['Hard', 'Clay'].
+
+        Args:
+            column (str): Encoded column, surface or tourney_level.
+            values (iterable): Values to look up.
+
+        Returns:
+            Numpy int32 array of codes, -1 for values that are not in the table.
+        """
+        return pd.Index(self.categories[column]).get_indexer(list(values)).astype(np.int32)
+
+    def close(self):
+        """
+        Detaches from the shared block. The arrays of this instance must not be used afterwards.
+        """
+        self.arrays = {}
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Detaches from the shared block and frees it, if this instance published it.
+        """
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        """
+        Uses the published table as a context manager, freeing it on exit.
+
+        Returns:
+            This SharedMatches instance.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """
+        Frees the shared block when leaving the context.
+        """
+        self.unlink()
@@ -2,6 +2,13 @@ import pandas as pd
 import numpy as np
 from scipy.stats import norm
 import math
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from player_index import PlayerIndex
+from match_store import select_matches
 
 class InvalidTournamentError(ValueError):
         pass
@@ -27,6 +34,11 @@ class Simulation():
 
         self.rating_df = rating_df
         self.rating_system = rating_system
+
+        # Ratings and ages are looked up by player ID in plain arrays rather than through rating_df.loc for every game.
+        self.player_index = PlayerIndex(rating_df.index)
+        self.rating_arrays = {column: rating_df[column].to_numpy(dtype=float) for column in rating_df.columns
+                              if pd.api.types.is_numeric_dtype(rating_df[column])}
         self.tournament_name = None
         self.S = S
         self.head_to_head = hth
@@ -71,10 +83,12 @@ class Simulation():
             Winning probability of player 1 as a float through the logistic function.
         """
         # Get the SkillO mean and variance for both players
-        ts_mean_1 = self.rating_df.loc[player_1][f'{surface}_mean']
-        ts_mean_2 = self.rating_df.loc[player_2][f'{surface}_mean']
-        ts_variance_1 = self.rating_df.loc[player_1][f'{surface}_variance']
-        ts_variance_2 = self.rating_df.loc[player_2][f'{surface}_variance']
+        player_1_id = self.player_index.id_of(player_1)
+        player_2_id = self.player_index.id_of(player_2)
+        ts_mean_1 = self.rating_arrays[f'{surface}_mean'][player_1_id]
+        ts_mean_2 = self.rating_arrays[f'{surface}_mean'][player_2_id]
+        ts_variance_1 = self.rating_arrays[f'{surface}_variance'][player_1_id]
+        ts_variance_2 = self.rating_arrays[f'{surface}_variance'][player_2_id]
 
         # Calculate the skill difference and uncertainty
         skill_diff = ts_mean_1 - ts_mean_2
@@ -164,8 +178,8 @@ class Simulation():
         set_winner = []
 
         if self.rating_system == 'ELO':
-            player_1_elo = self.rating_df.loc[player_1][f'{surface}_ELO']
-            player_2_elo = self.rating_df.loc[player_2][f'{surface}_ELO']
+            player_1_elo = self.rating_arrays[f'{surface}_ELO'][self.player_index.id_of(player_1)]
+            player_2_elo = self.rating_arrays[f'{surface}_ELO'][self.player_index.id_of(player_2)]
             winning_prob_1 = self.compute_prob_using_ELO(player_1_elo, player_2_elo)
         elif self.rating_system == 'skillO':
             winning_prob_1 = self.compute_prob_using_skillo(player_1, player_2, surface)
@@ -251,7 +265,8 @@ class Simulation():
         Finds the initial draw of a tournament for grand slams in the tennis dataset.
 
         Args:
-            data (pandas dataframe): Dataframe of scraped tennis data with tennis match history.
+            data (pandas dataframe or MatchStore): Dataframe or match store of scraped tennis data with tennis match history.
+                                                   Only the tournament's rows are read from a MatchStore.
             year (int): The year the match was played in,
             tournament (str): Name of the tournament.
 
@@ -267,7 +282,7 @@ class Simulation():
         if tournament not in grand_slams:
             raise InvalidTournamentError(f'Invalid tournament, must be a Grand Slam: One of ', {grand_slams})
 
-        tournament_results = data[(data['Year'] == year) & (data['tourney_name'] == tournament)]
+        tournament_results = select_matches(data, years=[year], tournaments=[tournament], columns=['winner_name', 'loser_name'])
 
         if len(tournament_results) != 127:
             raise InvalidTournamentError(f'Incomplete Tournament results in data')
@@ -313,18 +328,18 @@ class Simulation():
         for _, matchup in matchups.iterrows():
             if self.rating_system == 'ELO':
                 player_1 = matchup.iloc[0]
-                player_1_age = self.rating_df.loc[player_1]['Player_age']
+                player_1_age = self.rating_arrays['Player_age'][self.player_index.id_of(player_1)]
 
                 player_2 = matchup.iloc[1]
-                player_2_age = self.rating_df.loc[player_2]['Player_age']
+                player_2_age = self.rating_arrays['Player_age'][self.player_index.id_of(player_2)]
                 winner = self.simulating_game(player_1, player_1_age, player_2, player_2_age, num_sets, surface)
 
             elif self.rating_system == 'skillO':
                 player_1 = matchup.iloc[0]
-                player_1_age = self.rating_df.loc[player_1]['Player_age']
+                player_1_age = self.rating_arrays['Player_age'][self.player_index.id_of(player_1)]
 
                 player_2 = matchup.iloc[1]
-                player_2_age = self.rating_df.loc[player_2]['Player_age']
+                player_2_age = self.rating_arrays['Player_age'][self.player_index.id_of(player_2)]
 
                 winner = self.simulating_game(player_1, player_1_age, player_2, player_2_age, num_sets, surface)
             if winner == player_1:
@@ -414,7 +429,7 @@ class Simulation():
         saves the results to a final csv used for visualization and validation.
 
         Args:
-            tennis_data (pandas dataframe): Dataframe of tennis data for given years.
+            tennis_data (pandas dataframe or MatchStore): Dataframe or match store of tennis data for given years.
             year (int): Year of tournament user wants to simulate.
             tournament_name (str): The name of the tournament the user wants to simulate.
             nsims (int): Number of tournament simulations.
@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import math
 import sys
 import os
@@ -7,13 +9,21 @@ import os
 # Add the src directory to the Python path so imports work during tests
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 from elo_calculations import ELO
+from match_store import MatchStore, select_matches, fingerprint, FIRST_YEAR
+from result_cache import ResultCache
+from player_index import PlayerIndex
+from rating_snapshots import RatingSnapshots
+from rating_history import RatingHistory
+from elo_engine import EloEngine, UPDATE_SURFACES, coupling_entries
+from skillo_engine import SkillOEngine
+from running_stats import RunningStats
 
 class skillO:
     """
     SkillO class to calculate player skill and uncertainty updates for tennis matches.
     """
 
-    def __init__(self, initial_mean, initial_variance, current_year, beta = 2, year_decay = 0.7, gamma = 0.1):
+    def __init__(self, initial_mean, initial_variance, current_year, beta = 2, year_decay = 0.7, gamma = 0.1, coupling = None):
         """
         Initializer for skillO class
 
@@ -24,6 +34,10 @@ class skillO:
             beta (float): Beta scaling parameter used in SkillO calculations. Default set to 2.
             year_decay (float): Year decay factor determining how much past years are weighted. Default set to 0.7
             gamma (float): Weight factor to determine how much players SkillO ratings change after a given match. Default set to 0.1.
+            coupling (None or dict): Dictionary of (match surface, rated surface) to the share of a rating change
+                                     applied by the SkillOEngine runs, such as one fit by the Tuner. Surfaces not listed
+                                     keep the default of 0.8 on the other surfaces. skillO_calculation always uses the
+                                     default. Default set to None.
         """
         self.initial_mean = float(initial_mean)
         self.initial_variance = float(initial_variance)
@@ -32,6 +46,11 @@ class skillO:
         self.beta = beta
         self.year_decay = year_decay
         self.gamma = gamma
+        self.coupling = coupling
+        self.history = None
+        self.standard_error = None
+        self.dispersion = None
+        self.runs = None
 
         # Initializes mock ELO class to import functions over so we don't have to repeat many functions.
         self.elo_instance = ELO(1500, current_year)
@@ -76,26 +95,50 @@ class skillO:
         uncertainty = np.sqrt(variance_1 + variance_2 + self.beta**2)
         return 1 / (1 + np.exp(-skill_diff / uncertainty))
 
+    def expected_matrix(self, player_ids, surface):
+        """
+        Calculates the expected outcome of every pair of players at once from the current SkillO ratings: entry (i, j)
+        is the probability that player i beats player j on the surface, as given by expected_game_score.
+
+        Args:
+            player_ids (iterable): Player IDs (rows of the skill dataframe) or player names.
+            surface (str): Surface of the matches, such as Grass.
+
+        Returns:
+            N by N numpy array of win probabilities.
+
+        Raises:
+            ValueError: No SkillO ratings have been calculated.
+        """
+        if self.skill_dataframe is None:
+            raise ValueError("No SkillO ratings have been calculated")
+
+        rows = self.elo_instance.player_positions(self.skill_dataframe, player_ids)
+        means = self.skill_dataframe[f"{surface}_mean"].to_numpy(dtype=float)[rows]
+        variances = self.skill_dataframe[f"{surface}_variance"].to_numpy(dtype=float)[rows]
+        return self.expected_game_score(means[:, None], means[None, :], variances[:, None], variances[None, :])
+
     def skillO_calculation(self, data, SkillO_df, gamma = 0.1):
         """
         Calculates SkillO for each player based on match history.
 
         Args:
-            data (pandas dataFrame): Match data containing winner, loser, surface, and year of match.
+            data (pandas dataFrame or MatchStore): Match data containing winner, loser, surface, and year of match.
+                                                   A MatchStore is read for the training years only.
             SkillO_df (pandas dataFrame): Dataframe of SkillO ratings.
             gamma (float): SkillO adjustment factor. Default set to 0.1
 
         Returns:
             Updated player skill dataframe after all matches.
         """
-        if not isinstance(data, pd.DataFrame):
+        if not isinstance(data, (pd.DataFrame, MatchStore)):
             raise TypeError(f"data must be a pandas dataframe, it is type {type(data)}")
 
         surfaces = ['Hard', 'Clay', 'Grass']
 
         # Train skillO scores based off all past data besides current year.
-        data_training = data[data['Year'] < self.current_year]
-        
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year))
+
         for _, row in data_training.iterrows():
             winner = row['winner_name']
             loser = row['loser_name']
@@ -164,56 +207,338 @@ class skillO:
                         SkillO_df.loc[loser, f"{s}_variance"] = SkillO_df.loc[loser, f"{s}_variance"] * (1 + gamma * 0.8 * (1 - p_loser))  # Unexpected loss, increase variance
 
             gamma = self.gamma
+
         return SkillO_df
 
-    def simulate_multiple_runs(self, data, num_simulations, surfaces, names):
+    def rating_snapshots(self, data, by = 'year'):
+        """
+        Runs the SkillO calculation once over the training matches on a SkillOEngine, keeping snapshots of the means
+        and variances at the start of every season (or every tournament start date), so the ratings as of any of them
+        can be read without running again. The step sizes are drawn from np.random as skillO_calculation draws them, and
+        the surface coupling of this class is applied. The year decay is relative to the current year of this class
+        throughout.
+
+        Args:
+            data (pandas dataFrame or MatchStore): Chronologically sorted match history. A MatchStore is read for the training years only.
+            by (str): 'year' for season snapshots or 'tournament' for tournament start date snapshots. Default set to 'year'.
+
+        Returns:
+            RatingSnapshots of the Hard, Clay and Grass means, then variances, of every player in the training matches.
+
+        Raises:
+            KeyError: Tournament snapshots need a tourney_date column.
         """
-        Run the skillO calculation multiple times and take the average mean and variance for each player.
+        columns = ['winner_name', 'loser_name', 'surface', 'tourney_level', 'Year']
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year),
+                                       columns=columns + ['tourney_date'] if by == 'tournament' else columns)
+
+        engine, player_index, matches = self.drawn_matches(data_training)
+
+        means = np.full((len(player_index), len(UPDATE_SURFACES)), self.initial_mean)
+        variances = np.full((len(player_index), len(UPDATE_SURFACES)), self.initial_variance)
+        snapshots = RatingSnapshots(player_index, [f"{s}_mean" for s in UPDATE_SURFACES] + [f"{s}_variance" for s in UPDATE_SURFACES],
+                                    np.hstack([means, variances]), *RatingSnapshots.boundaries(data_training, by))
+        engine.run(means, variances, matches, UPDATE_SURFACES, snapshots=snapshots)
+        return snapshots
+
+    def rating_history(self, data):
+        """
+        Runs the SkillO calculation once over the training matches on a SkillOEngine, recording every player's mean on
+        the match surface before and after each match in the history attribute. The step sizes are drawn from np.random
+        as skillO_calculation draws them, and the surface coupling of this class is applied.
 
         Args:
-            data (pandas dataFrame): Match data containing winner, loser, surface, and year of match.
-            num_simulations (int): Number of times to run the simulation.
+            data (pandas dataFrame or MatchStore): Match data containing winner, loser, surface, and year of match, and
+                                                   optionally tourney_date. A MatchStore is read for the training years only.
+
+        Returns:
+            RatingHistory of the Hard, Clay and Grass means of every player in the training matches.
+        """
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year))
+        engine, player_index, matches = self.drawn_matches(data_training)
+
+        self.history = RatingHistory(player_index, [f"{s}_mean" for s in UPDATE_SURFACES])
+        engine.run(np.full((len(player_index), len(UPDATE_SURFACES)), self.initial_mean),
+                   np.full((len(player_index), len(UPDATE_SURFACES)), self.initial_variance), matches, UPDATE_SURFACES, history=self.history)
+        return self.history
+
+    def drawn_matches(self, data_training):
+        """
+        Sets up a SkillOEngine with this class's parameters and the match arrays of one run over the players of the
+        training matches, with the step sizes drawn from np.random in the order skillO_calculation draws them.
+
+        Args:
+            data_training (pandas dataFrame): Training matches containing winner, loser, surface, tourney level and year.
+
+        Returns:
+            Tuple of the engine, the PlayerIndex of the players and the match arrays with each match's gamma and scale.
+        """
+        player_index = PlayerIndex.from_matches(data_training)
+        engine = SkillOEngine(self.current_year, beta=self.beta, year_decay=self.year_decay, gamma=self.gamma, coupling=self.coupling)
+        matches = EloEngine(self.current_year).match_arrays(data_training, player_index, UPDATE_SURFACES)
+        matches['gamma'] = engine.gamma_factors(data_training)
+        matches['scale'] = engine.draw_scales(matches['gamma'])
+        return engine, player_index, matches
+
+    def simulate_multiple_runs(self, data, num_simulations, surfaces, names, seed = None, workers = 1, tolerance = None,
+                               players = None, batch_size = 30):
+        """
+        Run the skillO calculation multiple times and take the average mean and variance for each player. The runs are
+        calculated batch_size at a time by a SkillOEngine over run by player by surface arrays, so every match updates
+        all the runs of a batch at once with its own random step size in each. After each batch, every run is added to
+        running averages with Welford's algorithm, so memory does not grow with the number of runs. The standard
+        deviation of each rating across the runs is kept as dispersion, the largest standard error of the averaged means
+        of the players of interest as standard_error and the number of runs made as runs.
+
+        Without a seed and on one worker, the step sizes are drawn from np.random a run at a time, in the order running
+        skillO_calculation once per run draws them. Given a seed or several workers, every run draws from its own
+        random stream spawned from a numpy SeedSequence of the seed, and each batch is split into contiguous parts
+        calculated on a process pool. A run only depends on its own stream and the runs are added in order, so the same
+        seed gives identical averages for any number of workers.
+
+        Given a tolerance, batches stop once the largest standard error of the averaged means of the players of
+        interest is within the tolerance, or num_simulations runs are done. The error is checked after each batch, so
+        up to batch_size - 1 more runs than needed can be made; a smaller batch_size stops closer to the tolerance at
+        the cost of more passes over the matches.
+
+        Args:
+            data (pandas dataFrame or MatchStore): Match data containing winner, loser, surface, and year of match.
+            num_simulations (int): Number of times to run the simulation, the most runs when a tolerance is given.
             surfaces (list): List of surfaces (Hard, Clay, Grass)
             names (list): List of player names.
+            seed (None or int): Seed of the runs' random streams. Default set to None, fresh entropy when the runs
+                                are split over several workers and np.random otherwise.
+            workers (int): Number of processes the runs are split over. Default set to 1, calculated in this process.
+            tolerance (None or float): Largest standard error of the averaged means to stop at. Default set to None,
+                                       which makes exactly num_simulations runs.
+            players (None or list): Names of the players whose standard errors are checked against the tolerance and
+                                    kept as standard_error. Default set to None, every player.
+            batch_size (int): Number of runs calculated together. Each batch is one pass over the matches, so larger
+                              batches make fewer passes and use more memory. Default set to 30.
 
         Returns:
             Dataframe with average mean and variance across all simulations for skillo.
+
+        Raises:
+            TypeError: workers and batch_size must be ints.
+            ValueError: workers and batch_size must be at least 1.
         """
-        # Initialize a list to store the skill results after each simulation.
-        all_means = []
-        all_variances = []
-        
-        for _ in range(num_simulations):
-            # Reset the initial skill dataframe for each simulation to the initial skill level.
-            skill_df = self.initial_skills(surfaces, names)
-            
-            updated_df = self.skillO_calculation(data, skill_df, gamma = self.gamma)
-            
-            # Store the means and variances from the current simulation.
-            all_means.append(updated_df[[f"{s}_mean" for s in surfaces]])
-            all_variances.append(updated_df[[f"{s}_variance" for s in surfaces]])
-        
-        # Calculate the average mean and variance for each player across all simulations.
-        mean_df = pd.concat(all_means, axis=0)
-        mean_df = mean_df.groupby(mean_df.index).mean()
-        variance_df = pd.concat(all_variances, axis=0)
-        variance_df = variance_df.groupby(variance_df.index).mean()
-        final_df = pd.concat([mean_df, variance_df], axis=1)
-        final_df.columns = [f"{s}_mean" for s in surfaces] + [f"{s}_variance" for s in surfaces]
-        
-        return final_df
+        if not isinstance(workers, int):
+            raise TypeError(f"workers must be an int, it is type {type(workers)}")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, it is {workers}")
+        if not isinstance(batch_size, int):
+            raise TypeError(f"batch_size must be an int, it is type {type(batch_size)}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, it is {batch_size}")
+
+        surfaces = list(surfaces)
+        engine, player_index, matches = self.engine_matches(data, surfaces, names)
+        seed_sequence = None if seed is None and workers == 1 else np.random.SeedSequence(seed)
+        rows = np.arange(len(player_index)) if players is None else player_index.ids(players)
+        mean_stats = RunningStats((len(player_index), len(surfaces)))
+        variance_stats = RunningStats((len(player_index), len(surfaces)))
+
+        with (ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()) as executor:
+            while mean_stats.count < num_simulations:
+                count = min(batch_size, num_simulations - mean_stats.count)
+                means, variances = self.calculate_runs(engine, player_index, matches, surfaces, count, seed_sequence, executor, workers)
+                mean_stats.add_all(means)
+                variance_stats.add_all(variances)
+                del means, variances
+
+                if tolerance is not None and mean_stats.count >= 2 and self.largest_error(mean_stats, rows) <= tolerance:
+                    break
+
+        columns = [f"{s}_mean" for s in surfaces] + [f"{s}_variance" for s in surfaces]
+        index = pd.Index(list(player_index.names))
+        self.dispersion = pd.DataFrame(np.hstack([mean_stats.std(), variance_stats.std()]), index=index, columns=columns).sort_index()
+        self.standard_error = self.largest_error(mean_stats, rows) if mean_stats.count >= 2 else None
+        self.runs = mean_stats.count
+        final_df = pd.DataFrame(np.hstack([mean_stats.mean, variance_stats.mean]), index=index, columns=columns)
+        return final_df.sort_index()
+
+    def largest_error(self, mean_stats, rows):
+        """
+        Gets the largest standard error of the averaged means of some players.
 
-    def final_csv(self, tennis_data, file_path='../data/skillo.csv'):
+        Args:
+            mean_stats (RunningStats): Running averages of the means of at least two runs.
+            rows (numpy array): Player IDs of the players.
+
+        Returns:
+            The largest standard error as a float, 0 without players.
+        """
+        return float(mean_stats.standard_error()[rows].max()) if len(rows) else 0.0
+
+    def calculate_runs(self, engine, player_index, matches, surfaces, count, seed_sequence = None, executor = None, workers = 1):
+        """
+        Calculates a batch of runs of the skillO calculation.
+
+        Args:
+            engine (SkillOEngine): Engine with this class's parameters.
+            player_index (PlayerIndex): Player index whose IDs are the rows of the matrices.
+            matches (dict): Match arrays with each match's gamma, from engine_matches.
+            surfaces (list): Surfaces of the matrix columns, in order.
+            count (int): Number of runs.
+            seed_sequence (None or numpy SeedSequence): Sequence the next count runs' streams are spawned from. Default
+                                                        set to None, which draws from np.random.
+            executor (None or ProcessPoolExecutor): Pool the runs are split over. Default set to None, in this process.
+            workers (int): Number of batches the runs are split into on the pool. Default set to 1.
+
+        Returns:
+            Tuple of the run by player by surface arrays of means and variances.
+        """
+        if seed_sequence is None:
+            scales = np.column_stack([engine.draw_scales(matches['gamma']) for _ in range(count)])
+            means = np.full((count, len(player_index), len(surfaces)), self.initial_mean)
+            variances = np.full((count, len(player_index), len(surfaces)), self.initial_variance)
+            return engine.run(means, variances, dict(matches, scale=scales), surfaces)
+
+        seeds = seed_sequence.spawn(count)
+        splits = 1 if executor is None else min(workers, count)
+        batches = [list(batch) for batch in np.array_split(np.arange(count), splits) if len(batch)]
+        arguments = [(matches, surfaces, len(player_index), [seeds[run] for run in batch], self.initial_mean, self.initial_variance)
+                     for batch in batches]
+        if len(batches) > 1:
+            futures = [executor.submit(engine.seeded_runs, *batch_arguments) for batch_arguments in arguments]
+            results = [future.result() for future in futures]
+        else:
+            results = [engine.seeded_runs(*batch_arguments) for batch_arguments in arguments]
+        return np.concatenate([means for means, _ in results]), np.concatenate([variances for _, variances in results])
+
+    def engine_matches(self, data, surfaces, names):
         """
-        Creates the final csv for the skillo player ratings.
+        Sets up a SkillOEngine with this class's parameters and the match arrays of the training matches.
 
         Args:
-            tennis_data (pandas dataframe): The dataframe containing all tennis match data.
+            data (pandas dataFrame or MatchStore): Match data containing winner, loser, surface, and year of match.
+            surfaces (list): List of surfaces (Hard, Clay, Grass)
+            names (list): List of player names.
+
+        Returns:
+            Tuple of the engine, the PlayerIndex of the names and the match arrays with each match's gamma.
+        """
+        data_training = select_matches(data, years=range(FIRST_YEAR, self.current_year),
+                                       columns=['winner_name', 'loser_name', 'surface', 'tourney_level', 'Year'])
+        player_index = PlayerIndex(names)
+        engine = SkillOEngine(self.current_year, beta=self.beta, year_decay=self.year_decay, gamma=self.gamma, coupling=self.coupling)
+        matches = EloEngine(self.current_year).match_arrays(data_training, player_index, list(surfaces))
+        matches['gamma'] = engine.gamma_factors(data_training)
+        return engine, player_index, matches
+
+    def expected_run(self, data, surfaces, names):
+        """
+        Runs the skillO calculation once without randomness: every match moves the ratings by the expected size of its
+        random step, the mean of the half-normal distribution the step is drawn from, gamma times the square root of
+        2 over pi. The ratings are close to the average of many random runs in a single pass, but not equal to it, as
+        the updates are not linear in the step size.
+
+        Args:
+            data (pandas dataFrame or MatchStore): Match data containing winner, loser, surface, and year of match.
+            surfaces (list): List of surfaces (Hard, Clay, Grass)
+            names (list): List of player names.
+
+        Returns:
+            Dataframe with the mean and variance of each player, in the layout of simulate_multiple_runs.
+        """
+        surfaces = list(surfaces)
+        engine, player_index, matches = self.engine_matches(data, surfaces, names)
+        matches['scale'] = engine.expected_scales(matches['gamma'])
+        means = np.full((len(player_index), len(surfaces)), self.initial_mean)
+        variances = np.full((len(player_index), len(surfaces)), self.initial_variance)
+        engine.run(means, variances, matches, surfaces)
+
+        final_df = pd.DataFrame(np.hstack([means, variances]), index=pd.Index(list(player_index.names)),
+                                columns=[f"{s}_mean" for s in surfaces] + [f"{s}_variance" for s in surfaces])
+        return final_df.sort_index()
+
+    def expected_distance(self, data, surfaces, names, num_simulations = 30, seed = None):
+        """
+        Measures how far the ratings of expected_run land from the average of random runs.
+
+        Args:
+            data (pandas dataFrame or MatchStore): Match data containing winner, loser, surface, and year of match.
+            surfaces (list): List of surfaces (Hard, Clay, Grass)
+            names (list): List of player names.
+            num_simulations (int): Number of random runs averaged. Default set to 30, as for final_csv.
+            seed (None or int): Seed of the runs' random streams. Default set to None.
+
+        Returns:
+            Dataframe indexed by rating column, with the mean and largest absolute difference over the players.
+        """
+        expected = self.expected_run(data, surfaces, names)
+        averaged = self.simulate_multiple_runs(data, num_simulations, surfaces, names, seed=seed)
+        difference = (expected - averaged).abs()
+        return pd.DataFrame({'mean_difference': difference.mean(), 'max_difference': difference.max()})
+
+    def cache_parameters(self, num_simulations, seed = None, expected = False, tolerance = None):
+        """
+        Gets the parameters the final SkillO ratings depend on, recorded with the csv so a change to any of them is noticed.
+
+        Args:
+            num_simulations (int): Number of runs averaged, the most runs when a tolerance is given.
+            seed (None or int): Seed of the runs' random streams. Default set to None, which is not recorded.
+            expected (boolean): The ratings come from expected_run. Default set to False, which is not recorded.
+            tolerance (None or float): Standard error the runs stop at. Default set to None, which is not recorded.
+
+        Returns:
+            Dictionary of parameter name to value.
+        """
+        return {'model': 'skillO', 'initial_mean': self.initial_mean, 'initial_variance': self.initial_variance,
+                'current_year': self.current_year, 'beta': self.beta, 'year_decay': self.year_decay, 'gamma': self.gamma,
+                'num_simulations': num_simulations, **({} if seed is None else {'seed': seed}),
+                **({'expected': True} if expected else {}), **({} if tolerance is None else {'tolerance': tolerance}),
+                **({} if self.coupling is None else {'coupling': coupling_entries(self.coupling)})}
+
+    def final_csv(self, tennis_data, file_path='../data/skillo.csv', use_cache = True, seed = None, workers = 1, expected = False,
+                  num_simulations = 30, tolerance = None):
+        """
+        Creates the final csv for the skillo player ratings. If the csv was already built from the same match data and
+        parameters, it is read back instead of running the simulations again. When the simulations are run, the
+        standard deviation of each rating across the runs is kept as dispersion, the largest standard error of the
+        averaged means as standard_error and the number of runs as runs. They are not saved with the csv, so they are
+        None when it is read back or the expected run is used.
+
+        Args:
+            tennis_data (pandas dataframe or MatchStore): The dataframe or match store containing all tennis match data.
             file_path (str): Path of the file to save, default ../data/skillo.csv.
+            use_cache (boolean): Reuse the csv if its data fingerprint and parameters match. Default set to True.
+            seed (None or int): Seed of the runs' random streams, see simulate_multiple_runs. Default set to None.
+            workers (int): Number of processes the runs are split over. Default set to 1.
+            expected (boolean): Use the single deterministic pass of expected_run instead of averaging random runs.
+                                Default set to False.
+            num_simulations (int): Number of random runs averaged, the most runs when a tolerance is given. Default set to 30.
+            tolerance (None or float): Stop the runs once the largest standard error of the averaged means is within
+                                       it, see simulate_multiple_runs. Default set to None, which makes num_simulations
+                                       runs.
+
+        Returns:
+            Dataframe of the SkillO means, variances and age of each player.
         """
+        num_simulations = 1 if expected else num_simulations
+        self.standard_error = None
+        self.dispersion = None
+        self.runs = None
+        cache = ResultCache(file_path)
+        data_fingerprint = fingerprint(tennis_data)
+        if use_cache and cache.is_current(data_fingerprint, self.cache_parameters(num_simulations, seed, expected, tolerance)):
+            self.skill_dataframe = pd.read_csv(file_path, index_col='Player_Name')
+            return self.skill_dataframe
+
+        # Ages are shared with the ELO csv through the age cache, looked up by the store fingerprint for a store.
+        ages = self.elo_instance.get_most_recent_age(tennis_data)
+        tennis_data = select_matches(tennis_data)
         names = self.elo_instance.get_names(tennis_data)
         surfaces = tennis_data['surface'].unique()[0:3]
-        updated_df = self.simulate_multiple_runs(tennis_data, 30, surfaces, list(names))
-        updated_df['Player_age'] = self.elo_instance.get_most_recent_age(tennis_data)
+        if expected:
+            updated_df = self.expected_run(tennis_data, surfaces, list(names))
+        else:
+            updated_df = self.simulate_multiple_runs(tennis_data, num_simulations, surfaces, list(names), seed=seed, workers=workers,
+                                                     tolerance=tolerance)
+        updated_df['Player_age'] = ages
 
-        updated_df.to_csv(file_path, index_label='Player_Name', index=True)
\ No newline at end of file
+        updated_df.to_csv(file_path, index_label='Player_Name', index=True)
+        cache.record(data_fingerprint, self.cache_parameters(num_simulations, seed, expected, tolerance))
+        self.skill_dataframe = updated_df
+        return updated_df
@@ -0,0 +1,271 @@
+import pandas as pd
+import numpy as np
+import math
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from elo_engine import LEVEL_MULTIPLIERS, UPDATE_SURFACES, conflict_free_batches, coupling_matrix
+
+class SkillOEngine():
+    """
+    Class running the SkillO rating updates over numpy arrays instead of a dataframe, in the way EloEngine runs the ELO
+    updates. Means and variances are player by surface matrices indexed by player ID, and each match's gamma (base
+    gamma times the tourney level multiplier times the year decay) and random step size are worked out for every match
+    at once before the sequential updates are applied.
+    """
+    def __init__(self, current_year, beta = 2, year_decay = 0.7, gamma = 0.1, cross_surface = 0.8, level_multipliers = None,
+                 coupling = None):
+        """
+        Initializer for SkillOEngine class.
+
+        Args:
+            current_year (int): The current year that data was obtained from, used for the year decay.
+            beta (float): Beta scaling parameter of the expected game score. Default set to 2.
+            year_decay (float): Rate of decay for the year difference. Default set to 0.7.
+            gamma (float): Weight factor of the rating changes after a match. Default set to 0.1.
+            cross_surface (float): Share of a rating change applied to the other surfaces. Default set to 0.8.
+            level_multipliers (None or dict): Dictionary of tourney level to gamma multiplier, levels not listed are left
+                                              unscaled. Default set to None, which uses LEVEL_MULTIPLIERS.
+            coupling (None or dict): Dictionary of (match surface, rated surface) to the share of the gamma and step
+                                     size applied, see coupling_matrix. Default set to None, the cross surface share.
+        """
+        self.current_year = current_year
+        self.beta = beta
+        self.year_decay = year_decay
+        self.gamma = gamma
+        self.cross_surface = cross_surface
+        self.level_multipliers = LEVEL_MULTIPLIERS if level_multipliers is None else level_multipliers
+        self.coupling = coupling
+
+    def coupling_matrix(self, surfaces):
+        """
+        Gets the surface coupling matrix of this engine for the rating columns.
+
+        Args:
+            surfaces (list): Surfaces of the matrix columns, in order.
+
+        Returns:
+            Numpy float64 surfaces by surfaces matrix, see coupling_matrix.
+        """
+        return coupling_matrix(surfaces, self.cross_surface, self.coupling)
+
+    def gamma_factors(self, data, gamma = None):
+        """
+        Calculates the gamma of every match: the base gamma scaled by the tourney level multiplier and the year decay.
+
+        Args:
+            data (pandas dataframe): Match data containing tourney_level and Year columns.
+            gamma (None or float): Base gamma of the first match. Default set to None, the engine's gamma.
+
+        Returns:
+            Numpy float64 array of gammas, one per match.
+        """
+        # Like the K factor of the ELO calculation, the gamma passed in is only used for the first match and the
+        # engine's gamma for the rest.
+        base = np.full(len(data), float(self.gamma))
+        if len(data) > 0 and gamma is not None:
+            base[0] = gamma
+
+        level_codes, levels = pd.factorize(data['tourney_level'])
+        multipliers = np.array([self.level_multipliers.get(level, 1) for level in levels] + [1], dtype=float)[level_codes]
+
+        year_codes, years = pd.factorize(data['Year'])
+        decays = np.array([math.exp(-self.year_decay * abs(self.current_year - int(year))) for year in years] + [1.0])[year_codes]
+
+        return base * multipliers * decays
+
+    def draw_scales(self, gammas, rng = None):
+        """
+        Draws the random step size of every match, the absolute value of a normal draw with the match gamma as its
+        standard deviation.
+
+        Args:
+            gammas (numpy array): Gamma of each match, from gamma_factors.
+            rng (None or numpy Generator): Random number generator. Default set to None, which draws from np.random in
+                                           the same order as skillO_calculation.
+
+        Returns:
+            Numpy float64 array of step sizes, one per match.
+        """
+        if rng is None:
+            return np.abs(np.random.normal(0, gammas))
+        return np.abs(rng.normal(0, gammas))
+
+    def expected_scales(self, gammas):
+        """
+        Gets the expected step size of every match, the mean of the half-normal distribution draw_scales draws from,
+        gamma times the square root of 2 over pi.
+
+        Args:
+            gammas (numpy array): Gamma of each match, from gamma_factors.
+
+        Returns:
+            Numpy float64 array of step sizes, one per match.
+        """
+        return gammas * math.sqrt(2 / math.pi)
+
+    def run(self, means, variances, matches, surfaces, batches = None, snapshots = None, history = None):
+        """
+        Applies the SkillO updates of every match in order. The arithmetic follows skillO_calculation, so given the
+        same random step sizes and the default coupling the results are identical to it. The matches are applied a
+        batch at a time: the rating rows of a batch's players in every run are gathered, updated on every surface at
+        once by the match's row of the coupling matrix, and scattered back. No player plays twice in a batch, so this
+        gives the same results as batches of one match, applying the matches one at a time. Batches are also split at
+        every snapshot position, which does not change the results.
+
+        Args:
+            means (numpy array): Player by surface float64 matrix of skill means, or a run by player by surface array,
+                                 updated in place.
+            variances (numpy array): Skill variances in the same layout as the means, updated in place.
+            matches (dict): Match arrays from EloEngine.match_arrays, with a gamma array from gamma_factors and a scale
+                            array from draw_scales, or a match by run array of step sizes for several runs.
+            surfaces (list): Surfaces of the matrix columns, in order.
+            batches (None or numpy array): Batch boundaries from conflict_free_batches. Default set to None, which
+                                           works them out.
+            snapshots (None or RatingSnapshots): Snapshots to record at their positions in the matches, with the means
+                                                 and then the variances of the players who played since the previous
+                                                 one, averaged over the runs. Default set to None.
+            history (None or RatingHistory): History to record every player's mean on the match surface before and
+                                             after each match in, averaged over the runs. Default set to None.
+
+        Returns:
+            Tuple of the updated means and variances.
+
+        Raises:
+            KeyError: One of the update surfaces is not a rating column.
+        """
+        missing = [surface for surface in UPDATE_SURFACES if surface not in surfaces]
+        if missing:
+            raise KeyError(f"Surfaces {missing} have no rating column")
+        if batches is None:
+            batches = conflict_free_batches(matches)
+        if snapshots is not None:
+            batches = np.union1d(batches, snapshots.positions)
+
+        # Gamma of each match on every surface, its share of the match gamma in the coupling matrix. A share of 0
+        # leaves a rating unchanged, as it adds 0 to the mean and multiplies the variance by 1.
+        coupling = self.coupling_matrix(surfaces)[matches['surface']]
+        gammas = matches['gamma'][:, None] * coupling
+        scales = matches['scale'].reshape(len(gammas), -1)
+        runs = scales.shape[1]
+        # Ratings are held player by surface by run, so a player's ratings on every surface in every run are gathered
+        # and scattered as one row.
+        run_means = np.ascontiguousarray(means.reshape(runs, -1, len(surfaces)).transpose(1, 2, 0))
+        run_variances = np.ascontiguousarray(variances.reshape(runs, -1, len(surfaces)).transpose(1, 2, 0))
+        beta_squared = self.beta**2
+        # With a history, the means on the match surface before and after the matches of each batch are kept.
+        recorded = []
+
+        for start, stop in zip(batches[:-1].tolist(), batches[1:].tolist()):
+            winners = matches['winner'][start:stop]
+            losers = matches['loser'][start:stop]
+            columns = matches['surface'][start:stop]
+            matched = np.arange(stop - start)
+            winner_means = run_means[winners]
+            loser_means = run_means[losers]
+            winner_variances = run_variances[winners]
+            loser_variances = run_variances[losers]
+
+            winner_mean = winner_means[matched, columns]
+            loser_mean = loser_means[matched, columns]
+            winner_variance = winner_variances[matched, columns]
+            loser_variance = loser_variances[matched, columns]
+            p_winner = 1 / (1 + np.exp(-(winner_mean - loser_mean) / np.sqrt(winner_variance + loser_variance + beta_squared)))
+            p_loser = 1 - p_winner
+
+            # Variances shrink in the runs where the win was expected and grow in the runs where it was an upset.
+            expected = (p_winner > 0.5)[:, None, :]
+            p_winner = p_winner[:, None, :]
+            p_loser = p_loser[:, None, :]
+            gamma = gammas[start:stop, :, None]
+            shrink = 1 - gamma * p_loser
+            winner_factor = np.where(expected, shrink, 1 + gamma * p_winner)
+            loser_factor = np.where(expected, shrink, 1 + gamma * (1 - p_loser))
+
+            change = (scales[start:stop, None, :] * coupling[start:stop, :, None]) * p_loser
+            run_means[winners] = winner_means + change
+            run_means[losers] = loser_means - change
+            run_variances[winners] = winner_variances * winner_factor
+            run_variances[losers] = loser_variances * loser_factor
+
+            if history is not None:
+                recorded.append(np.column_stack([winner_mean.mean(axis=1), run_means[winners, columns].mean(axis=1),
+                                                 loser_mean.mean(axis=1), run_means[losers, columns].mean(axis=1)]))
+            if snapshots is not None and stop == snapshots.positions[len(snapshots)]:
+                self.record_snapshot(snapshots, run_means, run_variances, matches, stop)
+
+        if history is not None and len(matches['winner']):
+            recorded = np.concatenate(recorded)
+            history.record(len(history) // 2, matches['winner'], matches['loser'], matches['surface'], matches['date'],
+                           recorded[:, :2], recorded[:, 2:])
+        means[:] = run_means.transpose(2, 0, 1).reshape(means.shape)
+        variances[:] = run_variances.transpose(2, 0, 1).reshape(variances.shape)
+        return means, variances
+
+    def record_snapshot(self, snapshots, run_means, run_variances, matches, stop):
+        """
+        Records the means and variances of the players who played since the previous snapshot as the next snapshot.
+
+        Args:
+            snapshots (RatingSnapshots): Snapshots to record into.
+            run_means (numpy array): Player by surface by run means being updated by run.
+            run_variances (numpy array): Player by surface by run variances being updated by run.
+            matches (dict): Match arrays being run.
+            stop (int): Number of matches applied so far.
+        """
+        start = 0 if len(snapshots) == 0 else snapshots.positions[len(snapshots) - 1]
+        ids = np.unique(np.concatenate([matches['winner'][start:stop], matches['loser'][start:stop]]))
+        snapshots.record(ids, np.hstack([run_means[ids].mean(axis=2), run_variances[ids].mean(axis=2)]))
+
+    def seeded_runs(self, matches, surfaces, num_players, seeds, initial_mean = 25, initial_variance = 8.3333):
+        """
+        Calculates a batch of runs, each drawing its step sizes from its own random stream. A run's ratings depend only
+        on its seed, so batches can be calculated in any grouping, on any process, and joined back together.
+
+        Args:
+            matches (dict): Match arrays from EloEngine.match_arrays with a gamma array from gamma_factors.
+            surfaces (list): Surfaces of the matrix columns, in order.
+            num_players (int): Number of players, the rows of each run's matrices.
+            seeds (list): numpy SeedSequence of each run.
+            initial_mean (float): Initial skill mean of every player. Default set to 25.
+            initial_variance (float): Initial skill variance of every player. Default set to 8.3333.
+
+        Returns:
+            Tuple of the run by player by surface arrays of means and variances.
+        """
+        scales = np.column_stack([self.draw_scales(matches['gamma'], np.random.default_rng(seed)) for seed in seeds])
+        means = np.full((len(seeds), num_players, len(surfaces)), float(initial_mean))
+        variances = np.full((len(seeds), num_players, len(surfaces)), float(initial_variance))
+        return self.run(means, variances, dict(matches, scale=scales), surfaces)
+
+    def rate(self, data, matches, player_index, surfaces, batches = None, initial_mean = 25, initial_variance = 8.3333, gamma = None,
+             runs = 1, rng = None):
+        """
+        Rates the training matches of a RatingRunner with every run of this engine at once.
+
+        Args:
+            data (pandas dataframe): Training matches containing tourney_level and Year columns.
+            matches (dict): Match arrays from EloEngine.match_arrays, shared by every model.
+            player_index (PlayerIndex): Player index whose IDs are the rows of the matrices.
+            surfaces (list): Surfaces of the matrix columns, in order.
+            batches (None or numpy array): Batch boundaries from conflict_free_batches, shared by every model. Default
+                                           set to None, which works them out.
+            initial_mean (float): Initial skill mean of every player. Default set to 25.
+            initial_variance (float): Initial skill variance of every player. Default set to 8.3333.
+            gamma (None or float): Base gamma of the first match. Default set to None, the engine's gamma.
+            runs (int): Number of random runs averaged. Default set to 1.
+            rng (None or numpy Generator): Random number generator. Default set to None, np.random. The step sizes
+                                           are drawn a run at a time, in the order of runs made one after another.
+
+        Returns:
+            Dataframe of the means and variances averaged over the runs, indexed by player name.
+        """
+        gammas = self.gamma_factors(data, gamma)
+        scales = np.column_stack([self.draw_scales(gammas, rng) for _ in range(runs)])
+        means = np.full((runs, len(player_index), len(surfaces)), float(initial_mean))
+        variances = np.full((runs, len(player_index), len(surfaces)), float(initial_variance))
+        means, variances = self.run(means, variances, dict(matches, gamma=gammas, scale=scales), surfaces, batches)
+        columns = [f"{surface}_mean" for surface in surfaces] + [f"{surface}_variance" for surface in surfaces]
+        return pd.DataFrame(np.hstack([means.mean(axis=0), variances.mean(axis=0)]), index=pd.Index(player_index.names, dtype=object), columns=columns)
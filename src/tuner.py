@@ -0,0 +1,413 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+
+# Add the src directory to the Python path so imports work during tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from elo_calculations import ELO
+from elo_engine import EloEngine, UPDATE_SURFACES
+from error_metrics import Errors
+from match_store import select_matches, fingerprint, FIRST_YEAR
+from player_index import PlayerIndex
+from shared_matches import SharedMatches, attach_worker, worker_matches
+from simulation import Simulation
+from skillo_calculations import skillO
+
+# Search space of each model: parameter name to (kind, low, high). Kinds are int (uniform integers, both ends
+# included), uniform, and log (uniform in log space). ELO levels G, M, A and D are the K multipliers of those tourney
+# levels, and S is the scale of the simulation's ELO win probability. Hard_Clay, Hard_Grass and Clay_Grass are the
+# shares of a rating change on one of the two surfaces applied to the other, the entries of the surface coupling matrix.
+SEARCH_SPACES = {
+    'ELO': {
+        'K': ('int', 10, 40),
+        'decay_rate': ('uniform', 0.05, 0.6),
+        'Hard_Clay': ('uniform', 0.5, 1.0),
+        'Hard_Grass': ('uniform', 0.5, 1.0),
+        'Clay_Grass': ('uniform', 0.5, 1.0),
+        'G': ('uniform', 2.0, 6.0),
+        'M': ('uniform', 1.0, 3.0),
+        'A': ('uniform', 1.0, 3.0),
+        'D': ('uniform', 0.25, 1.0),
+        'S': ('int', 200, 1000),
+    },
+    'skillO': {
+        'beta': ('uniform', 0.5, 3.0),
+        'year_decay': ('uniform', 0.3, 1.5),
+        'gamma': ('log', 0.02, 0.3),
+        'Hard_Clay': ('uniform', 0.5, 1.0),
+        'Hard_Grass': ('uniform', 0.5, 1.0),
+        'Clay_Grass': ('uniform', 0.5, 1.0),
+    },
+}
+
+# Surface each grand slam is played on.
+TOURNAMENT_SURFACES = {'Australian Open': 'Hard', 'Roland Garros': 'Clay', 'Wimbledon': 'Grass', 'US Open': 'Hard'}
+
+METRICS = ['RMSE', 'Linf', 'L1', 'MAPE', 'R-squared']
+
+# Context set by attach_tuner_worker: player names and ages, the tournaments to simulate and the model settings.
+_worker_context = None
+_worker_frame = None
+
+def attach_tuner_worker(descriptor, context):
+    """
+    Pool initializer attaching a tuner worker to the published matches and giving it the evaluation context.
+
+    Args:
+        descriptor (dict): Descriptor returned by SharedMatches.descriptor.
+        context (dict): Evaluation context built by Tuner.
+    """
+    global _worker_context, _worker_frame
+    attach_worker(descriptor)
+    _worker_context = context
+    _worker_frame = None
+
+def training_frame():
+    """
+    Decodes the training matches of the worker's shared table into a dataframe once per worker: matches before the
+    current year on the rated surfaces, with player names as categoricals of the player index.
+
+    Returns:
+        Dataframe of the training matches.
+    """
+    global _worker_frame
+    if _worker_frame is None:
+        shared = worker_matches()
+        names = pd.Index(_worker_context['names'], dtype=object)
+        surfaces = pd.Categorical.from_codes(shared['surface'], categories=shared.categories['surface'])
+        frame = pd.DataFrame({
+            'winner_name': pd.Categorical.from_codes(shared['winner_id'], categories=names),
+            'loser_name': pd.Categorical.from_codes(shared['loser_id'], categories=names),
+            'surface': surfaces.astype(object),
+            'tourney_level': pd.Categorical.from_codes(shared['tourney_level'], categories=shared.categories['tourney_level']).astype(object),
+            'Year': np.asarray(shared['Year'], dtype=np.int64)})
+        keep = (frame['Year'] >= FIRST_YEAR) & (frame['Year'] < _worker_context['current_year']) & frame['surface'].isin(UPDATE_SURFACES)
+        _worker_frame = frame[keep.to_numpy()].reset_index(drop=True)
+    return _worker_frame
+
+def coupling_of(params):
+    """
+    Gets the surface coupling of a configuration from its surface pair shares, each applied both ways.
+
+    Args:
+        params (dict): Configuration, with Hard_Clay, Hard_Grass and Clay_Grass shares for a fitted coupling.
+
+    Returns:
+        Dictionary of (match surface, rated surface) to share, for the coupling argument of the engines, ELO and
+        skillO, or None when the configuration has no pair shares.
+    """
+    coupling = {}
+    for first, second in itertools.combinations(UPDATE_SURFACES, 2):
+        name = f'{first}_{second}'
+        if name in params:
+            coupling[(first, second)] = params[name]
+            coupling[(second, first)] = params[name]
+    return coupling or None
+
+def ratings_of(model, params):
+    """
+    Calculates the ratings of every player for one configuration, from the worker's training matches.
+
+    Args:
+        model (str): 'ELO' or 'skillO'.
+        params (dict): Configuration of the model.
+
+    Returns:
+        Dataframe of the ratings and age of every player, indexed by name.
+    """
+    context = _worker_context
+    data = training_frame()
+    names = list(context['names'])
+    if model == 'ELO':
+        multipliers = {'G': params['G'], 'M': params['M'], 'A': params['A'], 'F': 1, 'D': params['D']}
+        engine = EloEngine(context['current_year'], decay_rate=params['decay_rate'], cross_surface=params.get('cross_surface', 0.8),
+                           level_multipliers=multipliers, coupling=coupling_of(params))
+        player_index = PlayerIndex(names)
+        ratings = np.full((len(names), len(UPDATE_SURFACES)), context['initial_rating'])
+        matches = engine.match_arrays(data, player_index, UPDATE_SURFACES)
+        # The engine keeps the original calculation's reset of K to 20 after the first match, so the K being tuned is
+        # applied by scaling every match's K factor instead.
+        matches['k'] = matches['k'] * (params['K'] / 20)
+        engine.run(ratings, matches, UPDATE_SURFACES)
+        rating_df = pd.DataFrame(ratings, index=names, columns=[f'{surface}_ELO' for surface in UPDATE_SURFACES])
+    else:
+        skillo = skillO(context['initial_mean'], context['initial_variance'], context['current_year'], beta=params['beta'],
+                        year_decay=params['year_decay'], gamma=params['gamma'], coupling=coupling_of(params))
+        rating_df = skillo.simulate_multiple_runs(data, context['skillo_runs'], UPDATE_SURFACES, names)
+    rating_df['Player_age'] = pd.Series(context['ages'], index=names).reindex(rating_df.index)
+    return rating_df
+
+def evaluate_config(model, params, trials, seed):
+    """
+    Scores one configuration in a tuner worker: calculates the ratings, simulates each tournament from its initial draw
+    and compares the champion probabilities against the betting odds with the Errors metrics.
+
+    Args:
+        model (str): 'ELO' or 'skillO'.
+        params (dict): Configuration of the model.
+        trials (int): Number of simulations of each tournament.
+        seed (int): Seed of the random numbers, the same for every configuration so they are compared on equal terms.
+
+    Returns:
+        Dictionary of metric name to its mean over the tournaments.
+    """
+    np.random.seed(seed)
+    rating_df = ratings_of(model, params)
+    if model == 'ELO':
+        simulation = Simulation(rating_df, 'ELO', S=params['S'])
+    else:
+        simulation = Simulation(rating_df, 'skillO', beta=params['beta'])
+
+    errors = Errors()
+    scores = {metric: [] for metric in METRICS}
+    for name, surface, draw, odds in _worker_context['tournaments']:
+        simulation.tournament_name = name
+        champion = simulation.simulate_tournament(draw, surface, trials, False)['Champion']
+        scores['RMSE'].append(errors.RMSE(odds, champion))
+        scores['Linf'].append(errors.Linf(odds, champion))
+        scores['L1'].append(errors.L1(odds, champion))
+        scores['MAPE'].append(errors.MAPE(odds, champion))
+        scores['R-squared'].append(errors.R_squared(odds, champion))
+    return {metric: float(np.mean(values)) for metric, values in scores.items()}
+
+class Tuner():
+    """
+    Class searching the ELO and SkillO hyperparameters, along with the simulation parameters, for the configuration
+    whose simulated tournament winners best match the betting odds. Configurations are evaluated in parallel on a
+    process pool attached to one shared copy of the encoded matches, and every result is appended to a cache file as
+    soon as it is known, so an interrupted search picks up where it stopped when run again.
+    """
+    def __init__(self, data, tournaments = ['Wimbledon', 'Roland Garros', 'Australian Open'], year = 2023, metric = 'RMSE',
+                 cache_path = '../data/tuning_results.jsonl', odds_dir = '../data', max_workers = None, seed = 0, skillo_runs = 30):
+        """
+        Initializer for Tuner class.
+
+        Args:
+            data (pandas dataframe or MatchStore): Match data containing the tournaments simulated and the matches before them.
+            tournaments (list): Grand slams to simulate. Default set to Wimbledon, Roland Garros and the Australian Open.
+            year (int): Year of the tournaments, the ratings are trained on the years before it. Default set to 2023.
+            metric (str): Error metric the configurations are ranked by, one of RMSE, Linf, L1, MAPE and R-squared.
+                          Default set to RMSE.
+            cache_path (str): Path of the cache of evaluated configurations. Default set to ../data/tuning_results.jsonl.
+            odds_dir (str): Directory of the {year}_{tournament}_Prob.csv odds files. Default set to ../data.
+            max_workers (None or int): Number of worker processes. Default set to None, one per CPU.
+            seed (int): Seed of the configuration sampling and of the simulations. Default set to 0.
+            skillo_runs (int): Number of SkillO runs averaged for each configuration. Default set to 30.
+
+        Raises:
+            ValueError: metric must be one of the Errors metrics, tournaments must be grand slams.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, not {metric}")
+        invalid = [name for name in tournaments if name not in TOURNAMENT_SURFACES]
+        if invalid:
+            raise ValueError(f"Tournaments {invalid} are not grand slams: {list(TOURNAMENT_SURFACES)}")
+
+        self.data = select_matches(data)
+        self.data_fingerprint = fingerprint(data)
+        self.tournaments = list(tournaments)
+        self.year = year
+        self.metric = metric
+        self.cache_path = cache_path
+        self.odds_dir = odds_dir
+        self.max_workers = max_workers
+        self.seed = seed
+        self.skillo_runs = skillo_runs
+        self.player_index = PlayerIndex.from_matches(self.data)
+        self.context = None
+
+    def build_context(self):
+        """
+        Builds what the workers need besides the matches: player names and ages, and the initial draw and odds of each
+        tournament.
+
+        Returns:
+            Dictionary of the evaluation context.
+        """
+        if self.context is not None:
+            return self.context
+
+        names = list(self.player_index.names)
+        ages = ELO(1500, self.year).get_most_recent_age(self.data).reindex(names).to_numpy(dtype=float)
+        tournaments = []
+        for name in self.tournaments:
+            draw = Simulation(pd.DataFrame(index=pd.Index([], dtype=object)), 'ELO').find_initial_draw(self.data, self.year, name)
+            odds = pd.read_csv(os.path.join(self.odds_dir, f"{self.year}_{name.replace(' ', '_')}_Prob.csv"), index_col=0)
+            tournaments.append((name, TOURNAMENT_SURFACES[name], draw, odds['normalized_winning_probability']))
+
+        self.context = {'names': names, 'ages': ages, 'tournaments': tournaments, 'current_year': self.year,
+                        'initial_rating': 1500.0, 'initial_mean': 25.0, 'initial_variance': 8.3333, 'skillo_runs': self.skillo_runs}
+        return self.context
+
+    def sample(self, model, n, seed = None, space = None):
+        """
+        Draws random configurations from a search space.
+
+        Args:
+            model (str): 'ELO' or 'skillO'.
+            n (int): Number of configurations.
+            seed (None or int): Seed of the sampling. Default set to None, the tuner's seed.
+            space (None or dict): Search space, in the form of the SEARCH_SPACES entries. Default set to None, the model's SEARCH_SPACES entry.
+
+        Returns:
+            List of configuration dictionaries.
+
+        Raises:
+            ValueError: model must be 'ELO' or 'skillO'.
+        """
+        if model not in SEARCH_SPACES:
+            raise ValueError(f"model must be one of {list(SEARCH_SPACES)}, not {model}")
+        space = SEARCH_SPACES[model] if space is None else space
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+
+        configs = []
+        for _ in range(n):
+            config = {}
+            for name, (kind, low, high) in space.items():
+                if kind == 'int':
+                    config[name] = int(rng.integers(low, high + 1))
+                elif kind == 'log':
+                    config[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+                else:
+                    config[name] = float(rng.uniform(low, high))
+            configs.append(config)
+        return configs
+
+    def cache_key(self, model, params, trials):
+        """
+        Gets the key an evaluation is cached under: a hash of everything its score depends on.
+
+        Args:
+            model (str): 'ELO' or 'skillO'.
+            params (dict): Configuration of the model.
+            trials (int): Number of simulations of each tournament.
+
+        Returns:
+            Key as a hex string.
+        """
+        record = {'model': model, 'params': params, 'trials': trials, 'seed': self.seed, 'year': self.year,
+                  'tournaments': self.tournaments, 'data': self.data_fingerprint}
+        if model == 'skillO':
+            record['skillo_runs'] = self.skillo_runs
+        return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+    def read_cache(self):
+        """
+        Reads every evaluation recorded in the cache file.
+
+        Returns:
+            Dictionary of cache key to recorded evaluation.
+        """
+        cached = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                for line in f:
+                    # A line cut short by an interrupted write is skipped and evaluated again.
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    cached[entry['key']] = entry
+        return cached
+
+    def evaluate(self, model, configs, trials):
+        """
+        Scores configurations, reading those already evaluated from the cache and evaluating the rest on the process
+        pool. Each new result is appended to the cache as soon as it is known.
+
+        Args:
+            model (str): 'ELO' or 'skillO'.
+            configs (list): Configuration dictionaries.
+            trials (int): Number of simulations of each tournament.
+
+        Returns:
+            Dataframe with one row per configuration: its parameters, trials and the mean of each metric.
+        """
+        cached = self.read_cache()
+        keys = [self.cache_key(model, params, trials) for params in configs]
+        pending = {key: params for key, params in zip(keys, configs) if key not in cached}
+
+        if pending:
+            directory = os.path.dirname(os.path.abspath(self.cache_path))
+            os.makedirs(directory, exist_ok=True)
+            context = self.build_context()
+            with SharedMatches.publish(self.data, self.player_index) as shared:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=attach_tuner_worker,
+                                         initargs=(shared.descriptor(), context)) as executor:
+                    futures = {executor.submit(evaluate_config, model, params, trials, self.seed): key for key, params in pending.items()}
+                    with open(self.cache_path, 'a') as f:
+                        for future in as_completed(futures):
+                            key = futures[future]
+                            entry = {'key': key, 'model': model, 'params': pending[key], 'trials': trials, 'metrics': future.result()}
+                            f.write(json.dumps(entry) + '\n')
+                            f.flush()
+                            cached[key] = entry
+
+        rows = [{**cached[key]['params'], 'trials': trials, **cached[key]['metrics']} for key in keys]
+        return pd.DataFrame(rows)
+
+    def rank(self, results):
+        """
+        Sorts results from the best configuration to the worst by the tuner's metric.
+
+        Args:
+            results (pandas dataframe): Results from evaluate.
+
+        Returns:
+            Sorted dataframe.
+        """
+        return results.sort_values(self.metric, ascending=self.metric != 'R-squared', kind='stable').reset_index(drop=True)
+
+    def random_search(self, model, n_configs = 20, trials = 500, seed = None, space = None):
+        """
+        Evaluates randomly sampled configurations, all with the same number of simulations.
+
+        Args:
+            model (str): 'ELO' or 'skillO'.
+            n_configs (int): Number of configurations. Default set to 20.
+            trials (int): Number of simulations of each tournament. Default set to 500.
+            seed (None or int): Seed of the sampling. Default set to None, the tuner's seed.
+            space (None or dict): Search space. Default set to None, the model's SEARCH_SPACES entry.
+
+        Returns:
+            Dataframe of the configurations and their metrics, best first.
+        """
+        return self.rank(self.evaluate(model, self.sample(model, n_configs, seed, space), trials))
+
+    def successive_halving(self, model, n_configs = 27, min_trials = 100, eta = 3, seed = None, space = None):
+        """
+        Evaluates randomly sampled configurations with few simulations, then repeatedly keeps the best 1/eta of them
+        and evaluates those again with eta times as many simulations, until one configuration is left.
+
+        Args:
+            model (str): 'ELO' or 'skillO'.
+            n_configs (int): Number of configurations in the first round. Default set to 27.
+            min_trials (int): Number of simulations of each tournament in the first round. Default set to 100.
+            eta (int): Factor the configurations are cut by, and the simulations increased by, each round. Default set to 3.
+            seed (None or int): Seed of the sampling. Default set to None, the tuner's seed.
+            space (None or dict): Search space. Default set to None, the model's SEARCH_SPACES entry.
+
+        Returns:
+            Dataframe of every evaluation with its round, the most simulated first and best first within a round.
+        """
+        configs = self.sample(model, n_configs, seed, space)
+        trials = min_trials
+        rounds = []
+        while True:
+            results = self.evaluate(model, configs, trials)
+            # Ranked positions of the configurations, so the survivors keep their exact parameters.
+            order = self.rank(results.assign(config=range(len(configs))))['config'].tolist()
+            results = self.rank(results)
+            results.insert(0, 'round', len(rounds))
+            rounds.append(results)
+            if len(configs) == 1:
+                break
+            configs = [configs[i] for i in order[:max(1, len(configs) // eta)]]
+            trials *= eta
+        return pd.concat(rounds[::-1], ignore_index=True)
@@ -0,0 +1,75 @@
+import pytest
+import pandas as pd
+import datetime
+from src.date_index import DateIndex, date_key, sort_chronologically
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of matches from two tournaments, in the order a file might list them.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    data = {
+        'tourney_name': ['Wimbledon', 'Wimbledon', 'Wimbledon', 'Halle', 'Halle'],
+        'tourney_date': [20230703, 20230703, 20230703, 20230619, 20230619],
+        'match_num': [300, 100, 200, 2, 1],
+        'round': ['F', 'R128', 'QF', 'F', 'SF'],
+        'winner_name': ['Player_1', 'Player_2', 'Player_3', 'Player_4', 'Player_5']}
+
+    return pd.DataFrame(data)
+
+class Test_date_index():
+    """
+    Class to test the date_index script.
+    """
+    def test_date_key(self):
+        """
+        Tests that dates in different forms are converted to the same yyyymmdd int.
+        """
+        assert date_key(20230703) == 20230703
+        assert date_key('2023-07-03') == 20230703
+        assert date_key(datetime.date(2023, 7, 3)) == 20230703
+        assert date_key(pd.Timestamp('2023-07-03')) == 20230703
+
+        with pytest.raises(TypeError, match="date must be"):
+            date_key(2023.5)
+
+    def test_sort_chronologically(self, df):
+        """
+        Tests that matches are sorted by date, then round, with each tournament kept together.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        sorted_df = sort_chronologically(df)
+        assert list(sorted_df['winner_name']) == ['Player_5', 'Player_4', 'Player_2', 'Player_3', 'Player_1']
+        assert sort_chronologically(sorted_df) is sorted_df
+        assert sort_chronologically(df.drop(columns='tourney_date')) is not None
+
+    def test_slice(self, df):
+        """
+        Tests that the date index finds the rows before, after and between dates.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        index = DateIndex.from_matches(sort_chronologically(df))
+        assert len(index) == 5
+        assert index.position('2023-07-03') == 2
+        assert index.position(20230101) == 0
+        assert index.position(20240101) == 5
+        assert index.slice(end='2023-07-01') == slice(0, 2)
+        assert index.slice(start=20230703) == slice(2, 5)
+        assert index.slice(start=20230703, end=20230101) == slice(2, 2)
+
+    def test_unsorted_dates(self, df):
+        """
+        Tests that a ValueError is raised for dates that are not in chronological order.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        with pytest.raises(ValueError, match="chronological order"):
+            DateIndex.from_matches(df)
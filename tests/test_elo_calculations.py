@@ -2,6 +2,7 @@ import pytest
 from src.elo_calculations import ELO
 import os
 import pandas as pd
+import numpy as np
 
 @pytest.fixture
 def elo():
@@ -57,6 +58,58 @@ def elo_df():
     
     return elo_df
     
+def reference_most_recent_age(data, current_year):
+    """
+    The original implementation of get_most_recent_age, sorting the matches by year and pivoting the last winning and
+    losing ages, which the grouped calculation is tested and benchmarked against.
+
+    Parameters:
+        data (pandas dataframe): Dataframe for previous match history for each tennis tournament and professional match.
+        current_year (int): The current year the ages are estimated in.
+
+    Returns:
+        Series for the estimated current age of a given tennis player.
+    """
+    # Creates a new dataframe sorted on year
+    df_sorted = data.sort_values(by = 'Year', ascending=False)
+
+    # Creates a dataframe of each of the winners last ages in the dataset. This keeps only the first in drop duplicates.
+    winner_ages = df_sorted[['winner_name', 'winner_age', 'Year']].drop_duplicates('winner_name', keep='first')
+
+    # Renames columns for proper naming. The winner name is the players name, and the most recent winning age.
+    winner_ages.rename(columns={'winner_name': 'Player_name', 'winner_age': 'most_recent_age'}, inplace=True)
+    winner_ages['Result'] = 'Match_winner'
+
+    # Use similar strategy from winner_ages to obtain loser_ages
+    loser_ages = df_sorted[['loser_name', 'loser_age', 'Year']].drop_duplicates('loser_name',keep='first')
+    
+    loser_ages.rename(columns={'loser_name': 'Player_name', 'loser_age': 'most_recent_age'}, inplace=True)
+    loser_ages['Result'] = 'Match_loser'
+
+    recent_ages = pd.concat([winner_ages, loser_ages])
+
+    # Use pivot to create new dataframe using Player_name as the index, the column being the result of the match, and the values
+    # being their most recent age.
+    recent_ages = recent_ages.pivot(index ='Player_name', columns = 'Result', values = 'most_recent_age').reset_index()
+
+    recent_ages.fillna(0)
+
+    # Takes most recent year a player has played, used for age calculation
+    recent_years = pd.concat([winner_ages[['Player_name', 'Year']], loser_ages[['Player_name', 'Year']]])
+
+    recent_years = recent_years.drop_duplicates(subset='Player_name', keep='first')
+
+    recent_ages = recent_ages.merge(recent_years, on='Player_name')
+
+    # Calculate the maximum current age for each player based off both columns.
+    recent_ages['Player_age'] = recent_ages[['Match_winner', 'Match_loser']].max(axis=1)
+
+    recent_ages['Player_age'] = recent_ages['Player_age'] + (current_year - recent_ages['Year'])
+    
+    recent_ages.set_index('Player_name', inplace=True)
+
+    return recent_ages['Player_age']
+
 class Test_elo_calculations():
     """
     Class to test the elo_calculations script.
@@ -152,6 +205,31 @@ class Test_elo_calculations():
 
         assert file_path.exists(), "The player_elos.csv file was not created"
 
+    def test_final_elo_csv_cache(self, elo, tmp_path, df):
+        """
+        Tests that the elo csv is reused when the data and parameters are unchanged, and rebuilt when either changes.
+
+        Parameters:
+            elo (class): An instance of the ELO class to be tested.
+            tmp_path: A temporary directory path provided by pytest to store the generated CSV file.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        file_path = tmp_path / "player_elos.csv"
+        first = elo.final_elo_csv(df, file_path=str(file_path))
+        modified = os.path.getmtime(file_path)
+
+        cached = elo.final_elo_csv(df, file_path=str(file_path))
+        assert os.path.getmtime(file_path) == modified
+        pd.testing.assert_frame_equal(cached, first, check_names=False)
+
+        elo.final_elo_csv(df, file_path=str(file_path), use_cache=False)
+        assert os.path.getmtime(file_path) != modified
+
+        modified = os.path.getmtime(file_path)
+        elo.initial_rating = 1400.0
+        elo.final_elo_csv(df, file_path=str(file_path))
+        assert os.path.getmtime(file_path) != modified
+
     def test_expected_game_score_first_elo_type_error(self, elo):
         """
         Test that a TypeError is raised if first_elo is not a float for expected_game_score function.
@@ -259,4 +337,101 @@ class Test_elo_calculations():
         for player, expected_age in expected_ages.items():
             assert recent_age[player] == expected_age, f"Expected age for {player} is {expected_age}, but got {recent_age[player]}"
 
-        
\ No newline at end of file
+        
+
+    def test_get_most_recent_age_matches_reference(self, elo):
+        """
+        Tests that the grouped get_most_recent_age gives the same ages as the original implementation, with many matches
+        in the same year and some missing ages.
+
+        Parameters:
+            elo (class): An instance of the ELO class to be tested.
+        """
+        rng = np.random.default_rng(0)
+        names = np.array([f'Player_{i}' for i in range(40)], dtype=object)
+        data = pd.DataFrame({
+            'winner_name': names[rng.integers(0, 40, 500)],
+            'winner_age': rng.uniform(18, 38, 500).round(1),
+            'loser_name': names[rng.integers(0, 40, 500)],
+            'loser_age': rng.uniform(18, 38, 500).round(1),
+            'Year': np.sort(rng.integers(2015, 2023, 500))})
+        data.loc[rng.integers(0, 500, 20), 'winner_age'] = np.nan
+
+        pd.testing.assert_series_equal(elo.get_most_recent_age(data), reference_most_recent_age(data, elo.current_year))
+
+        # A changed age or name is a different fingerprint, so the cached ages are not reused.
+        data.loc[499, 'winner_age'] = 50.0
+        data.loc[499, 'loser_name'] = 'Player_40'
+        pd.testing.assert_series_equal(elo.get_most_recent_age(data), reference_most_recent_age(data, elo.current_year))
+
+    def test_get_most_recent_age_as_of(self, elo, df):
+        """
+        Tests that ages as of a date only use the matches before it and are estimated in that year, and that changing
+        a returned series leaves the cached ages unchanged.
+
+        Parameters:
+            elo (class): An instance of the ELO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        df = df.assign(tourney_date=df['Year'] * 10000 + 101 + df.index.to_numpy() * 100)
+        recent_age = elo.get_most_recent_age(df, as_of='2022-12-31')
+        assert recent_age.to_dict() == {'Player_1': 26, 'Player_2': 27, 'Player_3': 24, 'Player_4': 31}
+
+        recent_age = elo.get_most_recent_age(df, as_of=20200101)
+        assert len(recent_age) == 0, f"No matches were played before 2020, but got ages for {list(recent_age.index)}"
+
+        recent_age = elo.get_most_recent_age(df)
+        recent_age[:] = 0
+        assert elo.get_most_recent_age(df)['Player_4'] == 31, "Changing a returned series should not change the cached ages"
+
+    def test_update(self, tmp_path, df):
+        """
+        Tests that updating the ratings in steps, passing overlapping data each time, gives the same ratings as one
+        calculation over every match, and that the saved state must match the model parameters.
+
+        Parameters:
+            tmp_path: A temporary directory path provided by pytest to store the rating state.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        df = df.assign(tourney_date=df['Year'] * 10000 + 101 + df.index.to_numpy() // 3 * 100)
+        state_path = str(tmp_path / 'elo_state.npz')
+        elo = ELO(1500, 2024)
+
+        elo.update(df.iloc[:4], state_path=state_path)
+        elo.update(df.iloc[:7], state_path=state_path)
+        elo.update(df, state_path=state_path)
+        updated = elo.update(df, state_path=state_path)
+
+        surfaces = ['Hard', 'Clay', 'Grass']
+        expected = elo.reference_elo_calculation(df, elo.initial_elos(surfaces, list(updated.index)))
+        pd.testing.assert_frame_equal(updated, expected[[f'{surface}_ELO' for surface in surfaces]], check_exact=True, check_names=False,
+                                      check_index_type=False)
+
+        with pytest.raises(ValueError):
+            ELO(1400, 2024).update(df, state_path=state_path)
+        with pytest.raises(KeyError):
+            ELO(1500, 2024).update(df.drop(columns='tourney_date'), state_path=str(tmp_path / 'other.npz'))
+
+    def test_expected_matrix(self, elo, elo_df):
+        """
+        Tests that every entry of the win probability matrix matches the pairwise expected game score, for players given
+        by name or by ID.
+
+        Parameters:
+            elo (class): An instance of the ELO class to be tested.
+            elo_df (pandas dataframe): Mock dataframe of ELO scores.
+        """
+        with pytest.raises(ValueError):
+            elo.expected_matrix([0, 1], 'Hard')
+
+        elo.elo_dataframe = elo_df
+        names = ['Player_3', 'Player_1', 'Player_4']
+        matrix = elo.expected_matrix(names, 'Grass', S=800)
+        assert matrix.shape == (3, 3)
+        for i, first in enumerate(names):
+            for j, second in enumerate(names):
+                assert matrix[i, j] == pytest.approx(elo.expected_game_score(elo_df.loc[first, 'Grass_ELO'], elo_df.loc[second, 'Grass_ELO'], S=800))
+        np.testing.assert_array_equal(elo.expected_matrix([2, 0, 3], 'Grass', S=800), matrix)
+        np.testing.assert_allclose(matrix + matrix.T, 1.0)
+        with pytest.raises(KeyError):
+            elo.expected_matrix(['Player_9'], 'Grass')
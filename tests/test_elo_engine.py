@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.elo_engine import EloEngine, conflict_free_batches, coupling_matrix
+from src.elo_calculations import ELO
+from src.player_index import PlayerIndex
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of random matches between a small group of players.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    rng = np.random.default_rng(0)
+    rows = 400
+    names = np.array([f'Player_{i}' for i in range(20)], dtype=object)
+    winners = rng.integers(0, 20, rows)
+    losers = (winners + rng.integers(1, 20, rows)) % 20
+    data = {
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A', 'F', 'D', 'C'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'Year': np.sort(rng.integers(2015, 2023, rows))}
+
+    return pd.DataFrame(data)
+
+@pytest.fixture
+def elo():
+    """
+    Created ELO class for testing
+
+    Returns:
+        Instance of ELO class.
+    """
+    return ELO(initial_elo_rating=1500, current_year = 2023)
+
+class Test_elo_engine():
+    """
+    Class to test the elo_engine script.
+    """
+    def test_matches_reference(self, elo, df):
+        """
+        Tests that the engine gives exactly the ratings of the row by row calculation.
+
+        Parameters:
+            elo (class): An instance of the ELO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        names = sorted(set(df['winner_name']))
+        for K in [20, 32]:
+            engine_elos = elo.elo_calculation(df, elo.initial_elos(['Clay', 'Hard', 'Grass'], names), K)
+            reference_elos = elo.reference_elo_calculation(df, elo.initial_elos(['Clay', 'Hard', 'Grass'], names), K)
+            np.testing.assert_array_equal(engine_elos.to_numpy(), reference_elos.to_numpy())
+
+    def test_other_surface_column(self, elo, df):
+        """
+        Tests that matches on a surface outside the update surfaces adjust all three of them, like the row by row calculation.
+
+        Parameters:
+            elo (class): An instance of the ELO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        df.loc[::7, 'surface'] = 'Carpet'
+        names = sorted(set(df['winner_name']))
+        engine_elos = elo.elo_calculation(df, elo.initial_elos(['Hard', 'Clay', 'Grass', 'Carpet'], names))
+        reference_elos = elo.reference_elo_calculation(df, elo.initial_elos(['Hard', 'Clay', 'Grass', 'Carpet'], names))
+        np.testing.assert_array_equal(engine_elos.to_numpy(), reference_elos.to_numpy())
+
+    def test_conflict_free_batches(self, df):
+        """
+        Tests that batches cover the matches in order, that no player plays twice in a batch, and that each batch only
+        ends where the next match shares a player with it.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        matches = EloEngine(2023).match_arrays(df, PlayerIndex.from_matches(df), ['Hard', 'Clay', 'Grass'])
+        batches = conflict_free_batches(matches)
+        assert batches[0] == 0 and batches[-1] == len(df) and (np.diff(batches) > 0).all()
+        for start, stop in zip(batches[:-1], batches[1:]):
+            players = np.concatenate([matches['winner'][start:stop], matches['loser'][start:stop]])
+            assert len(np.unique(players)) == len(players), f"A player plays twice in matches {start} to {stop}"
+            if stop < len(df):
+                assert {matches['winner'][stop], matches['loser'][stop]} & set(players.tolist()), f"Match {stop} could join the batch before it"
+
+    def test_coupling_matrix(self):
+        """
+        Tests that the coupling matrix defaults to the cross surface share between update surfaces, widens for carpet,
+        and takes the shares given.
+        """
+        matrix = coupling_matrix(['Hard', 'Clay', 'Grass', 'Carpet'], 0.8, {('Hard', 'Clay'): 0.6, ('Carpet', 'Carpet'): 0.9})
+        expected = np.array([[1.0, 0.6, 0.8, 0.0],
+                             [0.8, 1.0, 0.8, 0.0],
+                             [0.8, 0.8, 1.0, 0.0],
+                             [0.8, 0.8, 0.8, 0.9]])
+        np.testing.assert_array_equal(matrix, expected)
+
+    def test_coupling(self, df):
+        """
+        Tests that the default coupling written out gives the default ratings, that a fitted coupling changes them,
+        and that a share of 0 leaves the ratings of a surface unchanged by matches on the others.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        df.loc[::7, 'surface'] = 'Carpet'
+        surfaces = ['Hard', 'Clay', 'Grass', 'Carpet']
+        player_index = PlayerIndex.from_matches(df)
+        matches = EloEngine(2023).match_arrays(df, player_index, surfaces)
+        default = EloEngine(2023).run(np.full((len(player_index), 4), 1500.0), matches, surfaces)
+        written_out = {(played, rated): 0.8 for played in surfaces for rated in ['Hard', 'Clay', 'Grass'] if played != rated}
+        np.testing.assert_array_equal(EloEngine(2023, coupling=written_out).run(np.full((len(player_index), 4), 1500.0), matches, surfaces), default)
+
+        coupling = {('Hard', 'Clay'): 0.5, ('Clay', 'Hard'): 0.7, ('Hard', 'Grass'): 0.0, ('Hard', 'Carpet'): 0.3, ('Carpet', 'Grass'): 0.0}
+        engine = EloEngine(2023, coupling=coupling)
+        ratings = engine.run(np.full((len(player_index), 4), 1500.0), matches, surfaces)
+        assert not np.array_equal(ratings, default), "A fitted coupling should change the ratings"
+
+        grass_only = EloEngine(2023, coupling={(played, 'Grass'): 0.0 for played in surfaces if played != 'Grass'})
+        grass = grass_only.run(np.full((len(player_index), 4), 1500.0), matches, surfaces)[:, 2]
+        played_grass = np.unique(np.concatenate([matches['winner'][matches['surface'] == 2], matches['loser'][matches['surface'] == 2]]))
+        assert (np.delete(grass, played_grass) == 1500).all(), "Grass ratings should only move on grass with a share of 0"
+
+    def test_k_factors(self, df):
+        """
+        Tests the K factor of each match combines the base K, the tourney level and the year decay.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        engine = EloEngine(2023)
+        rows = pd.DataFrame({'tourney_level': ['G', 'M', 'C', 'D'], 'Year': [2022, 2022, 2023, 2021]})
+        expected = [32 * 4 * np.exp(-0.3), 20 * 2 * np.exp(-0.3), 20, 20 * 0.5 * np.exp(-0.6)]
+        np.testing.assert_allclose(engine.k_factors(rows, K=32), expected)
+
+    def test_missing_surface(self, df):
+        """
+        Tests that a KeyError is raised for a match on a surface without a rating column.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        engine = EloEngine(2023)
+        player_index = PlayerIndex.from_matches(df)
+        with pytest.raises(KeyError, match="no rating column"):
+            engine.match_arrays(df, player_index, ['Hard', 'Clay'])
+        with pytest.raises(KeyError, match="no rating column"):
+            engine.run(np.zeros((len(player_index), 1)), engine.match_arrays(df[df['surface'] == 'Hard'], player_index, ['Hard']), ['Hard'])
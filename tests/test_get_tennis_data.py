@@ -1,6 +1,11 @@
 import pytest
 import pandas as pd
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from src.get_tennis_data import GetTennisData
+from src.match_store import MatchStore
 
 @pytest.fixture
 def tennis_data():
@@ -40,3 +45,215 @@ def test_get_data_returns_dataframe(tennis_data):
     
     assert isinstance(result_df, pd.DataFrame), "The result is not a pandas DataFrame"
 
+def make_year_csv(year):
+    """
+    Creates a small csv in the same layout as the github match files for a given year.
+
+    Parameters:
+        year (int): Year the matches were played in.
+
+    Returns:
+        The csv file contents as bytes.
+    """
+    df = pd.DataFrame({
+        'tourney_name': ['Wimbledon', 'Wimbledon', 'Paris Masters'],
+        'surface': ['Grass', 'Grass', 'Carpet'],
+        'draw_size': [128, 128, 48],
+        'tourney_level': ['G', 'G', 'M'],
+        'tourney_date': [year * 10000 + 703, year * 10000 + 703, year * 10000 + 102],
+        'match_num': [2, 1, 1],
+        'round': ['R128', 'R128', 'F'],
+        'best_of': [5, 5, 3],
+        'winner_name': ['Player_1', 'Player_2', 'Player_1'],
+        'winner_age': [25.1, 27.3, 25.4],
+        'loser_name': ['Player_3', 'Player_4', 'Player_2'],
+        'loser_age': [22.0, 30.5, 27.5],
+        'score': ['6-4 6-4 6-4', '7-6 6-3 6-2', '6-3 6-4']})
+    return df.to_csv(index=False).encode()
+
+@pytest.fixture
+def local_server():
+    """
+    Starts a local HTTP server standing in for github. It serves one csv per year with an ETag, answers matching
+    If-None-Match requests with a 304 and counts how many full downloads were served.
+
+    Returns:
+        Tuple of the URL pattern for the yearly files and the dictionary holding the server state.
+    """
+    state = {'files': {year: make_year_csv(year) for year in range(2020, 2023)}, 'downloads': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            year = int(self.path.split('_')[-1].split('.')[0])
+            if self.path.startswith('/futures_'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = state['files'][year]
+            if self.path.startswith(('/wta_', '/wta/')):
+                body = body.replace(b'Player_', b'WTA_Player_')
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            state['downloads'] += 1
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/atp_matches_{{}}.csv', state
+    server.shutdown()
+    server.server_close()
+
+def test_get_data_uses_cache(local_server, tmp_path):
+    """
+    Tests that unchanged years are served from the cache on the second download, and only changed years are fetched again.
+
+    Parameters:
+        local_server (tuple): URL pattern and state of the local HTTP server.
+        tmp_path: A temporary directory path provided by pytest for the cache and output files.
+    """
+    url, state = local_server
+    tennis_data = GetTennisData(base_url=url, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path))
+
+    first_df = tennis_data.get_data(year_lower=2020, year_upper=2023)
+    assert tennis_data.fetch_summary == {'fetched': 3, 'cached': 0, 'missing': 0}
+    assert len(first_df) == 6, "Carpet matches should be dropped"
+    assert (tmp_path / 'tennis_data.csv').exists()
+
+    second_df = tennis_data.get_data(year_lower=2020, year_upper=2023)
+    assert tennis_data.fetch_summary == {'fetched': 0, 'cached': 3, 'missing': 0}
+    assert state['downloads'] == 3
+    pd.testing.assert_frame_equal(first_df, second_df)
+
+    state['files'][2022] = make_year_csv(2022).replace(b'Player_4', b'Player_5')
+    third_df = tennis_data.get_data(year_lower=2020, year_upper=2023)
+    assert tennis_data.fetch_summary == {'fetched': 1, 'cached': 2, 'missing': 0}
+    assert 'Player_5' in set(third_df['loser_name'])
+
+def test_get_data_incremental(local_server, tmp_path):
+    """
+    Tests that incremental mode only parses new or changed years and leaves the other partitions untouched.
+
+    Parameters:
+        local_server (tuple): URL pattern and state of the local HTTP server.
+        tmp_path: A temporary directory path provided by pytest for the cache and output files.
+    """
+    url, state = local_server
+    tennis_data = GetTennisData(base_url=url, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path))
+
+    first_df = tennis_data.get_data(year_lower=2020, year_upper=2023, incremental=True)
+    assert tennis_data.ingest_summary == {'parsed': 3, 'unchanged': 0}
+    assert len(first_df) == 6
+
+    store_dir = tmp_path / 'tennis_data'
+    mtimes = {year: os.path.getmtime(store_dir / 'atp' / f'tennis_data_{year}.bin') for year in range(2020, 2023)}
+
+    state['files'][2022] = make_year_csv(2022).replace(b'Player_4', b'Player_5')
+    second_df = tennis_data.get_data(year_lower=2020, year_upper=2023, incremental=True)
+    assert tennis_data.ingest_summary == {'parsed': 1, 'unchanged': 2}
+    assert 'Player_5' in set(second_df['loser_name'])
+
+    for year in [2020, 2021]:
+        assert os.path.getmtime(store_dir / 'atp' / f'tennis_data_{year}.bin') == mtimes[year], f"Partition {year} should not be rewritten"
+
+def test_get_data_streams_chunks(local_server, tmp_path):
+    """
+    Tests that parsing the files in small chunks gives the same data as parsing them whole, with only the needed
+    columns and integer draw sizes.
+
+    Parameters:
+        local_server (tuple): URL pattern and state of the local HTTP server.
+        tmp_path: A temporary directory path provided by pytest for the cache and output files.
+    """
+    url, _ = local_server
+    chunked = GetTennisData(base_url=url, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path / 'chunked'), chunk_size=1)
+    whole = GetTennisData(base_url=url, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path / 'whole'))
+
+    chunked_df = chunked.get_data(year_lower=2020, year_upper=2023)
+    whole_df = whole.get_data(year_lower=2020, year_upper=2023)
+
+    pd.testing.assert_frame_equal(chunked_df, whole_df)
+    assert 'score' not in chunked_df.columns
+    assert chunked_df['draw_size'].dtype == 'int64'
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'chunked' / 'tennis_data.csv'), pd.read_csv(tmp_path / 'whole' / 'tennis_data.csv'))
+
+def test_get_data_chronological(local_server, tmp_path):
+    """
+    Tests that the tourney date, match number and round are kept, and matches are returned in the order they were played.
+
+    Parameters:
+        local_server (tuple): URL pattern and state of the local HTTP server.
+        tmp_path: A temporary directory path provided by pytest for the cache and output files.
+    """
+    url, _ = local_server
+    tennis_data = GetTennisData(base_url=url, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path))
+
+    for incremental in [False, True]:
+        df = tennis_data.get_data(year_lower=2020, year_upper=2023, incremental=incremental)
+        assert list(df['tourney_date']) == [20200703, 20200703, 20210703, 20210703, 20220703, 20220703]
+        assert list(df['match_num']) == [1, 2] * 3
+        assert list(df['winner_name']) == ['Player_2', 'Player_1'] * 3
+        assert list(df['round']) == ['R128'] * 6
+
+def test_get_data_multi_tour(local_server, tmp_path):
+    """
+    Tests that several tours are ingested into their own partitions, tours without a file for a year are skipped, and
+    loading one tour only reads that tour.
+
+    Parameters:
+        local_server (tuple): URL pattern and state of the local HTTP server.
+        tmp_path: A temporary directory path provided by pytest for the cache and output files.
+    """
+    url, _ = local_server
+    urls = {'atp': url, 'wta': url.replace('atp_', 'wta_'), 'futures': url.replace('atp_', 'futures_')}
+    tennis_data = GetTennisData(base_url=urls, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path), tours=['atp', 'wta', 'futures'])
+
+    df = tennis_data.get_data(year_lower=2020, year_upper=2023, incremental=True)
+    assert tennis_data.fetch_summary == {'fetched': 6, 'cached': 0, 'missing': 3}
+    assert len(df) == 12
+    assert list(df['tour'][:4]) == ['atp', 'atp', 'wta', 'wta']
+    assert (tmp_path / 'tennis_data' / 'wta' / 'tennis_data_2022.bin').exists()
+
+    store = MatchStore(str(tmp_path / 'tennis_data'))
+    assert store.tours() == ['atp', 'wta']
+    atp_df = store.load(tours=['atp'])
+    assert set(atp_df['tour']) == {'atp'}
+    assert not any(name.startswith('WTA_') for name in atp_df['winner_name'])
+
+    csv_df = tennis_data.get_data(year_lower=2020, year_upper=2023)
+    assert list(csv_df['winner_name']) == list(df['winner_name'])
+
+    with pytest.raises(ValueError, match="no URL pattern"):
+        GetTennisData(tours=['itf'])
+
+def test_cache_per_tour(local_server, tmp_path):
+    """
+    Tests that tours whose URL patterns share a file name are cached separately and keep their own matches.
+
+    Parameters:
+        local_server (tuple): URL pattern and state of the local HTTP server.
+        tmp_path: A temporary directory path provided by pytest for the cache and output files.
+    """
+    url, _ = local_server
+    host = url.split('/atp_')[0]
+    urls = {'atp': f'{host}/atp/matches_{{}}.csv', 'wta': f'{host}/wta/matches_{{}}.csv'}
+    tennis_data = GetTennisData(base_url=urls, cache_dir=str(tmp_path / 'cache'), output_dir=str(tmp_path), tours=['atp', 'wta'])
+
+    df = tennis_data.get_data(year_lower=2020, year_upper=2023, incremental=True)
+    assert (tmp_path / 'cache' / 'atp' / 'matches_2020.csv').exists()
+    assert (tmp_path / 'cache' / 'wta' / 'matches_2020.csv').exists()
+    assert not any(name.startswith('WTA_') for name in df[df['tour'] == 'atp']['winner_name'])
+    assert all(name.startswith('WTA_') for name in df[df['tour'] == 'wta']['winner_name'])
+
+    tennis_data.get_data(year_lower=2020, year_upper=2023, incremental=True)
+    assert tennis_data.fetch_summary == {'fetched': 0, 'cached': 6, 'missing': 0}
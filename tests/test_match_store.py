@@ -0,0 +1,282 @@
+import pytest
+import os
+import pandas as pd
+from src.match_store import MatchStore, select_matches, fingerprint
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe with arbitrary player names for tennis data across two years.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    data = {
+        'tourney_name': ['Australian Open', 'Roland Garros', 'Wimbledon', 'Australian Open', 'Roland Garros', 'Wimbledon'],
+        'surface': ['Hard', 'Clay', 'Grass', 'Hard', 'Clay', 'Grass'],
+        'draw_size': [128, 128, 128, 128, 128, 128],
+        'tourney_level': ['G', 'G', 'G', 'G', 'G', 'G'],
+        'best_of': [5, 5, 5, 5, 5, 5],
+        'winner_name': ['Player_1', 'Player_3', 'Player_2', 'Player_4', 'Player_1', 'Player_3'],
+        'winner_age': [26.1, 24.2, 27.3, 31.4, 27.1, 25.2],
+        'loser_name': ['Player_2', 'Player_4', 'Player_3', 'Player_1', 'Player_4', 'Player_2'],
+        'loser_age': [27.0, 30.9, 24.5, 27.2, 31.8, 28.1],
+        'Year': [2022, 2022, 2022, 2023, 2023, 2023]}
+
+    return pd.DataFrame(data)
+
+@pytest.fixture
+def store(tmp_path, df):
+    """
+    Match store in a temporary directory holding the mock data, one partition per year.
+
+    Returns:
+        Instance of the MatchStore class.
+    """
+    match_store = MatchStore(str(tmp_path / 'store'))
+    for year, year_df in df.groupby('Year'):
+        match_store.write_partition(year, year_df, f'hash_{year}')
+    return match_store
+
+class Test_match_store():
+    """
+    Class to test the match_store script.
+    """
+    def test_manifest(self, store):
+        """
+        Tests that the manifest records every year written with its hash and number of rows.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+        """
+        manifest = store.read_manifest()
+        assert store.years() == [2022, 2023]
+        assert manifest[('atp', 2022)]['hash'] == 'hash_2022'
+        assert manifest[('atp', 2022)]['rows'] == 3
+        assert store.is_current(2023, 'hash_2023')
+        assert not store.is_current(2023, 'other_hash')
+        assert not store.is_current(2024, 'hash_2024')
+
+    def test_load(self, store, df):
+        """
+        Tests that loading every partition gives back the original data, and a subset of years can be loaded.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        pd.testing.assert_frame_equal(store.load()[df.columns], df, check_dtype=False, check_categorical=False)
+        assert set(store.load([2023])['Year']) == {2023}
+
+    def test_other_writer(self, store, df):
+        """
+        Tests that a store keeps its parsed manifest and dictionaries between loads, but sees a partition and players
+        added by another instance writing to the same directory.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        store.load()
+        dtype = store.categorical_dtype('player')
+        store.load()
+        assert store.categorical_dtype('player') is dtype
+
+        writer = MatchStore(store.root)
+        writer.write_partition(2024, df.iloc[:1].assign(Year=2024, winner_name='Player_5'), 'hash_2024')
+        loaded = store.load()
+        assert store.years() == [2022, 2023, 2024]
+        assert list(loaded['winner_name'].iloc[-1:]) == ['Player_5']
+        assert 'Player_5' in store.categorical_dtype('player').categories
+
+    def test_dictionary_encoding(self, store):
+        """
+        Tests that text columns are loaded as categoricals, and winner and loser names share one player dictionary.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+        """
+        loaded = store.load()
+        for column in ['tourney_name', 'surface', 'tourney_level', 'winner_name', 'loser_name']:
+            assert isinstance(loaded[column].dtype, pd.CategoricalDtype), f"{column} should be categorical"
+        assert list(loaded['winner_name'].cat.categories) == list(loaded['loser_name'].cat.categories)
+        assert loaded['Year'].dtype == 'int64'
+
+    def test_player_ids(self, store, df):
+        """
+        Tests that the loaded data carries winner and loser ID columns matching the store's player index.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        loaded = store.load()
+        player_index = store.player_index()
+        assert loaded['winner_id'].dtype == 'int32'
+        assert list(player_index.names_of(loaded['winner_id'])) == list(df['winner_name'])
+        assert list(player_index.names_of(loaded['loser_id'])) == list(df['loser_name'])
+
+    def test_rewrite_partition_keeps_codes(self, store, df):
+        """
+        Tests that rewriting a year with a new player appends to the dictionary without changing existing codes.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        before = store.load([2022])['winner_name'].cat.codes.tolist()
+        year_df = df[df['Year'] == 2023].copy()
+        year_df['loser_name'] = ['Player_5', 'Player_4', 'Player_2']
+        store.write_partition(2023, year_df, 'new_hash')
+
+        loaded = store.load()
+        assert loaded[loaded['Year'] == 2022]['winner_name'].cat.codes.tolist() == before
+        assert loaded['loser_name'].tolist()[3] == 'Player_5'
+        assert store.read_manifest()[('atp', 2023)]['hash'] == 'new_hash'
+
+    def test_load_missing_year(self, store):
+        """
+        Tests that a KeyError is raised when loading a year that is not stored.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+        """
+        with pytest.raises(KeyError, match="not in the match store"):
+            store.load([2021])
+
+    def test_mixed_partition_dtypes(self, store, df):
+        """
+        Tests that a partition written with a different dtype for a column is converted to the dtype of the other partitions.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        year_df = df[df['Year'] == 2023].astype({'draw_size': 'float64'})
+        store.write_partition(2023, year_df, 'float_hash')
+
+        loaded = store.load()
+        assert loaded['draw_size'].dtype == 'int64'
+        assert list(loaded['draw_size']) == [128] * 6
+
+    def test_load_matches_predicates(self, store, df):
+        """
+        Tests that load_matches returns the same rows as filtering the dataframe, for each kind of condition.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        loaded = store.load_matches(years=[2023], surfaces=['Clay', 'Grass'])
+        expected = df[(df['Year'] == 2023) & df['surface'].isin(['Clay', 'Grass'])]
+        assert list(loaded['winner_name']) == list(expected['winner_name'])
+
+        loaded = store.load_matches(tournaments=['Wimbledon'], columns=['winner_name', 'loser_id', 'Year'])
+        assert list(loaded.columns) == ['winner_name', 'loser_id', 'Year']
+        assert list(loaded['winner_name']) == ['Player_2', 'Player_3']
+        assert list(loaded['Year']) == [2022, 2023]
+        assert list(store.player_index().names_of(loaded['loser_id'])) == ['Player_3', 'Player_2']
+
+    def test_load_matches_no_rows(self, store):
+        """
+        Tests that conditions matching nothing give an empty dataframe with the requested columns.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+        """
+        loaded = store.load_matches(levels=['D'], columns=['winner_name', 'Year'])
+        assert len(loaded) == 0
+        assert list(loaded.columns) == ['winner_name', 'Year']
+        assert len(store.load_matches(surfaces=['Carpet'])) == 0
+
+    def test_load_matches_prunes_partitions(self, store, df):
+        """
+        Tests that a partition without the requested surface is skipped without being opened.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        year_df = pd.DataFrame(df[df['Year'] == 2023].assign(Year=2024, surface='Hard'))
+        store.write_partition(2024, year_df, 'hash_2024')
+        os.remove(store.partition_path(2024))
+
+        loaded = store.load_matches(surfaces=['Grass'])
+        assert list(loaded['Year']) == [2022, 2023]
+
+    def test_load_matches_missing_column(self, store):
+        """
+        Tests that a KeyError is raised when asking for a column that is not stored.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+        """
+        with pytest.raises(KeyError, match="not in the match store"):
+            store.load_matches(columns=['score'])
+
+    def test_select_matches(self, store, df):
+        """
+        Tests that select_matches gives the same matches from a dataframe and from a match store.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        from_df = select_matches(df, years=range(1968, 2023), tournaments='Roland Garros')
+        from_store = select_matches(store, years=range(1968, 2023), tournaments='Roland Garros')
+        assert list(from_df['winner_name']) == list(from_store['winner_name']) == ['Player_3']
+        assert select_matches(df, years=range(1968, 2024)) is df
+
+        with pytest.raises(TypeError, match="MatchStore or a pandas dataframe"):
+            select_matches([1, 2, 3])
+
+    def test_load_matches_as_of(self, store, tmp_path):
+        """
+        Tests that partitions are stored in chronological order, read up to a date, and merged by date when a partition
+        starts before the previous one ends.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested, without tourney dates.
+            tmp_path: A temporary directory path provided by pytest for the store.
+        """
+        df = pd.DataFrame({
+            'tourney_name': ['Paris', 'Vienna', 'United Cup', 'Melbourne', 'Melbourne'],
+            'tourney_date': [20221031, 20221024, 20221229, 20230116, 20230116],
+            'match_num': [1, 1, 1, 2, 1],
+            'round': ['F', 'F', 'RR', 'F', 'SF'],
+            'winner_name': ['Player_1', 'Player_2', 'Player_3', 'Player_4', 'Player_5'],
+            'Year': [2022, 2022, 2023, 2023, 2023]})
+        dated_store = MatchStore(str(tmp_path / 'dated'))
+        dated_store.write_frame(df)
+        # A Year 2022 match dated after the start of the 2023 partition.
+        dated_store.write_partition(2022, df[df['Year'] == 2022].assign(tourney_date=[20221031, 20230102]), 'late_hash')
+
+        loaded = dated_store.load_matches()
+        assert list(loaded['tourney_date']) == [20221031, 20221229, 20230102, 20230116, 20230116]
+        assert list(loaded['winner_name']) == ['Player_1', 'Player_3', 'Player_2', 'Player_5', 'Player_4']
+
+        assert list(dated_store.load_matches(as_of='2023-01-16')['winner_name']) == ['Player_1', 'Player_3', 'Player_2']
+        assert list(dated_store.load_matches(as_of=20221101, columns=['Year'])['Year']) == [2022]
+        assert list(select_matches(loaded, as_of=20230102)['winner_name']) == ['Player_1', 'Player_3']
+
+        with pytest.raises(KeyError, match="tourney_date"):
+            store.load_matches(as_of=20230101)
+
+    def test_fingerprint(self, store, df):
+        """
+        Tests that the fingerprint only changes when the stored data does.
+
+        Parameters:
+            store (class): An instance of the MatchStore class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        before = fingerprint(store)
+        assert fingerprint(MatchStore(store.root)) == before
+
+        store.write_partition(2023, df[df['Year'] == 2023], 'new_hash')
+        assert fingerprint(store) != before
+
+        assert fingerprint(df) == fingerprint(df.copy())
+        assert fingerprint(df) != fingerprint(df.iloc[:-1])
+        with pytest.raises(TypeError, match="MatchStore or a pandas dataframe"):
+            fingerprint([1, 2])
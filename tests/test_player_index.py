@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.player_index import PlayerIndex
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe with arbitrary player names.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    data = {
+        'winner_name': ['Player_1', 'Player_3', 'Player_1', 'Player_4'],
+        'loser_name': ['Player_2', 'Player_1', 'Player_4', 'Player_3']}
+    return pd.DataFrame(data)
+
+@pytest.fixture
+def player_index(df):
+    """
+    Player index built from the mock data.
+
+    Returns:
+        Instance of the PlayerIndex class.
+    """
+    return PlayerIndex.from_matches(df)
+
+class Test_player_index():
+    """
+    Class to test the player_index script.
+    """
+    def test_first_appearance_order(self, player_index):
+        """
+        Tests that players are numbered densely in order of first appearance.
+
+        Parameters:
+            player_index (class): An instance of the PlayerIndex class to be tested.
+        """
+        assert len(player_index) == 4
+        assert list(player_index.names) == ['Player_1', 'Player_2', 'Player_3', 'Player_4']
+        assert player_index.id_of('Player_3') == 2
+        assert player_index.name_of(3) == 'Player_4'
+
+    def test_round_trip(self, player_index, df):
+        """
+        Tests that names map to int32 IDs and back to the same names.
+
+        Parameters:
+            player_index (class): An instance of the PlayerIndex class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        ids = player_index.ids(df['winner_name'])
+        assert ids.dtype == np.int32
+        assert list(player_index.names_of(ids)) == list(df['winner_name'])
+
+    def test_encode_matches(self, player_index, df):
+        """
+        Tests that encoding match data adds winner and loser ID columns.
+
+        Parameters:
+            player_index (class): An instance of the PlayerIndex class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        encoded = player_index.encode_matches(df)
+        assert list(encoded['winner_id']) == [0, 2, 0, 3]
+        assert list(encoded['loser_id']) == [1, 0, 3, 2]
+        assert 'winner_id' not in df.columns
+
+    def test_unknown_player(self, player_index):
+        """
+        Tests that a KeyError is raised for a player not in the index.
+
+        Parameters:
+            player_index (class): An instance of the PlayerIndex class to be tested.
+        """
+        with pytest.raises(KeyError, match="not in the player index"):
+            player_index.ids(['Player_1', 'Player_9'])
+
+    def test_duplicate_names(self):
+        """
+        Tests that a ValueError is raised if the names are not unique.
+        """
+        with pytest.raises(ValueError, match="must be unique"):
+            PlayerIndex(['Player_1', 'Player_1'])
+
+    def test_unused_categories(self, df):
+        """
+        Tests that names stored as categoricals with players not in the data, like a slice of the match store, give an
+        index of only the players in the data, in category order, that still encodes the categoricals.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        dtype = pd.CategoricalDtype(['Player_0', 'Player_1', 'Player_2', 'Player_3', 'Player_4', 'Player_5'])
+        categorical = df.astype({'winner_name': dtype, 'loser_name': dtype})
+        player_index = PlayerIndex.from_matches(categorical)
+
+        assert list(player_index.names) == ['Player_1', 'Player_2', 'Player_3', 'Player_4']
+        assert list(player_index.names_of(player_index.ids(categorical['loser_name']))) == list(df['loser_name'])
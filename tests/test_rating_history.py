@@ -0,0 +1,107 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.rating_history import RatingHistory
+from src.elo_calculations import ELO
+from src.skillo_calculations import skillO
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of random matches between a small group of players over several seasons.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    rng = np.random.default_rng(1)
+    rows = 200
+    names = np.array([f'Player_{i}' for i in range(8)], dtype=object)
+    winners = rng.integers(0, 8, rows)
+    losers = (winners + rng.integers(1, 8, rows)) % 8
+    years = np.sort(rng.integers(2016, 2021, rows))
+    data = {
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'Year': years,
+        'tourney_date': years * 10000 + np.sort(rng.integers(1, 13, rows)) * 100 + 1}
+
+    return pd.DataFrame(data).sort_values('tourney_date', kind='stable').reset_index(drop=True)
+
+class Test_rating_history():
+    """
+    Class to test the rating_history script.
+    """
+    def test_elo_history(self, df):
+        """
+        Tests that recording the history leaves the ELO scores unchanged, and that each recorded rating change is the one
+        applied to the player's match surface.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        elo = ELO(1500, 2023)
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        expected = elo.elo_calculation(df, elo.initial_elos(['Hard', 'Clay', 'Grass'], names))
+        assert elo.history is None
+        recorded = elo.elo_calculation(df, elo.initial_elos(['Hard', 'Clay', 'Grass'], names), history=True)
+        np.testing.assert_array_equal(recorded.to_numpy(), expected.to_numpy())
+        assert len(elo.history) == 2 * len(df)
+
+        series = elo.history.series('Player_3')
+        played = df[(df['winner_name'] == 'Player_3') | (df['loser_name'] == 'Player_3')]
+        assert list(series['match']) == list(played.index)
+        assert list(series['column']) == [f'{surface}_ELO' for surface in played['surface']]
+        np.testing.assert_array_equal(series['pre'].to_numpy() < series['post'].to_numpy(), (played['winner_name'] == 'Player_3').to_numpy())
+        assert series['pre'].dtype == np.float32
+
+        # The player's last match leaves the rating they end with on its surface.
+        last = series.iloc[-1]
+        assert last['post'] == pytest.approx(recorded.loc['Player_3', last['column']], abs=1e-3)
+
+        ranged = elo.history.series('Player_3', start='2017-01-01', end=20190101)
+        assert ranged['date'].between(20170101, 20181231).all()
+        assert len(ranged) == played['Year'].between(2017, 2018).sum()
+
+    def test_save_load(self, df, tmp_path):
+        """
+        Tests that a saved history is read back unchanged.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            tmp_path: A temporary directory path provided by pytest to store the history.
+        """
+        elo = ELO(1500, 2023)
+        elo.elo_calculation(df, elo.initial_elos(['Hard', 'Clay', 'Grass'], sorted(set(df['winner_name']) | set(df['loser_name']))), history=True)
+        path = str(tmp_path / 'history.npz')
+        elo.history.save(path)
+
+        loaded = RatingHistory.load(path)
+        pd.testing.assert_frame_equal(loaded.series('Player_0'), elo.history.series('Player_0'))
+        with pytest.raises(KeyError):
+            loaded.series('Player_9')
+
+    def test_skillo_history(self, df):
+        """
+        Tests that the SkillO history records each match's mean before and after on the match surface, with the final
+        means of the row by row calculation given the same step sizes.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        skillo = skillO(25, 8.3333, 2023)
+        np.random.seed(0)
+        history = skillo.rating_history(df)
+        assert skillo.history is history
+
+        series = history.series('Player_5')
+        assert len(history) == 2 * len(df)
+        assert series['pre'].iloc[0] == 25
+        assert list(series['column'].str[:-len('_mean')]) == list(df.loc[series['match'], 'surface'])
+
+        np.random.seed(0)
+        names = list(history.player_index.names)
+        expected = skillo.skillO_calculation(df, skillo.initial_skills(['Hard', 'Clay', 'Grass'], names))
+        last = series.iloc[-1]
+        np.testing.assert_allclose(last['post'], expected.loc['Player_5', last['column']], rtol=1e-6)
@@ -0,0 +1,101 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.rating_runner import RatingRunner
+from src.elo_engine import EloEngine
+from src.skillo_engine import SkillOEngine
+from src.elo_calculations import ELO
+from src.player_index import PlayerIndex
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of random matches between a small group of players, including some from the current year.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    rng = np.random.default_rng(0)
+    rows = 300
+    names = np.array([f'Player_{i}' for i in range(15)], dtype=object)
+    winners = rng.integers(0, 15, rows)
+    losers = (winners + rng.integers(1, 15, rows)) % 15
+    data = {
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A', 'F', 'D', 'C'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'Year': np.sort(rng.integers(2015, 2024, rows))}
+
+    return pd.DataFrame(data)
+
+class Test_rating_runner():
+    """
+    Class to test the rating_runner script.
+    """
+    def test_elo_models(self, df):
+        """
+        Tests that ELO models with different K and decay run together give exactly the ratings of running each alone.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        runner = RatingRunner(2023)
+        runner.add('elo', EloEngine(2023))
+        runner.add('elo_k32', EloEngine(2023), K=32)
+        runner.add('elo_slow_decay', EloEngine(2023, decay_rate=0.1), initial_rating=1400)
+        ratings = runner.run(df)
+
+        training = df[df['Year'] < 2023]
+        player_index = PlayerIndex.from_matches(training)
+        for name, engine, initial_rating, K in [('elo', EloEngine(2023), 1500, 20), ('elo_k32', EloEngine(2023), 1500, 32),
+                                                ('elo_slow_decay', EloEngine(2023, decay_rate=0.1), 1400, 20)]:
+            expected = engine.run(np.full((len(player_index), 3), float(initial_rating)),
+                                  engine.match_arrays(training, player_index, runner.surfaces, K), runner.surfaces)
+            np.testing.assert_array_equal(ratings[name].to_numpy(), expected)
+            assert list(ratings[name].columns) == ['Hard_ELO', 'Clay_ELO', 'Grass_ELO']
+
+        elo = ELO(1500, 2023)
+        names = list(ratings['elo'].index)
+        expected = elo.elo_calculation(df, elo.initial_elos(runner.surfaces, names))
+        np.testing.assert_array_equal(ratings['elo'].to_numpy(), expected.to_numpy())
+
+    def test_skillo_runs(self, df):
+        """
+        Tests that SkillO runs alongside ELO average the runs of the engine run one at a time with the same random numbers.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        runner = RatingRunner(2023)
+        runner.add('elo', EloEngine(2023))
+        runner.add('skillo', SkillOEngine(2023, beta=1), runs=3, rng=np.random.default_rng(7))
+        ratings = runner.run(df)
+
+        training = df[df['Year'] < 2023]
+        engine = SkillOEngine(2023, beta=1)
+        player_index = PlayerIndex.from_matches(training)
+        matches = EloEngine(2023).match_arrays(training, player_index, runner.surfaces)
+        matches['gamma'] = engine.gamma_factors(training)
+        rng = np.random.default_rng(7)
+        runs = []
+        for _ in range(3):
+            matches['scale'] = engine.draw_scales(matches['gamma'], rng)
+            runs.append(engine.run(np.full((len(player_index), 3), 25.0), np.full((len(player_index), 3), 8.3333), matches, runner.surfaces))
+
+        np.testing.assert_array_equal(ratings['skillo'][['Hard_mean', 'Clay_mean', 'Grass_mean']].to_numpy(), np.mean([means for means, _ in runs], axis=0))
+        np.testing.assert_array_equal(ratings['skillo'][['Hard_variance', 'Clay_variance', 'Grass_variance']].to_numpy(), np.mean([variances for _, variances in runs], axis=0))
+
+    def test_add_errors(self):
+        """
+        Tests that registering a model that is not an engine, or twice under one name, raises an error, and so does
+        running without models.
+        """
+        runner = RatingRunner(2023)
+        with pytest.raises(ValueError, match="No models"):
+            runner.run(pd.DataFrame())
+        with pytest.raises(TypeError, match="EloEngine or SkillOEngine"):
+            runner.add('elo', ELO(1500, 2023))
+        runner.add('elo', EloEngine(2023))
+        with pytest.raises(ValueError, match="already registered"):
+            runner.add('elo', EloEngine(2023), K=32)
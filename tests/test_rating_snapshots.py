@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.rating_snapshots import RatingSnapshots
+from src.elo_calculations import ELO
+from src.skillo_calculations import skillO
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of random matches between a small group of players over several seasons, with two tournament start
+    dates a season.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    rng = np.random.default_rng(0)
+    rows = 300
+    names = np.array([f'Player_{i}' for i in range(12)], dtype=object)
+    winners = rng.integers(0, 12, rows)
+    losers = (winners + rng.integers(1, 12, rows)) % 12
+    years = np.sort(rng.integers(2015, 2021, rows))
+    data = {
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A', 'D'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'Year': years,
+        'tourney_date': years * 10000 + np.where(np.arange(rows) % 40 < 20, 301, 701)}
+
+    return pd.DataFrame(data).sort_values('tourney_date', kind='stable').reset_index(drop=True)
+
+class Test_rating_snapshots():
+    """
+    Class to test the rating_snapshots script.
+    """
+    def test_boundaries(self, df):
+        """
+        Tests that snapshots are taken at every season or tournament start date, and after the last match.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        keys, positions = RatingSnapshots.boundaries(df)
+        assert list(keys) == [20160101, 20170101, 20180101, 20190101, 20200101, 20210101]
+        assert positions[-1] == len(df)
+        assert (df['Year'].to_numpy()[positions[:-1]] != df['Year'].to_numpy()[positions[:-1] - 1]).all()
+
+        keys, positions = RatingSnapshots.boundaries(df, by='tournament')
+        assert len(keys) == df['tourney_date'].nunique()
+        with pytest.raises(ValueError):
+            RatingSnapshots.boundaries(df, by='round')
+
+    def test_elo_as_of(self, df):
+        """
+        Tests that the ELO ratings as of a season start are exactly those of a calculation over the earlier matches.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        elo = ELO(1500, 2023)
+        for by in ['year', 'tournament']:
+            snapshots = elo.rating_snapshots(df, by=by)
+            names = list(snapshots.player_index.names)
+            # Season snapshots hold the matches of the seasons before the date, tournament snapshots every earlier match.
+            for date, cutoff in [('2018-01-01', 20180101), (20190615, 20190101 if by == 'year' else 20190615), ('2030-01-01', 20300101)]:
+                expected = elo.elo_calculation(df[df['tourney_date'] < cutoff], elo.initial_elos(['Hard', 'Clay', 'Grass'], names))
+                np.testing.assert_array_equal(snapshots.as_of(date).to_numpy(), expected.to_numpy())
+
+        np.testing.assert_array_equal(snapshots.as_of(20000101).to_numpy(), 1500.0)
+
+    def test_elo_cutoff_decay(self, df):
+        """
+        Tests that with the decay relative to each snapshot, a season snapshot is exactly the ELO calculation with that
+        season as the current year.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        elo = ELO(1500, 2023)
+        snapshots = elo.rating_snapshots(df, decay='cutoff')
+        names = list(snapshots.player_index.names)
+        for year in [2016, 2018, 2021]:
+            season = ELO(1500, year)
+            expected = season.elo_calculation(df, season.initial_elos(['Hard', 'Clay', 'Grass'], names))
+            np.testing.assert_array_equal(snapshots.as_of(f'{year}-01-01').to_numpy(), expected.to_numpy())
+
+        # The decay relative to the current year gives different ratings before the last season.
+        assert not np.array_equal(elo.rating_snapshots(df).as_of('2018-01-01').to_numpy(), snapshots.as_of('2018-01-01').to_numpy())
+        with pytest.raises(ValueError):
+            elo.rating_snapshots(df, decay='none')
+
+    def test_skillo_as_of(self, df):
+        """
+        Tests that the final SkillO snapshot is the result of the row by row calculation with the same step sizes, and
+        that the snapshots follow the surface coupling.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        skillo = skillO(25, 8.3333, 2023)
+        np.random.seed(0)
+        snapshots = skillo.rating_snapshots(df)
+        np.random.seed(0)
+        expected = skillo.skillO_calculation(df, skillo.initial_skills(['Hard', 'Clay', 'Grass'], list(snapshots.player_index.names)))
+
+        np.testing.assert_allclose(snapshots.as_of('2021-01-01').to_numpy(), expected[snapshots.columns].to_numpy(), rtol=1e-12)
+        assert len(snapshots) == 6
+
+        # The snapshots of a class with a surface coupling are the engine run with it.
+        coupled = skillO(25, 8.3333, 2023, coupling={('Hard', 'Clay'): 0.0, ('Clay', 'Grass'): 0.5})
+        np.random.seed(0)
+        snapshots = coupled.rating_snapshots(df)
+        engine, player_index, matches = coupled.engine_matches(df, ['Hard', 'Clay', 'Grass'], list(snapshots.player_index.names))
+        np.random.seed(0)
+        matches['scale'] = engine.draw_scales(matches['gamma'])
+        means, variances = engine.run(np.full((len(player_index), 3), 25.0), np.full((len(player_index), 3), 8.3333), matches, ['Hard', 'Clay', 'Grass'])
+        np.testing.assert_array_equal(snapshots.as_of('2021-01-01').to_numpy(), np.hstack([means, variances]))
+        assert not np.allclose(snapshots.as_of('2021-01-01').to_numpy(), expected[snapshots.columns].to_numpy())
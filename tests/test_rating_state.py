@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.rating_state import RatingState
+
+@pytest.fixture
+def state():
+    """
+    Rating state for two players with one match applied.
+
+    Returns:
+        Instance of the RatingState class.
+    """
+    return RatingState(['Player_1', 'Player_2'], ['Hard_ELO', 'Clay_ELO'], np.array([[1510.0, 1505.0], [1490.0, 1495.0]]),
+                       {'model': 'ELO'}, {'date': 20230116, 'count': 1})
+
+class Test_rating_state():
+    """
+    Class to test the rating_state script.
+    """
+    def test_save_load(self, state, tmp_path):
+        """
+        Tests that a saved state is read back unchanged, and that saving leaves no temporary file.
+
+        Parameters:
+            state (class): An instance of the RatingState class to be tested.
+            tmp_path: A temporary directory path provided by pytest to store the state.
+        """
+        path = str(tmp_path / 'state.npz')
+        state.save(path)
+        loaded = RatingState.load(path)
+
+        np.testing.assert_array_equal(loaded.ratings, state.ratings)
+        assert list(loaded.player_index.names) == ['Player_1', 'Player_2']
+        assert loaded.columns == ['Hard_ELO', 'Clay_ELO']
+        assert loaded.parameters == {'model': 'ELO'}
+        assert loaded.as_of == 20230116
+        assert [p.name for p in tmp_path.iterdir()] == ['state.npz']
+
+    def test_new_matches(self, state):
+        """
+        Tests that matches before the cursor, and those already applied on the cursor date, are skipped.
+
+        Parameters:
+            state (class): An instance of the RatingState class to be tested.
+        """
+        data = pd.DataFrame({'tourney_date': [20230102, 20230116, 20230116, 20230130], 'match_num': [1, 1, 2, 1]})
+        new_matches = state.new_matches(data)
+        assert list(new_matches['match_num']) == [2, 1]
+
+        state.advance(new_matches.iloc[:1])
+        assert state.cursor == {'date': 20230116, 'count': 2}
+        state.advance(new_matches.iloc[1:])
+        assert state.cursor == {'date': 20230130, 'count': 1}
+        assert len(state.new_matches(data)) == 0
+
+        with pytest.raises(KeyError, match="tourney_date"):
+            state.new_matches(data.drop(columns='tourney_date'))
+
+    def test_add_players(self, state):
+        """
+        Tests that only players not in the state are added, with the initial rating.
+
+        Parameters:
+            state (class): An instance of the RatingState class to be tested.
+        """
+        state.add_players(['Player_3', 'Player_1', 'Player_3'], 1500.0)
+        assert list(state.player_index.names) == ['Player_1', 'Player_2', 'Player_3']
+        np.testing.assert_array_equal(state.to_dataframe().loc['Player_3'], [1500.0, 1500.0])
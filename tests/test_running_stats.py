@@ -0,0 +1,47 @@
+import pytest
+import numpy as np
+from src.running_stats import RunningStats
+
+@pytest.fixture
+def arrays():
+    """
+    Random arrays far from zero, where summing squares loses precision.
+
+    Returns:
+        Numpy array of 50 stacked 4 by 3 arrays.
+    """
+    rng = np.random.default_rng(0)
+    return 1e6 + rng.normal(0, 0.01, (50, 4, 3))
+
+class Test_running_stats():
+    """
+    Class to test the running_stats script.
+    """
+    def test_matches_numpy(self, arrays):
+        """
+        Tests that the running mean, standard deviation and standard error match numpy over all the arrays at once.
+
+        Parameters:
+            arrays (numpy array): Stacked arrays to add.
+        """
+        stats = RunningStats((4, 3))
+        stats.add_all(arrays[:20])
+        stats.add_all(arrays[20:])
+
+        assert stats.count == 50
+        np.testing.assert_allclose(stats.mean, arrays.mean(axis=0), rtol=1e-15)
+        np.testing.assert_allclose(stats.std(), arrays.std(axis=0, ddof=1), rtol=1e-6)
+        np.testing.assert_allclose(stats.standard_error(), arrays.std(axis=0, ddof=1) / np.sqrt(50), rtol=1e-6)
+
+    def test_too_few(self, arrays):
+        """
+        Tests that the spread is NaN until two arrays are added.
+
+        Parameters:
+            arrays (numpy array): Stacked arrays to add.
+        """
+        stats = RunningStats((4, 3))
+        assert np.isnan(stats.std()).all()
+        stats.add(arrays[0])
+        assert np.isnan(stats.standard_error()).all()
+        np.testing.assert_array_equal(stats.mean, arrays[0])
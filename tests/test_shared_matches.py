@@ -0,0 +1,107 @@
+import pytest
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from src.shared_matches import SharedMatches, attach_worker, worker_matches
+from src.match_store import MatchStore
+from src.player_index import PlayerIndex
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe with arbitrary player names for tennis data across two years.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    data = {
+        'tourney_name': ['Australian Open', 'Roland Garros', 'Wimbledon', 'Australian Open', 'Roland Garros', 'Wimbledon'],
+        'surface': ['Hard', 'Clay', 'Grass', 'Hard', 'Clay', 'Grass'],
+        'tourney_level': ['G', 'G', 'G', 'G', 'M', 'G'],
+        'tourney_date': [20220117, 20220530, 20220627, 20230116, 20230528, 20230703],
+        'winner_name': ['Player_1', 'Player_3', 'Player_2', 'Player_4', 'Player_1', 'Player_3'],
+        'loser_name': ['Player_2', 'Player_4', 'Player_3', 'Player_1', 'Player_4', 'Player_2'],
+        'Year': [2022, 2022, 2022, 2023, 2023, 2023]}
+
+    return pd.DataFrame(data)
+
+def count_wins(player_id):
+    """
+    Counts the wins of a player from the matches attached by the pool worker.
+
+    Args:
+        player_id (int): ID of the player.
+
+    Returns:
+        Number of wins as an int.
+    """
+    return int((worker_matches()['winner_id'] == player_id).sum())
+
+class Test_shared_matches():
+    """
+    Class to test the shared_matches script.
+    """
+    def test_publish(self, df):
+        """
+        Tests that the published columns hold the encoded matches.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        with SharedMatches.publish(df) as shared:
+            assert len(shared) == 6
+            assert list(shared.player_index.names_of(shared['winner_id'])) == list(df['winner_name'])
+            assert list(np.array(shared.categories['surface'])[shared['surface']]) == list(df['surface'])
+            assert list(shared['Year']) == list(df['Year'])
+            assert list(shared.codes_of('tourney_level', ['M', 'D'])) == [1, -1]
+
+    def test_attach_read_only(self, df):
+        """
+        Tests that an attached table shares the published data and cannot be written to.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        with SharedMatches.publish(df) as shared:
+            attached = SharedMatches.attach(shared.descriptor())
+            np.testing.assert_array_equal(attached['loser_id'], shared['loser_id'])
+            np.testing.assert_array_equal(attached['tourney_date'], df['tourney_date'])
+            with pytest.raises(ValueError):
+                attached['winner_id'][0] = 5
+            attached.close()
+
+    def test_process_pool(self, df):
+        """
+        Tests that pool workers attached through the initializer see the published matches.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        with SharedMatches.publish(df) as shared:
+            with ProcessPoolExecutor(max_workers=2, initializer=attach_worker, initargs=(shared.descriptor(),)) as executor:
+                wins = list(executor.map(count_wins, range(4)))
+        assert wins == [2, 1, 2, 1]
+
+    def test_publish_store_tour(self, df, tmp_path):
+        """
+        Tests that a single tour read from a store holding two tours is encoded through the player index passed in,
+        rather than published with the store's IDs, which also number the other tour's players.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            tmp_path: A temporary directory path provided by pytest to hold the store.
+        """
+        wta = df.assign(tour='wta', winner_name=df['winner_name'].str.replace('Player', 'WTA_Player'),
+                        loser_name=df['loser_name'].str.replace('Player', 'WTA_Player'))
+        store = MatchStore(str(tmp_path / 'store'))
+        store.write_frame(wta)
+        store.write_frame(df)
+        atp = store.load_matches(tours=['atp'])
+        player_index = PlayerIndex.from_matches(atp)
+        assert len(player_index) == 4 and atp['winner_id'].max() >= len(player_index)
+
+        with SharedMatches.publish(atp, player_index) as shared:
+            assert shared.player_index is player_index
+            names = pd.Categorical.from_codes(shared['winner_id'], categories=player_index.names)
+            assert list(names) == list(df['winner_name'])
+            assert list(player_index.names_of(shared['loser_id'])) == list(df['loser_name'])
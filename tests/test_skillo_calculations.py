@@ -2,6 +2,8 @@ import pytest
 from src.skillo_calculations import skillO
 import os
 import pandas as pd
+import numpy as np
+import math
 
 @pytest.fixture
 def skillo():
@@ -106,6 +108,122 @@ class Test_skillo_calculations():
         skillo_calc = skillo.skillO_calculation(df, player_skillo_df)
         assert isinstance(skillo_calc, pd.DataFrame), f"SkillO calculation should return a dataframe, instead returned {type(skillo_calc)}"
 
+    def test_simulate_multiple_runs(self, skillo):
+        """
+        Tests that running the simulations together gives the average of running skillO_calculation once per simulation
+        with the same random numbers.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+        """
+        rng = np.random.default_rng(0)
+        names = np.array([f'Player_{i}' for i in range(10)], dtype=object)
+        winners = rng.integers(0, 10, 150)
+        data = pd.DataFrame({
+            'surface': rng.choice(['Hard', 'Clay', 'Grass'], 150),
+            'tourney_level': rng.choice(['G', 'M', 'A', 'F', 'D'], 150),
+            'winner_name': names[winners],
+            'loser_name': names[(winners + rng.integers(1, 10, 150)) % 10],
+            'Year': np.sort(rng.integers(2018, 2023, 150))})
+        surfaces = ['Hard', 'Clay', 'Grass']
+        players = list(names[::-1])
+
+        np.random.seed(4)
+        runs = [skillo.skillO_calculation(data, skillo.initial_skills(surfaces, players), gamma=skillo.gamma) for _ in range(5)]
+        np.random.seed(4)
+        averaged = skillo.simulate_multiple_runs(data, 5, surfaces, players)
+
+        assert list(averaged.index) == sorted(players), "Players should be sorted by name"
+        expected = (sum(runs) / 5).loc[averaged.index, averaged.columns]
+        np.testing.assert_allclose(averaged.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+    def test_seeded_runs(self, skillo, df):
+        """
+        Tests that seeded runs give identical averages for any number of workers, and different averages for another seed.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        one = skillo.simulate_multiple_runs(df, 7, surfaces, names, seed=11)
+        np.random.seed(0)
+        for workers in [2, 3, 8]:
+            pd.testing.assert_frame_equal(skillo.simulate_multiple_runs(df, 7, surfaces, names, seed=11, workers=workers), one)
+        assert not skillo.simulate_multiple_runs(df, 7, surfaces, names, seed=12).equals(one), "Another seed should give other ratings"
+
+        with pytest.raises(ValueError):
+            skillo.simulate_multiple_runs(df, 7, surfaces, names, workers=0)
+
+    def test_converged_runs(self, skillo, df):
+        """
+        Tests that runs stop once the standard error of the players of interest is within the tolerance, and that
+        without reaching it they stop at the number of simulations with the standard error of all those runs.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        skillo.simulate_multiple_runs(df, 1000, surfaces, names, seed=3, tolerance=0.005, players=['Player_1'], batch_size=20)
+        error, runs = skillo.standard_error, skillo.runs
+        assert error <= 0.005 and runs < 1000 and runs % 20 == 0, f"Runs should stop in the batch the error falls within 0.005, made {runs} with error {error}"
+
+        ratings = skillo.simulate_multiple_runs(df, 25, surfaces, names, seed=3, tolerance=1e-9, batch_size=10)
+        error, runs = skillo.standard_error, skillo.runs
+        assert runs == 25, f"Runs should stop at the number of simulations, made {runs}"
+        every_run = skillo.simulate_multiple_runs(df, 25, surfaces, names, seed=3)
+        assert isinstance(every_run, pd.DataFrame) and skillo.runs == 25 and skillo.standard_error == error, "Without a tolerance the error and runs should still be kept"
+        np.testing.assert_allclose(ratings.to_numpy(), every_run.to_numpy(), rtol=1e-12)
+
+        engine, player_index, matches = skillo.engine_matches(df, surfaces, names)
+        means, _ = skillo.calculate_runs(engine, player_index, matches, surfaces, 25, np.random.SeedSequence(3))
+        assert error == pytest.approx(np.max(means.std(axis=0, ddof=1) / 5), rel=1e-6), "Error should be the largest standard error of the means"
+
+    def test_dispersion(self, skillo, df):
+        """
+        Tests that streaming the runs in batches gives the same averages as one batch, and that the dispersion is the
+        standard deviation of each rating across the runs.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        batched = skillo.simulate_multiple_runs(df, 12, surfaces, names, seed=6, batch_size=5)
+        dispersion = skillo.dispersion
+        pd.testing.assert_frame_equal(skillo.simulate_multiple_runs(df, 12, surfaces, names, seed=6, batch_size=12), batched)
+
+        engine, player_index, matches = skillo.engine_matches(df, surfaces, names)
+        means, variances = skillo.calculate_runs(engine, player_index, matches, surfaces, 12, np.random.SeedSequence(6))
+        expected = np.hstack([means.std(axis=0, ddof=1), variances.std(axis=0, ddof=1)])
+        np.testing.assert_allclose(dispersion.loc[list(player_index.names)].to_numpy(), expected, rtol=1e-6, atol=1e-12)
+
+    def test_expected_run(self, skillo, df, monkeypatch):
+        """
+        Tests that the expected run equals skillO_calculation with every random step replaced by its expected size,
+        and that it lands near the average of many random runs.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            monkeypatch (pytest fixture): Replaces the normal draws of skillO_calculation.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        expected = skillo.expected_run(df, surfaces, names)
+        averaged = skillo.simulate_multiple_runs(df, 500, surfaces, names, seed=0)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(np.random, 'normal', lambda loc, scale: scale * math.sqrt(2 / math.pi))
+            reference = skillo.skillO_calculation(df, skillo.initial_skills(surfaces, names), gamma=skillo.gamma)
+
+        np.testing.assert_allclose(expected.to_numpy(), reference.loc[expected.index, expected.columns].to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(expected.to_numpy(), averaged.to_numpy(), atol=0.01)
+
     def test_final_skillo_csv(self, skillo, tmp_path, df):
         """
         Tests the final skillo csv function to create a csv file in the data folder.
@@ -120,3 +238,50 @@ class Test_skillo_calculations():
         skillo.final_csv(df, file_path=str(file_path))
 
         assert file_path.exists(), "The skillo.csv file was not created"
+
+    def test_final_skillo_csv_cache(self, skillo, tmp_path, df):
+        """
+        Tests that the skillo csv is reused when the data and parameters are unchanged, without the run statistics of
+        an earlier calculation, and rebuilt when either changes.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+            tmp_path: A temporary directory path provided by pytest to store the generated CSV file.
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        file_path = tmp_path / "skillo.csv"
+        first = skillo.final_csv(df, file_path=str(file_path))
+        modified = os.path.getmtime(file_path)
+
+        assert skillo.runs == 30 and skillo.dispersion is not None
+
+        cached = skillo.final_csv(df, file_path=str(file_path))
+        assert os.path.getmtime(file_path) == modified
+        pd.testing.assert_frame_equal(cached, first, check_names=False)
+        assert skillo.standard_error is None and skillo.dispersion is None and skillo.runs is None, "Run statistics are not kept with the csv"
+
+        skillo.gamma = 0.2
+        skillo.final_csv(df, file_path=str(file_path))
+        assert os.path.getmtime(file_path) != modified
+
+        modified = os.path.getmtime(file_path)
+        skillo.final_csv(df.iloc[:-1], file_path=str(file_path))
+        assert os.path.getmtime(file_path) != modified
+
+    def test_expected_matrix(self, skillo, player_skillo_df):
+        """
+        Tests that every entry of the win probability matrix matches the pairwise expected game score.
+
+        Parameters:
+            skillo (class): An instance of the SkillO class to be tested.
+            player_skillo_df (pandas dataframe): Mock dataframe of tennis players SkillO ratings.
+        """
+        skillo.skill_dataframe = player_skillo_df
+        names = list(player_skillo_df.index)
+        matrix = skillo.expected_matrix(names, 'Clay')
+        for i, first in enumerate(names):
+            for j, second in enumerate(names):
+                expected = skillo.expected_game_score(player_skillo_df.loc[first, 'Clay_mean'], player_skillo_df.loc[second, 'Clay_mean'],
+                                                      player_skillo_df.loc[first, 'Clay_variance'], player_skillo_df.loc[second, 'Clay_variance'])
+                assert matrix[i, j] == pytest.approx(expected)
+        np.testing.assert_array_equal(skillo.expected_matrix([1, 0], 'Clay'), matrix[np.ix_([1, 0], [1, 0])])
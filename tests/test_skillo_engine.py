@@ -0,0 +1,183 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.skillo_engine import SkillOEngine
+from src.elo_engine import EloEngine
+from src.skillo_calculations import skillO
+from src.player_index import PlayerIndex
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of random matches between a small group of players.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    rng = np.random.default_rng(0)
+    rows = 200
+    names = np.array([f'Player_{i}' for i in range(12)], dtype=object)
+    winners = rng.integers(0, 12, rows)
+    losers = (winners + rng.integers(1, 12, rows)) % 12
+    data = {
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A', 'F', 'D', 'C'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'Year': np.sort(rng.integers(2015, 2023, rows))}
+
+    return pd.DataFrame(data)
+
+class Test_skillo_engine():
+    """
+    Class to test the skillo_engine script.
+    """
+    def test_matches_skillo_calculation(self, df):
+        """
+        Tests that the engine gives the means and variances of skillO_calculation when drawing the same random numbers.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        skillo = skillO(25, 8.3333, 2023, beta=1, year_decay=1.1, gamma=0.1)
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        np.random.seed(3)
+        expected = skillo.skillO_calculation(df, skillo.initial_skills(surfaces, names), gamma=0.3)
+
+        engine = SkillOEngine(2023, beta=1, year_decay=1.1, gamma=0.1)
+        player_index = PlayerIndex(names)
+        matches = EloEngine(2023).match_arrays(df, player_index, surfaces)
+        matches['gamma'] = engine.gamma_factors(df, gamma=0.3)
+        np.random.seed(3)
+        matches['scale'] = engine.draw_scales(matches['gamma'])
+        means, variances = engine.run(np.full((len(names), 3), 25.0), np.full((len(names), 3), 8.3333), matches, surfaces)
+
+        np.testing.assert_array_equal(means, expected[[f'{s}_mean' for s in surfaces]].to_numpy())
+        np.testing.assert_array_equal(variances, expected[[f'{s}_variance' for s in surfaces]].to_numpy())
+
+    def test_other_surface_column(self, df):
+        """
+        Tests that matches on a surface outside the update surfaces adjust all three of them, like skillO_calculation,
+        with the rating columns in an order where those surfaces are not evenly spaced.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        df.loc[::5, 'surface'] = 'Carpet'
+        surfaces = ['Hard', 'Carpet', 'Clay', 'Grass']
+        skillo = skillO(25, 8.3333, 2023)
+        names = sorted(set(df['winner_name']) | set(df['loser_name']))
+        np.random.seed(5)
+        expected = skillo.skillO_calculation(df, skillo.initial_skills(surfaces, names))
+
+        engine = SkillOEngine(2023)
+        matches = EloEngine(2023).match_arrays(df, PlayerIndex(names), surfaces)
+        matches['gamma'] = engine.gamma_factors(df, gamma=0.1)
+        np.random.seed(5)
+        matches['scale'] = engine.draw_scales(matches['gamma'])
+        means, variances = engine.run(np.full((len(names), 4), 25.0), np.full((len(names), 4), 8.3333), matches, surfaces)
+
+        np.testing.assert_array_equal(means, expected[[f'{s}_mean' for s in surfaces]].to_numpy())
+        np.testing.assert_array_equal(variances, expected[[f'{s}_variance' for s in surfaces]].to_numpy())
+
+    def test_runs_together(self, df):
+        """
+        Tests that runs calculated together over a run by player by surface array are identical to each run alone.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        engine = SkillOEngine(2023, beta=1)
+        player_index = PlayerIndex.from_matches(df)
+        matches = EloEngine(2023).match_arrays(df, player_index, surfaces)
+        matches['gamma'] = engine.gamma_factors(df)
+        scales = np.column_stack([engine.draw_scales(matches['gamma'], np.random.default_rng(run)) for run in range(4)])
+        together = engine.run(np.full((4, len(player_index), 3), 25.0), np.full((4, len(player_index), 3), 8.3333), dict(matches, scale=scales), surfaces)
+
+        for run in range(4):
+            alone = engine.run(np.full((len(player_index), 3), 25.0), np.full((len(player_index), 3), 8.3333), dict(matches, scale=scales[:, run]), surfaces)
+            np.testing.assert_array_equal(together[0][run], alone[0])
+            np.testing.assert_array_equal(together[1][run], alone[1])
+
+    def test_run_one_at_a_time(self, df):
+        """
+        Tests that the batched run gives exactly the results of applying the matches one at a time, in batches of one.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        df.loc[::6, 'surface'] = 'Carpet'
+        surfaces = ['Hard', 'Carpet', 'Clay', 'Grass']
+        engine = SkillOEngine(2023, beta=1)
+        player_index = PlayerIndex.from_matches(df)
+        matches = EloEngine(2023).match_arrays(df, player_index, surfaces)
+        matches['gamma'] = engine.gamma_factors(df)
+        matches['scale'] = np.column_stack([engine.draw_scales(matches['gamma'], np.random.default_rng(run)) for run in range(3)])
+
+        sequential = engine.run(np.full((3, len(player_index), 4), 25.0), np.full((3, len(player_index), 4), 8.3333), matches, surfaces,
+                                np.arange(len(df) + 1))
+        batched = engine.run(np.full((3, len(player_index), 4), 25.0), np.full((3, len(player_index), 4), 8.3333), matches, surfaces)
+
+        np.testing.assert_array_equal(batched[0], sequential[0])
+        np.testing.assert_array_equal(batched[1], sequential[1])
+
+    def test_coupling(self, df):
+        """
+        Tests that a fitted coupling gives the same results batched and one match at a time, and that a share of 0 leaves
+        the ratings of a surface unchanged by matches on the others.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        surfaces = ['Hard', 'Clay', 'Grass']
+        coupling = {('Hard', 'Clay'): 0.5, ('Clay', 'Hard'): 0.9, ('Hard', 'Grass'): 0.0, ('Clay', 'Grass'): 0.0}
+        engine = SkillOEngine(2023, coupling=coupling)
+        player_index = PlayerIndex.from_matches(df)
+        matches = EloEngine(2023).match_arrays(df, player_index, surfaces)
+        matches['gamma'] = engine.gamma_factors(df)
+        matches['scale'] = np.column_stack([engine.draw_scales(matches['gamma'], np.random.default_rng(run)) for run in range(2)])
+
+        means, variances = engine.run(np.full((2, len(player_index), 3), 25.0), np.full((2, len(player_index), 3), 8.3333), matches, surfaces)
+        sequential = engine.run(np.full((2, len(player_index), 3), 25.0), np.full((2, len(player_index), 3), 8.3333), matches, surfaces,
+                                np.arange(len(df) + 1))
+        np.testing.assert_array_equal(sequential[0], means)
+
+        played_grass = np.unique(np.concatenate([matches['winner'][matches['surface'] == 2], matches['loser'][matches['surface'] == 2]]))
+        assert (np.delete(means[:, :, 2], played_grass, axis=1) == 25).all(), "Grass means should only move on grass with a share of 0"
+        assert (np.delete(variances[:, :, 2], played_grass, axis=1) == 8.3333).all(), "Grass variances should only move on grass with a share of 0"
+
+    def test_gamma_factors(self):
+        """
+        Tests the gamma of each match combines the base gamma, the tourney level and the year decay, with the gamma
+        passed in only used for the first match.
+        """
+        engine = SkillOEngine(2023, year_decay=0.5, gamma=0.1)
+        rows = pd.DataFrame({'tourney_level': ['G', 'M', 'C', 'D'], 'Year': [2022, 2022, 2023, 2021]})
+        expected = [0.3 * 4 * np.exp(-0.5), 0.1 * 2 * np.exp(-0.5), 0.1, 0.1 * 0.5 * np.exp(-1.0)]
+        np.testing.assert_allclose(engine.gamma_factors(rows, gamma=0.3), expected)
+
+    def test_draw_scales(self):
+        """
+        Tests that the step sizes are non-negative and repeat for the same seed.
+        """
+        engine = SkillOEngine(2023)
+        gammas = np.full(100, 0.2)
+        scales = engine.draw_scales(gammas, np.random.default_rng(1))
+        assert (scales >= 0).all(), "Step sizes should not be negative"
+        np.testing.assert_array_equal(scales, engine.draw_scales(gammas, np.random.default_rng(1)))
+
+    def test_missing_surface(self, df):
+        """
+        Tests that a KeyError is raised when an update surface has no rating column.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+        """
+        engine = SkillOEngine(2023)
+        hard = df[df['surface'] == 'Hard']
+        player_index = PlayerIndex.from_matches(hard)
+        matches = EloEngine(2023).match_arrays(hard, player_index, ['Hard'])
+        with pytest.raises(KeyError, match="no rating column"):
+            engine.run(np.zeros((len(player_index), 1)), np.zeros((len(player_index), 1)), matches, ['Hard'])
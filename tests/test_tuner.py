@@ -0,0 +1,165 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+from src.tuner import Tuner, SEARCH_SPACES, coupling_of
+from src.match_store import MatchStore
+
+@pytest.fixture
+def df():
+    """
+    Mock dataframe of random matches between 128 players over three seasons, followed by a complete 2023 Wimbledon draw
+    of 127 matches.
+
+    Returns:
+        Mock dataframe as a pandas dataframe.
+    """
+    rng = np.random.default_rng(0)
+    names = np.array([f'Player_{i}' for i in range(128)], dtype=object)
+    rows = 600
+    winners = rng.integers(0, 128, rows)
+    losers = (winners + rng.integers(1, 128, rows)) % 128
+    history = pd.DataFrame({
+        'tourney_name': 'Tour Event',
+        'surface': rng.choice(['Hard', 'Clay', 'Grass'], rows),
+        'tourney_level': rng.choice(['G', 'M', 'A'], rows),
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'winner_age': 25.0,
+        'loser_age': 27.0,
+        'Year': np.sort(rng.integers(2020, 2023, rows))})
+
+    # The lower numbered player of each match wins, round by round.
+    matches = []
+    players = list(range(128))
+    while len(players) > 1:
+        pairs = [(players[i], players[i + 1]) for i in range(0, len(players), 2)]
+        matches += [(min(pair), max(pair)) for pair in pairs]
+        players = [min(pair) for pair in pairs]
+    wimbledon = pd.DataFrame({
+        'tourney_name': 'Wimbledon',
+        'surface': 'Grass',
+        'tourney_level': 'G',
+        'winner_name': [names[winner] for winner, _ in matches],
+        'loser_name': [names[loser] for _, loser in matches],
+        'winner_age': 26.0,
+        'loser_age': 26.0,
+        'Year': 2023})
+
+    return pd.concat([history, wimbledon], ignore_index=True)
+
+@pytest.fixture
+def odds_dir(tmp_path):
+    """
+    Directory with mock Wimbledon 2023 odds, favouring the lowest numbered players.
+
+    Returns:
+        Path of the directory as a string.
+    """
+    weights = 1 / np.arange(1, 129)
+    odds = pd.DataFrame({'Player': [f'Player_{i}' for i in range(128)], 'normalized_winning_probability': weights / weights.sum()})
+    odds.to_csv(tmp_path / '2023_Wimbledon_Prob.csv', index=False)
+    return str(tmp_path)
+
+class Test_tuner():
+    """
+    Class to test the tuner script.
+    """
+    def test_sample(self, df, odds_dir, tmp_path):
+        """
+        Tests that sampled configurations stay in the search space and repeat for the same seed.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            odds_dir (str): Directory of the mock odds.
+            tmp_path: A temporary directory path provided by pytest to store the cache.
+        """
+        tuner = Tuner(df, tournaments=['Wimbledon'], odds_dir=odds_dir, cache_path=str(tmp_path / 'cache.jsonl'))
+        configs = tuner.sample('ELO', 10)
+        assert configs == tuner.sample('ELO', 10)
+        for config in configs:
+            for name, (kind, low, high) in SEARCH_SPACES['ELO'].items():
+                assert low <= config[name] <= high
+            assert isinstance(config['K'], int)
+
+        with pytest.raises(ValueError):
+            tuner.sample('Glicko', 1)
+        with pytest.raises(ValueError):
+            Tuner(df, tournaments=['Queens'])
+
+    def test_coupling_of(self):
+        """
+        Tests that the surface pair shares of a configuration are applied both ways, and that a configuration without
+        them keeps the default coupling.
+        """
+        coupling = coupling_of({'K': 20, 'Hard_Clay': 0.6, 'Hard_Grass': 0.7, 'Clay_Grass': 0.9})
+        assert coupling == {('Hard', 'Clay'): 0.6, ('Clay', 'Hard'): 0.6, ('Hard', 'Grass'): 0.7, ('Grass', 'Hard'): 0.7,
+                            ('Clay', 'Grass'): 0.9, ('Grass', 'Clay'): 0.9}
+        assert coupling_of({'K': 20, 'cross_surface': 0.8}) is None
+
+    def test_random_search_resumes(self, df, odds_dir, tmp_path):
+        """
+        Tests that a random search scores every configuration, and that running it again reads every result from the
+        cache instead of evaluating it again.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            odds_dir (str): Directory of the mock odds.
+            tmp_path: A temporary directory path provided by pytest to store the cache.
+        """
+        cache_path = tmp_path / 'cache.jsonl'
+        tuner = Tuner(df, tournaments=['Wimbledon'], odds_dir=odds_dir, cache_path=str(cache_path), max_workers=2)
+        results = tuner.random_search('ELO', n_configs=3, trials=4)
+
+        assert len(results) == 3
+        assert results['RMSE'].is_monotonic_increasing
+        assert len(cache_path.read_text().splitlines()) == 3
+
+        # An interrupted write leaves a partial last line, which is skipped.
+        with open(cache_path, 'a') as f:
+            f.write('{"key": "unfinis')
+        resumed = Tuner(df, tournaments=['Wimbledon'], odds_dir=odds_dir, cache_path=str(cache_path), max_workers=2)
+        pd.testing.assert_frame_equal(resumed.random_search('ELO', n_configs=3, trials=4), results)
+        assert resumed.context is None
+
+    def test_successive_halving(self, df, odds_dir, tmp_path):
+        """
+        Tests that each round of successive halving keeps the best configurations of the round before and gives them
+        more simulations.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            odds_dir (str): Directory of the mock odds.
+            tmp_path: A temporary directory path provided by pytest to store the cache.
+        """
+        cache_path = tmp_path / 'cache.jsonl'
+        tuner = Tuner(df, tournaments=['Wimbledon'], odds_dir=odds_dir, cache_path=str(cache_path), max_workers=2, skillo_runs=1)
+        results = tuner.successive_halving('skillO', n_configs=4, min_trials=2, eta=2)
+
+        assert list(results.groupby('round')['trials'].first()) == [2, 4, 8]
+        assert list(results.groupby('round').size()) == [4, 2, 1]
+        best = results[results['round'] == 0].head(2)
+        assert set(results[results['round'] == 1]['gamma']) == set(best['gamma'])
+        assert len(cache_path.read_text().splitlines()) == 7
+        assert all(json.loads(line)['model'] == 'skillO' for line in cache_path.read_text().splitlines())
+
+    def test_store_tour(self, df, odds_dir, tmp_path):
+        """
+        Tests that tuning over one tour of a match store holding two tours scores configurations exactly as tuning over
+        the same matches as a dataframe, though the store's player IDs also number the other tour's players.
+
+        Parameters:
+            df (pandas dataframe): Mock dataframe of tennis match history data.
+            odds_dir (str): Directory of the mock odds.
+            tmp_path: A temporary directory path provided by pytest to store the cache and the match store.
+        """
+        store = MatchStore(str(tmp_path / 'store'))
+        store.write_frame(df.assign(tour='wta', winner_name='WTA_' + df['winner_name'], loser_name='WTA_' + df['loser_name']))
+        store.write_frame(df)
+        atp = store.load_matches(tours=['atp'])
+        assert atp['winner_id'].min() >= 128, "The store should number the ATP players after the WTA players"
+
+        from_store = Tuner(atp, tournaments=['Wimbledon'], odds_dir=odds_dir, cache_path=str(tmp_path / 'store.jsonl'), max_workers=2)
+        from_frame = Tuner(df, tournaments=['Wimbledon'], odds_dir=odds_dir, cache_path=str(tmp_path / 'frame.jsonl'), max_workers=2)
+        pd.testing.assert_frame_equal(from_store.random_search('ELO', n_configs=2, trials=4),
+                                      from_frame.random_search('ELO', n_configs=2, trials=4))